@@ -0,0 +1,280 @@
+"""
+Load test the task endpoints and check the results against a baseline.
+
+Seeds a scratch SQLite database with tasks, starts gunicorn on it and
+drives the task list, task detail, create, edit-completed and delete
+endpoints all at once from concurrent clients. Reports each endpoint's
+requests per second, p50/p95/p99 latency, errors and the number of
+database queries one request makes. Run from the repository root:
+
+    python -m benchmarks.endpoints --tasks 100000
+
+With --save-baseline, the results are saved as the baseline for the number
+of tasks. Otherwise, if a baseline exists, the run fails when an endpoint
+makes more queries than in the baseline, or its p95 latency or throughput
+is worse by more than --tolerance. Timings are only comparable between
+runs on the same machine, so record baselines where they are checked.
+"""
+
+from .load import Client
+from .load import Scenario
+from .load import REPO_ROOT
+from .load import run_load
+from .load import run_server
+from .load import scratch_environment
+from .load import seed_database
+
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import uuid
+
+
+BASELINE_DIR: Path = REPO_ROOT / "benchmarks" / "baselines"
+
+
+def make_scenarios(tasks: int, deletable: int) -> Dict[str, Scenario]:
+    """
+    The request sent to each endpoint. Tasks 1 to tasks are viewed and
+    edited, and the deletable tasks after them are deleted in turn.
+    """
+    deletable_pks: Iterator[int] = iter(range(tasks + 1, tasks + deletable))
+    lock: threading.Lock = threading.Lock()
+
+    def task_list(client: Client) -> bool:
+        status, _ = client.request("GET", "/")
+        return status == 200
+
+    def task_detail(client: Client) -> bool:
+        pk: int = random.randint(1, tasks)
+        status, _ = client.request("GET", f"/task/{pk}")
+        return status == 200
+
+    def create_task(client: Client) -> bool:
+        status, _ = client.request(
+            "POST",
+            "/api/create-task",
+            {"title": f"Benchmark task {uuid.uuid4()}"},
+        )
+        return status == 201
+
+    def edit_task_completed(client: Client) -> bool:
+        pk: int = random.randint(1, tasks)
+        status, _ = client.request(
+            "POST",
+            f"/api/edit-task-completed/{pk}",
+            {"completed": random.choice(("true", "false"))},
+        )
+        return status == 200
+
+    def delete_task(client: Client) -> bool:
+        with lock:
+            pk: Optional[int] = next(deletable_pks, None)
+        if pk is None:
+            # Every deletable task is gone.
+            return False
+        status, _ = client.request("POST", f"/api/delete-task/{pk}")
+        return status == 200
+
+    return {
+        "task-list": task_list,
+        "task-detail": task_detail,
+        "create-task": create_task,
+        "edit-task-completed": edit_task_completed,
+        "delete-task": delete_task,
+    }
+
+
+def count_queries(
+    env: Dict[str, str],
+    tasks: int,
+    deletable: int,
+) -> Dict[str, int]:
+    """
+    Count the queries one request to each endpoint makes, in this process.
+    Deletes the last deletable task, which the load never reaches.
+    """
+    os.environ.update(env)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    sys.path.insert(0, str(REPO_ROOT))
+    import django
+
+    django.setup()
+    from django.db import connection
+    from django.test import Client as TestClient
+    from django.test.utils import CaptureQueriesContext
+
+    client: TestClient = TestClient()
+    requests: Dict[str, Callable[[], Any]] = {
+        "task-list": lambda: client.get("/"),
+        "task-detail": lambda: client.get("/task/1"),
+        "create-task": lambda: client.post(
+            "/api/create-task",
+            {"title": f"Benchmark task {uuid.uuid4()}"},
+        ),
+        "edit-task-completed": lambda: client.post(
+            "/api/edit-task-completed/1",
+            {"completed": "true"},
+        ),
+        "delete-task": lambda: client.post(
+            f"/api/delete-task/{tasks + deletable}",
+        ),
+    }
+    counts: Dict[str, int] = {}
+    for name, request in requests.items():
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name}: {response.status_code}")
+        counts[name] = len(queries)
+    return counts
+
+
+def find_regressions(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    regressions: List[str] = []
+    for name, result in results.items():
+        expected: Optional[Dict[str, float]] = baseline.get(name)
+        if expected is None:
+            continue
+        if result["queries"] > expected["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries, "
+                f"baseline {expected['queries']}"
+            )
+        if result["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.1f} ms, "
+                f"baseline {expected['p95_ms']:.1f} ms"
+            )
+        if (
+            result["requests_per_second"]
+            < expected["requests_per_second"] * (1 - tolerance)
+        ):
+            regressions.append(
+                f"{name}: {result['requests_per_second']:.1f} req/s, "
+                f"baseline {expected['requests_per_second']:.1f} req/s"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument(
+        "--deletable",
+        type=int,
+        default=20_000,
+        help="Extra tasks seeded for the delete endpoint to delete.",
+    )
+    parser.add_argument(
+        "--clients",
+        type=int,
+        default=4,
+        help="Concurrent clients per endpoint.",
+    )
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument(
+        "--worker-class",
+        choices=("sync", "gthread", "uvicorn"),
+        default="sync",
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="Defaults to benchmarks/baselines/endpoints-<tasks>.json.",
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+    settings: Dict[str, Any] = {
+        "tasks": args.tasks,
+        "clients": args.clients,
+        "duration": args.duration,
+        "worker_class": args.worker_class,
+    }
+    baseline_path: Path = (
+        args.baseline or BASELINE_DIR / f"endpoints-{args.tasks}.json"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        env: Dict[str, str] = {
+            **scratch_environment(directory),
+            "GUNICORN_WORKER_CLASS": args.worker_class,
+        }
+        print(f"Seeding {args.tasks + args.deletable} tasks...")
+        seed_database(env, args.tasks + args.deletable)
+        with run_server(env, args.port):
+            queries: Dict[str, int] = count_queries(
+                env,
+                args.tasks,
+                args.deletable,
+            )
+            results: Dict[str, Dict[str, float]] = run_load(
+                args.port,
+                make_scenarios(args.tasks, args.deletable),
+                clients=args.clients,
+                duration=args.duration,
+            )
+    for name, result in results.items():
+        result["queries"] = queries[name]
+
+    print(
+        f"{'endpoint':<20} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7} {'queries':>8}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<20} {result['requests_per_second']:>8.1f} "
+            f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{result['p99_ms']:>8.1f} {result['errors']:>7} "
+            f"{result['queries']:>8}"
+        )
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(
+            json.dumps({"settings": settings, "results": results}, indent=4)
+            + "\n"
+        )
+        print(f"Saved the baseline to {baseline_path}.")
+        return
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; not checking for regressions.")
+        return
+    baseline: Dict[str, Any] = json.loads(baseline_path.read_text())
+    if baseline["settings"] != settings:
+        parser.error(
+            f"The baseline at {baseline_path} was recorded with "
+            f"{baseline['settings']}, not {settings}."
+        )
+    regressions: List[str] = find_regressions(
+        results,
+        baseline["results"],
+        args.tolerance,
+    )
+    if regressions:
+        print("Regressions from the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No regressions from the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the throughput of the gunicorn worker models in gunicorn.conf.py.
+
+For each mode, starts gunicorn on a scratch SQLite database of seeded tasks,
+sends requests to it from concurrent keep-alive clients for a while and
+prints the requests per second and latency percentiles. Run from the
+repository root:
+
+    python -m benchmarks.gunicorn_modes --modes sync gthread uvicorn
+
+The default database has a single writer, so compare modes with read-only
+paths. The numbers are only comparable between runs on the same machine.
+"""
+
+from .load import Client
+from .load import run_load
+from .load import run_server
+from .load import scratch_environment
+from .load import seed_database
+
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+import argparse
+import itertools
+import tempfile
+
+
+# Environment for each mode. Anything unset takes gunicorn.conf.py's default.
+MODES: Dict[str, Dict[str, str]] = {
+    "single-sync": {"GUNICORN_WORKER_CLASS": "sync", "GUNICORN_WORKERS": "1"},
+    "sync": {"GUNICORN_WORKER_CLASS": "sync"},
+    "gthread": {"GUNICORN_WORKER_CLASS": "gthread"},
+    "uvicorn": {"GUNICORN_WORKER_CLASS": "uvicorn"},
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=MODES,
+        default=list(MODES),
+    )
+    parser.add_argument("--paths", nargs="+", default=["/", "/api/tasks"])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    paths: Iterator[str] = itertools.cycle(args.paths)
+
+    def get_path(client: Client) -> bool:
+        status, _ = client.request("GET", next(paths))
+        return status == 200
+
+    with tempfile.TemporaryDirectory() as directory:
+        env: Dict[str, str] = scratch_environment(directory)
+        seed_database(env, args.tasks)
+        print(f"{'mode':<12} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+        for mode in args.modes:
+            with run_server({**env, **MODES[mode]}, args.port):
+                # Warm up every worker's connections and caches.
+                run_load(args.port, {mode: get_path}, clients=1, duration=1)
+                result: Dict[str, float] = run_load(
+                    args.port,
+                    {mode: get_path},
+                    clients=args.clients,
+                    duration=args.duration,
+                )[mode]
+            print(
+                f"{mode:<12} {result['requests_per_second']:>10.1f} "
+                f"{result['p50_ms']:>10.1f} {result['p99_ms']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Helpers shared by the benchmarks: a scratch database, a gunicorn server to
+run against it, and concurrent HTTP clients that record latencies.
+"""
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.cookies import SimpleCookie
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import urlencode
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+REPO_ROOT: Path = Path(__file__).resolve().parent.parent
+
+# The seed of the generated tasks, fixed so that runs are comparable.
+SEED: int = 0
+
+
+def scratch_environment(directory: str) -> Dict[str, str]:
+    """The environment for running the app on a SQLite database in directory."""
+    return {
+        **os.environ,
+        "DJANGO_DB_ENGINE": "sqlite3",
+        "DJANGO_DB_NAME": str(Path(directory) / "db.sqlite3"),
+        "DJANGO_ALLOWED_HOSTS": "localhost,testserver",
+        # Shared by the workers and the seeding command, as gunicorn.conf.py
+        # requires with more than one worker.
+        "DJANGO_CACHE_BACKEND": "file",
+        "DJANGO_CACHE_LOCATION": str(Path(directory) / "cache"),
+    }
+
+
+def seed_database(env: Dict[str, str], tasks: int) -> None:
+    """Migrate the database in env and add generated tasks to it."""
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--verbosity", "0"],
+        cwd=REPO_ROOT,
+        env=env,
+        check=True,
+    )
+    subprocess.run(
+        [
+            sys.executable,
+            "manage.py",
+            "seed_tasks",
+            "--count",
+            str(tasks),
+            "--seed",
+            str(SEED),
+        ],
+        cwd=REPO_ROOT,
+        env=env,
+        check=True,
+    )
+
+
+def wait_until_serving(port: int, timeout: float = 30) -> None:
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("localhost", port, timeout=1)
+            connection.request("GET", "/api/tasks")
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not start serving on port {port}.")
+
+
+@contextmanager
+def run_server(env: Dict[str, str], port: int) -> Iterator[None]:
+    """Run gunicorn with gunicorn.conf.py and env until the block exits."""
+    server: subprocess.Popen = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py"],
+        cwd=REPO_ROOT,
+        env={**env, "GUNICORN_BIND": f"127.0.0.1:{port}"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_serving(port)
+        yield
+    finally:
+        server.terminate()
+        server.wait()
+
+
+class Client:
+    """
+    A keep-alive HTTP client that sends the CSRF cookie and token that the
+    server gave it with POST requests.
+    """
+    def __init__(self, port: int) -> None:
+        # http.client reconnects by itself when sync workers close the
+        # connection after a response.
+        self.connection = http.client.HTTPConnection("localhost", port, timeout=30)
+        self.csrf_token: Optional[str] = None
+
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        data: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, bytes]:
+        headers: Dict[str, str] = {}
+        body: Optional[str] = None
+        if self.csrf_token is not None:
+            headers["Cookie"] = f"csrftoken={self.csrf_token}"
+            headers["X-CSRFToken"] = self.csrf_token
+        if data is not None:
+            body = urlencode(data)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        content: bytes = response.read()
+        for header in response.headers.get_all("Set-Cookie") or ():
+            cookie: SimpleCookie = SimpleCookie(header)
+            if "csrftoken" in cookie:
+                self.csrf_token = cookie["csrftoken"].value
+        return response.status, content
+
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+# A function that sends one request with a client and returns whether it
+# succeeded.
+Scenario = Callable[[Client], bool]
+
+
+class Recording:
+    """The latencies of the successful requests of a scenario, and errors."""
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.errors: int = 0
+
+
+    def add(self, other: "Recording") -> None:
+        self.latencies += other.latencies
+        self.errors += other.errors
+
+
+    def summarize(self, duration: float) -> Dict[str, float]:
+        percentiles: List[float]
+        if len(self.latencies) >= 2:
+            percentiles = statistics.quantiles(self.latencies, n=100)
+        else:
+            percentiles = [sum(self.latencies)] * 99
+        return {
+            "requests_per_second": len(self.latencies) / duration,
+            "p50_ms": percentiles[49] * 1000,
+            "p95_ms": percentiles[94] * 1000,
+            "p99_ms": percentiles[98] * 1000,
+            "errors": self.errors,
+        }
+
+
+def run_client(port: int, scenario: Scenario, deadline: float) -> Recording:
+    """Run a scenario repeatedly until the deadline, recording each run."""
+    recording: Recording = Recording()
+    client: Client = Client(port)
+    # Get the CSRF cookie.
+    client.request("GET", "/")
+    while time.monotonic() < deadline:
+        start: float = time.perf_counter()
+        try:
+            succeeded: bool = scenario(client)
+        except (OSError, http.client.HTTPException):
+            succeeded = False
+            client.close()
+        if succeeded:
+            recording.latencies.append(time.perf_counter() - start)
+        else:
+            recording.errors += 1
+    client.close()
+    return recording
+
+
+def run_load(
+    port: int,
+    scenarios: Dict[str, Scenario],
+    *,
+    clients: int,
+    duration: float,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Run every scenario at once, each from the given number of concurrent
+    clients, for duration seconds. Returns a summary of each scenario.
+    """
+    recordings: Dict[str, Recording] = {
+        name: Recording() for name in scenarios
+    }
+    deadline: float = time.monotonic() + duration
+    with ThreadPoolExecutor(clients * len(scenarios)) as executor:
+        futures: List[Tuple[str, Future]] = [
+            (name, executor.submit(run_client, port, scenario, deadline))
+            for name, scenario in scenarios.items()
+            for _ in range(clients)
+        ]
+        for name, future in futures:
+            recordings[name].add(future.result())
+    return {
+        name: recording.summarize(duration)
+        for name, recording in recordings.items()
+    }
@@ -0,0 +1,153 @@
+"""
+Compare the time to render the task-list page with the template settings.
+
+Seeds a scratch SQLite database with tasks and renders task-list.html with
+all of them with each configuration: rows rendered by the template
+todo/task-list-items.html through Django's plain app directories loader,
+which parses templates on every render, through the cached loader that
+production uses, and through the cached loader without the context
+processors that the admin needs; and rows rendered by todo.rows from
+values_list() tuples, as the views do. Prints the median and best time of
+each. Run from the repository root:
+
+    python -m benchmarks.render --tasks 10000
+"""
+from .load import REPO_ROOT
+from .load import scratch_environment
+from .load import seed_database
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+APP_DIRECTORIES_LOADER: str = "django.template.loaders.app_directories.Loader"
+ALL_CONTEXT_PROCESSORS: List[str] = [
+    "django.template.context_processors.debug",
+    "django.template.context_processors.request",
+    "django.contrib.auth.context_processors.auth",
+    "django.contrib.messages.context_processors.messages",
+]
+
+# Options of the template engine of each configuration. Configurations with
+# "fast_rows" render the rows with todo.rows instead of the template.
+CONFIGURATIONS: Dict[str, Dict[str, Any]] = {
+    "uncached": {
+        "loaders": [APP_DIRECTORIES_LOADER],
+        "context_processors": ALL_CONTEXT_PROCESSORS,
+    },
+    "cached": {
+        "loaders": [
+            ("django.template.loaders.cached.Loader", [APP_DIRECTORIES_LOADER]),
+        ],
+        "context_processors": ALL_CONTEXT_PROCESSORS,
+    },
+    "cached-lean": {
+        "loaders": [
+            ("django.template.loaders.cached.Loader", [APP_DIRECTORIES_LOADER]),
+        ],
+        "context_processors": [],
+    },
+    "fast-rows": {
+        "loaders": [
+            ("django.template.loaders.cached.Loader", [APP_DIRECTORIES_LOADER]),
+        ],
+        "context_processors": [],
+        "fast_rows": True,
+    },
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        env: Dict[str, str] = scratch_environment(directory)
+        print(f"Seeding {args.tasks} tasks...")
+        seed_database(env, args.tasks)
+        os.environ.update(env)
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+        sys.path.insert(0, str(REPO_ROOT))
+        import django
+
+        django.setup()
+        from django.contrib.auth.models import AnonymousUser
+        from django.template.backends.django import DjangoTemplates
+        from django.test import RequestFactory
+        from todo.filters import TaskListFilter
+        from todo.models import Task
+        from todo.rows import ROW_FIELDS
+        from todo.rows import render_task_rows
+
+        tasks: List[Task] = list(Task.objects.for_list())
+        rows: List[Tuple[int, str, bool]] = list(
+            Task.objects.values_list(*ROW_FIELDS)
+        )
+        list_filter: TaskListFilter = TaskListFilter({})
+
+        engines: Dict[str, DjangoTemplates] = {
+            name: DjangoTemplates({
+                "NAME": name,
+                "DIRS": [],
+                "APP_DIRS": False,
+                "OPTIONS": {
+                    option: value
+                    for option, value in options.items()
+                    if option != "fast_rows"
+                },
+            })
+            for name, options in CONFIGURATIONS.items()
+        }
+        seconds: Dict[str, List[float]] = {name: [] for name in engines}
+        # Take turns, so that the configurations share any drift in the
+        # machine's speed.
+        for _ in range(args.repeat):
+            for name, engine in engines.items():
+                request = RequestFactory().get("/")
+                request.user = AnonymousUser()
+                start: float = time.perf_counter()
+                task_list_rows: str
+                if CONFIGURATIONS[name].get("fast_rows"):
+                    task_list_rows = render_task_rows(rows)
+                else:
+                    task_list_rows = engine.get_template(
+                        "todo/task-list-items.html",
+                    ).render({"task_list": tasks})
+                task_list_html: str = engine.get_template(
+                    "todo/task-list-content.html",
+                ).render({
+                    "task_list": tasks,
+                    "task_list_rows": task_list_rows,
+                    "list_params": list_filter.query_params,
+                })
+                engine.get_template("todo/task-list.html").render(
+                    {
+                        "task_list": tasks,
+                        "task_list_html": task_list_html,
+                        "list_filter": list_filter,
+                    },
+                    request,
+                )
+                seconds[name].append(time.perf_counter() - start)
+
+    print(f"{'configuration':<14} {'median ms':>10} {'best ms':>10}")
+    for name, times in seconds.items():
+        print(
+            f"{name:<14} {statistics.median(times) * 1000:>10.2f} "
+            f"{min(times) * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
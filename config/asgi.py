@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Tells the settings that requests are served through ASGI, under which
+# persistent database connections are not reused.
+os.environ.setdefault('DJANGO_ASGI', '1')
 
 application = get_asgi_application()
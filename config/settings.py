@@ -28,7 +28,9 @@ if "DJANGO_SECRET_KEY_FILE" in os.environ:
 else:
     SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "INSECURE_SECRET")
 
-DEBUG = bool(os.getenv("DJANGO_DEBUG", 1))
+# "1" (the default) for development, "0" for production. Only "1", "true",
+# "yes" and "on" enable it, so that "0" and "false" disable it.
+DEBUG = os.getenv("DJANGO_DEBUG", "1").lower() in ("1", "true", "yes", "on")
 
 allowed_hosts_env: Optional[str] = os.getenv("DJANGO_ALLOWED_HOSTS")
 if allowed_hosts_env is not None:
@@ -50,6 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that the time of every other middleware is measured.
+    "todo.metrics.MetricsMiddleware",
+    "todo.profiling.ProfilingMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,12 +66,40 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'config.urls'
 
+# Record request metrics and serve them at /metrics for Prometheus.
+TODO_METRICS = os.getenv("DJANGO_METRICS", "0") == "1"
+# The metrics are only served to requests with the header "Authorization:
+# Bearer <token>" (Prometheus' "authorization" scrape option), and to none
+# without a token.
+if "DJANGO_METRICS_TOKEN_FILE" in os.environ:
+    with open(os.environ["DJANGO_METRICS_TOKEN_FILE"]) as f:
+        TODO_METRICS_TOKEN = f.read().strip()
+else:
+    TODO_METRICS_TOKEN = os.getenv("DJANGO_METRICS_TOKEN", "")
+
+# In production, every template is parsed once per process and kept. In
+# development, Django's default loaders also cache, but reload templates that
+# change.
+template_options = {} if DEBUG else {
+    "loaders": [
+        (
+            "django.template.loaders.cached.Loader",
+            ["django.template.loaders.app_directories.Loader"],
+        ),
+    ],
+}
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The instrumented backend times template rendering for the metrics.
+        'BACKEND': (
+            "todo.metrics.InstrumentedDjangoTemplates"
+            if TODO_METRICS
+            else 'django.template.backends.django.DjangoTemplates'
+        ),
         'DIRS': [],
-        'APP_DIRS': True,
+        'APP_DIRS': DEBUG,
         'OPTIONS': {
+            **template_options,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -76,6 +109,14 @@ TEMPLATES = [
         },
     },
 ]
+# The to-do list's pages use no context processors, so they are rendered
+# with an engine that runs none, rather than the one above that the admin
+# needs. The CSRF token is always available.
+TEMPLATES.append({
+    **TEMPLATES[0],
+    "NAME": "todo",
+    "OPTIONS": {**template_options, "context_processors": []},
+})
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
@@ -104,6 +145,90 @@ else:
         "password"
     )
 
+# Reusing connections saves a connection handshake on every request. Either
+# each thread keeps its connection for DJANGO_DB_CONN_MAX_AGE seconds
+# (0 closes it after every request), or, on Postgres with DJANGO_DB_POOL=1,
+# connections are shared through a psycopg pool, which requires the "pool"
+# extra. Under ASGI (config.asgi, or uvicorn workers) every request runs
+# its queries in a new thread, whose persistent connection would never be
+# reused or closed, so DJANGO_DB_CONN_MAX_AGE is ignored and connections
+# are closed after every request unless they are pooled.
+db_pool: bool = os.getenv("DJANGO_DB_POOL", "0") == "1"
+asgi: bool = (
+    os.getenv("DJANGO_ASGI", "0") == "1"
+    or os.getenv("GUNICORN_WORKER_CLASS") == "uvicorn"
+)
+DATABASES["default"]["CONN_MAX_AGE"] = (
+    0 if db_pool or asgi else int(os.getenv("DJANGO_DB_CONN_MAX_AGE", 60))
+)
+# Check that a reused connection still works before using it, so that a
+# database restart does not fail the next request on each connection.
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = (
+    os.getenv("DJANGO_DB_CONN_HEALTH_CHECKS", "1") == "1"
+)
+if db_pool and DATABASES["default"]["ENGINE"].endswith("postgresql"):
+    DATABASES["default"]["OPTIONS"] = {
+        # https://www.psycopg.org/psycopg3/docs/api/pool.html
+        "pool": {
+            "min_size": int(os.getenv("DJANGO_DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DJANGO_DB_POOL_MAX_SIZE", 10)),
+            # Seconds to wait for a free connection before failing.
+            "timeout": float(os.getenv("DJANGO_DB_POOL_TIMEOUT", 10)),
+            # Seconds after which an idle connection above min_size is
+            # closed.
+            "max_idle": float(os.getenv("DJANGO_DB_POOL_MAX_IDLE", 600)),
+        },
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Backend for the task-list fragment cache: "locmem" (per process, LRU),
+# "file" (shared by the processes on one host) or "redis" (shared by every
+# host; eviction follows the server's maxmemory-policy). The task-list
+# version, which writes bump to invalidate the cached fragments, is kept in
+# this cache, so every process that serves or writes tasks, management
+# commands included, must share it: locmem is only for a single process,
+# and gunicorn.conf.py refuses it with more than one worker.
+cache_backend: str = os.getenv("DJANGO_CACHE_BACKEND", "locmem")
+task_list_cache = {
+    "BACKEND": {
+        "locmem": "django.core.cache.backends.locmem.LocMemCache",
+        "file": "django.core.cache.backends.filebased.FileBasedCache",
+        "redis": "django.core.cache.backends.redis.RedisCache",
+    }[cache_backend],
+    "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", {
+        "locmem": "task-list",
+        "file": "/tmp/django-to-do-list-cache",
+        "redis": "redis://127.0.0.1:6379",
+    }[cache_backend]),
+    # Seconds before a cached fragment expires.
+    "TIMEOUT": int(os.getenv("DJANGO_CACHE_TIMEOUT", 300)),
+}
+if cache_backend != "redis":
+    task_list_cache["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.getenv("DJANGO_CACHE_MAX_ENTRIES", 1000)),
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "task-list": task_list_cache,
+}
+
+
+# Task events
+# Broker that publishes changes to tasks to the task lists open in browsers:
+# "local" (only the process that made the change) or "postgres" (every
+# process, through LISTEN/NOTIFY; requires the postgresql engine and ASGI).
+events_backend: str = os.getenv("DJANGO_EVENTS_BACKEND", "local")
+TODO_EVENTS_BROKER = {
+    "local": "todo.events.LocalBroker",
+    "postgres": "todo.events.PostgresBroker",
+}[events_backend]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -142,7 +267,80 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = "/usr/src/app/static/"
 
+# Outside of development, collectstatic names files by a hash of their
+# content and writes compressed siblings of them, so that the proxy can
+# serve them precompressed and let browsers cache them forever. See
+# proxy/templates/default.conf.template.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "todo.storage.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# To-do list
+
+# Whether requests are served through ASGI (see the database settings),
+# under which todo.urls routes the task views to todo.async_views.
+TODO_ASGI = asgi
+# Number of tasks shown on each page of the task list.
+TODO_TASK_LIST_PAGE_SIZE = 100
+# Number of tasks read from the database and rendered at a time when
+# streaming the whole task list.
+TODO_TASK_LIST_CHUNK_SIZE = 2000
+# Alias in CACHES of the cache for rendered task-list fragments.
+TODO_TASK_LIST_CACHE = "task-list"
+# Maximum number of operations in one request to the batch API.
+TODO_BATCH_MAX_OPERATIONS = 1000
+# Number of results on each page of task search results.
+TODO_SEARCH_PAGE_SIZE = 20
+# Maximum number of changes in each response of the task changes API.
+TODO_CHANGES_PAGE_SIZE = 500
+# Days to keep the tombstones of deleted tasks for syncing clients, after
+# which prune_tombstones deletes them. Clients that last synced before the
+# pruned deletions are told to sync again from the start.
+TODO_CHANGES_RETENTION_DAYS = int(
+    os.getenv("DJANGO_CHANGES_RETENTION_DAYS", 30)
+)
+# Seconds between keepalive comments on an idle task event stream.
+TODO_EVENTS_KEEPALIVE = 15
+
+# Profile requests and dump the profiles, which staff can browse at
+# /profiles. Set DJANGO_PROFILING=1 to enable.
+TODO_PROFILING = os.getenv("DJANGO_PROFILING", "0") == "1"
+# "sampler" (a statistical profiler, dumped for speedscope) or "cprofile"
+# (every call, dumped as pstats). cProfile roughly doubles the time of the
+# requests that it profiles, and profiles one request at a time.
+TODO_PROFILING_PROFILER = os.getenv("DJANGO_PROFILING_PROFILER", "sampler")
+# Seconds between the sampler's samples. One thread per process samples the
+# stacks of every thread while any request is profiled, for about 0.15 ms
+# of CPU per sample with a few threads: about 3% of a CPU at 5 ms, which
+# cost 5-10% of the requests per second of gunicorn workers under load.
+TODO_PROFILING_INTERVAL = float(os.getenv("DJANGO_PROFILING_INTERVAL", 0.005))
+# Fraction of requests that are profiled at random.
+TODO_PROFILING_SAMPLE_RATE = float(
+    os.getenv("DJANGO_PROFILING_SAMPLE_RATE", 0.01)
+)
+# Requests slower than this many milliseconds are profiled. Every request is
+# then profiled, and the profiles of fast ones are discarded, so the sampler
+# runs whenever a request is in flight, and cProfile slows every request.
+# 0 disables.
+TODO_PROFILING_SLOW_MS = int(os.getenv("DJANGO_PROFILING_SLOW_MS", 500))
+# Directory of the dumps, and the number of dumps kept in it.
+TODO_PROFILING_DIR = os.getenv(
+    "DJANGO_PROFILING_DIR",
+    "/tmp/django-to-do-list-profiles",
+)
+TODO_PROFILING_MAX_DUMPS = int(os.getenv("DJANGO_PROFILING_MAX_DUMPS", 200))
@@ -0,0 +1,106 @@
+# Gunicorn configuration, read from the environment.
+# https://docs.gunicorn.org/en/stable/settings.html
+#
+#   GUNICORN_WORKER_CLASS    "sync" (default), "gthread" or "uvicorn".
+#                            "uvicorn" serves the ASGI application, with
+#                            the async task views of todo.async_views,
+#                            which keep requests waiting on a slow
+#                            database from holding a thread, and the task
+#                            event stream. The sync views are faster when
+#                            the database is not slow (see
+#                            benchmarks/gunicorn_modes.py).
+#   GUNICORN_WORKERS         Worker processes. More than one worker
+#                            requires a cache that the workers share
+#                            (DJANGO_CACHE_BACKEND "file" or "redis"), since
+#                            the task-list version is kept in it. With such
+#                            a cache, defaults to 2 * CPUs + 1 for sync
+#                            workers, and to the number of CPUs for the
+#                            others, which serve many requests per process.
+#                            With the default locmem cache, defaults to 1.
+#   GUNICORN_THREADS         Threads per gthread worker. Defaults to 4.
+#   GUNICORN_PRELOAD         "1" to import the app before forking, so that
+#                            workers share its memory and start faster.
+#                            Code is then not reloaded on HUP.
+#   GUNICORN_MAX_REQUESTS    Requests after which a worker is replaced, to
+#                            bound memory growth. 0 disables. Defaults to
+#                            1000.
+#   GUNICORN_MAX_REQUESTS_JITTER
+#                            Random extra requests per worker, so that the
+#                            workers are not all replaced at once. Defaults
+#                            to 10% of GUNICORN_MAX_REQUESTS.
+#   GUNICORN_TIMEOUT         Seconds a worker may be silent before it is
+#                            killed. Defaults to 30.
+#   GUNICORN_GRACEFUL_TIMEOUT
+#                            Seconds to finish requests on restart. Defaults
+#                            to 30.
+#   GUNICORN_KEEPALIVE       Seconds to hold idle keep-alive connections,
+#                            which only gthread and uvicorn workers support.
+#                            Defaults to 5, to outlast nginx's upstream
+#                            reuse.
+
+import multiprocessing
+import os
+
+
+def _get_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "uvicorn": "uvicorn_worker.UvicornWorker",
+}
+
+worker_class_name: str = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+if worker_class_name not in WORKER_CLASSES:
+    raise ValueError(
+        f"Unknown GUNICORN_WORKER_CLASS: {worker_class_name!r} "
+        f"(expected one of {', '.join(WORKER_CLASSES)})"
+    )
+worker_class = WORKER_CLASSES[worker_class_name]
+wsgi_app = (
+    "config.asgi:application"
+    if worker_class_name == "uvicorn"
+    else "config.wsgi:application"
+)
+
+# Each worker would keep its own task-list version in a locmem cache, and
+# would serve fragments cached before another worker's, or a management
+# command's, writes until they expire.
+cache_backend: str = os.getenv("DJANGO_CACHE_BACKEND", "locmem")
+cpu_count: int = multiprocessing.cpu_count()
+default_workers: int
+if cache_backend == "locmem":
+    default_workers = 1
+elif worker_class_name == "sync":
+    # Sync workers sit idle while waiting on the database, so there are more
+    # of them than CPUs.
+    default_workers = 2 * cpu_count + 1
+else:
+    default_workers = cpu_count
+workers = _get_int("GUNICORN_WORKERS", default_workers)
+if cache_backend == "locmem" and workers > 1:
+    raise ValueError(
+        f"DJANGO_CACHE_BACKEND 'locmem' cannot be shared by {workers} "
+        "workers: use 'file' or 'redis', or GUNICORN_WORKERS=1"
+    )
+threads = _get_int(
+    "GUNICORN_THREADS",
+    4 if worker_class_name == "gthread" else 1,
+)
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+
+max_requests = _get_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _get_int(
+    "GUNICORN_MAX_REQUESTS_JITTER",
+    max_requests // 10,
+)
+
+timeout = _get_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _get_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _get_int("GUNICORN_KEEPALIVE", 5)
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")
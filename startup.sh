@@ -1,6 +1,9 @@
 #!/bin/bash
 
-uv run manage.py migrate
-uv run manage.py collectstatic --noinput
+# The environment was synced from uv.lock when the image was built.
+uv run --no-sync manage.py migrate
+uv run --no-sync manage.py collectstatic --noinput
 
-uv run gunicorn --bind 0.0.0.0:8000 config.wsgi:application
\ No newline at end of file
+# The worker model (sync, gthread or uvicorn for ASGI), worker count,
+# recycling and timeouts are set from the environment in gunicorn.conf.py.
+exec uv run --no-sync gunicorn --config gunicorn.conf.py
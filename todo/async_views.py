@@ -0,0 +1,395 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import render
+from django.shortcuts import redirect
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+from django.urls import reverse
+from django.template.loader import render_to_string
+from django.http import HttpResponse
+from django.http import Http404
+from django.http import HttpRequest
+from django.http import HttpResponseNotAllowed
+from django.http import HttpResponseBadRequest
+from django.views.decorators.cache import cache_control
+from django.db.models import QuerySet
+
+from .models import Task
+
+from .forms import TaskForm
+
+from .cache import abump_task_list_version
+from .cache import aget_or_render_fragment
+
+from .changes import get_changes
+from .changes import get_pruned_seq
+
+from .conditional import async_condition
+from .conditional import task_detail_etag
+from .conditional import task_detail_last_modified
+from .conditional import task_list_etag
+
+from .events import apublish
+from .events import task_deleted_event
+from .events import task_saved_event
+
+from .filters import InvalidFilter
+from .filters import TaskListFilter
+
+from .pagination import InvalidCursor
+from .pagination import KeysetPage
+
+from .rows import PK_PLACEHOLDER
+from .rows import ROW_FIELDS
+from .rows import render_task_rows
+
+from .search import search_tasks
+
+from .serializers import FastJsonResponse
+from .serializers import InvalidFields
+from .serializers import TASK_FIELDS
+from .serializers import TASK_LIST_FIELDS
+from .serializers import parse_fields
+
+from .views import TEMPLATE_ENGINE
+from .views import delete_task_row
+from .views import parse_version
+from .views import stream_task_list
+
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+
+# Async versions of the task views of todo.views, which todo.urls routes
+# to under ASGI, so that a request waiting on the database holds no thread
+# and one worker keeps many requests in flight. Under WSGI each of them
+# would run through async_to_sync, so the synchronous views serve WSGI.
+# Async views run in autocommit mode, so their writes are committed as soon
+# as they are made, and they bump the task-list version and publish events
+# directly rather than on commit.
+
+
+@cache_control(private=True, no_cache=True)
+@async_condition(etag_func=task_list_etag)
+async def task_list(request: HttpRequest) -> HttpResponse:
+    try:
+        list_filter: TaskListFilter = TaskListFilter(request.GET)
+    except InvalidFilter as e:
+        return HttpResponseBadRequest(str(e))
+    if "stream" in request.GET:
+        # Streamed with an asynchronous iterator under ASGI.
+        return stream_task_list(request, list_filter)
+
+    tasks: QuerySet = list_filter.apply(
+        Task.objects.for_list(list_filter.ordering)
+    )
+    try:
+        page: KeysetPage = KeysetPage(
+            tasks,
+            cursor=request.GET.get("cursor"),
+            page_size=settings.TODO_TASK_LIST_PAGE_SIZE,
+            ordering=list_filter.ordering,
+        )
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+
+    async def render_page() -> str:
+        await page.afetch()
+        return render_to_string(
+            "todo/task-list-content.html",
+            {
+                "task_list": page,
+                "task_list_rows": render_task_rows(
+                    (task.pk, task.title, task.completed) for task in page
+                ),
+                "list_params": list_filter.query_params,
+            },
+            using=TEMPLATE_ENGINE,
+        )
+
+    # The page is only queried if the fragment is not already cached.
+    task_list_html: str = await aget_or_render_fragment(
+        "task-list",
+        render_page,
+        *list_filter.key,
+        page.after,
+    )
+    context = {
+        "task_list": page,
+        "task_list_html": task_list_html,
+        "list_filter": list_filter,
+        "pk_placeholder": PK_PLACEHOLDER,
+    }
+    return render(
+        request,
+        "todo/task-list.html",
+        context,
+        using=TEMPLATE_ENGINE,
+    )
+
+
+@cache_control(private=True, no_cache=True)
+@async_condition(
+    etag_func=task_detail_etag,
+    last_modified_func=task_detail_last_modified,
+)
+async def task_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    task: Task = await aget_object_or_404(Task, pk=pk)
+
+    form: TaskForm
+    conflict: bool = False
+    if request.method == "POST":
+        form = TaskForm(request.POST, instance=task)
+        # Validation queries the database to check that the title is unique.
+        if await sync_to_async(form.is_valid)():
+            if await asave_task(form.instance, form.cleaned_data["version"]):
+                return redirect(reverse("todo:task-detail", args=(pk,)))
+            # The task changed since the form was filled in. Show it as it
+            # is now, rather than overwrite the other change.
+            task = await aget_object_or_404(Task, pk=pk)
+            form = TaskForm(instance=task)
+            conflict = True
+    else:
+        form = TaskForm(instance=task)
+
+    context = {
+        "task_title": task.title,
+        "form": form,
+        "task_pk": task.pk,
+        "conflict": conflict,
+    }
+    return render(
+        request,
+        "todo/task-detail.html",
+        context,
+        using=TEMPLATE_ENGINE,
+        status=409 if conflict else 200,
+    )
+
+
+async def asave_task(task: Task, version: Optional[int]) -> bool:
+    """Like todo.views.save_task(), for async views."""
+    tasks: QuerySet = Task.objects.filter(pk=task.pk)
+    if version is not None:
+        tasks = tasks.filter(version=version)
+    updated: int = await tasks.aupdate(
+        **{field: getattr(task, field) for field in TaskForm.Meta.fields},
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        if not await Task.objects.filter(pk=task.pk).aexists():
+            raise Http404("No Task matches the given query.")
+        return False
+    # Updates do not send model signals.
+    await abump_task_list_version()
+    await apublish(task_saved_event(task))
+    return True
+
+
+async def conflict_response(pk: int) -> HttpResponse:
+    """Like todo.views.conflict_response(), for async views."""
+    task: Optional[dict] = (
+        await Task.objects.filter(pk=pk).values(*TASK_FIELDS).afirst()
+    )
+    if task is None:
+        raise Http404("No Task matches the given query.")
+    return FastJsonResponse(task, status=409)
+
+
+async def create_task(request: HttpRequest) -> HttpResponse:
+    if request.method != "POST":
+        return HttpResponseNotAllowed(("POST",))
+
+    form: TaskForm = TaskForm(request.POST)
+    if await sync_to_async(form.is_valid)():
+        # Saving sends post_save, whose receivers bump the version and
+        # publish the event.
+        await form.instance.asave()
+        return FastJsonResponse(
+            {field: getattr(form.instance, field) for field in ROW_FIELDS},
+            status=201,
+        )
+    else:
+        return HttpResponseBadRequest(str(form.errors) + str(request.POST))
+
+
+async def edit_task_completed(request: HttpRequest, pk: int) -> HttpResponse:
+    if request.method != "POST":
+        return HttpResponseNotAllowed(("POST",))
+
+    if "completed" not in request.POST:
+        if not await Task.objects.filter(pk=pk).aexists():
+            raise Http404("No Task matches the given query.")
+        return HttpResponseBadRequest("\"completed\" field is required.")
+    try:
+        version: Optional[int] = parse_version(request.POST.get("version"))
+    except ValueError:
+        return HttpResponseBadRequest(
+            "\"version\" must be a positive integer."
+        )
+    completed: bool = request.POST["completed"].lower() == "true"
+    tasks: QuerySet = Task.objects.filter(pk=pk)
+    if version is not None:
+        tasks = tasks.filter(version=version)
+    updated: int = await tasks.aupdate(
+        completed=completed,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        if version is not None:
+            return await conflict_response(pk)
+        raise Http404("No Task matches the given query.")
+    await abump_task_list_version()
+    await apublish(task_saved_event(
+        {"pk": pk, "completed": completed},
+        ("pk", "completed"),
+    ))
+    return HttpResponse(status=200)
+
+
+async def delete_task(request: HttpRequest, pk: int) -> HttpResponse:
+    if request.method != "POST":
+        return HttpResponseNotAllowed(("POST",))
+
+    try:
+        version: Optional[int] = parse_version(request.POST.get("version"))
+    except ValueError:
+        return HttpResponseBadRequest(
+            "\"version\" must be a positive integer."
+        )
+    # QuerySet.adelete() would select the rows first, since Task has delete
+    # signal receivers, so the single DELETE of the sync view is run in a
+    # thread instead.
+    deleted: int = await sync_to_async(delete_task_row)(pk, version)
+    if not deleted:
+        if version is not None:
+            return await conflict_response(pk)
+        raise Http404("No Task matches the given query.")
+    await abump_task_list_version()
+    await apublish(task_deleted_event(pk))
+    return HttpResponse(status=200)
+
+
+async def task_search(request: HttpRequest) -> HttpResponse:
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+
+    query: str = request.GET.get("q", "").strip()
+    if not query:
+        return HttpResponseBadRequest("\"q\" parameter is required.")
+    try:
+        page: int = int(request.GET.get("page", 1))
+        if page < 1:
+            raise ValueError(page)
+    except ValueError:
+        return HttpResponseBadRequest("\"page\" must be a positive integer.")
+
+    # The search runs raw SQL, for which Django has no async API.
+    results, has_next = await sync_to_async(search_tasks)(
+        query,
+        page=page,
+        page_size=settings.TODO_SEARCH_PAGE_SIZE,
+    )
+    return FastJsonResponse({
+        "results": results,
+        "page": page,
+        "has_next": has_next,
+    })
+
+
+async def api_task_list(request: HttpRequest) -> HttpResponse:
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+
+    try:
+        fields: Tuple[str, ...] = parse_fields(
+            request.GET.get("fields"),
+            TASK_LIST_FIELDS,
+        )
+        list_filter: TaskListFilter = TaskListFilter(request.GET)
+    except (InvalidFields, InvalidFilter) as e:
+        return HttpResponseBadRequest(str(e))
+
+    columns: Tuple[str, ...] = tuple(
+        dict.fromkeys(("pk", list_filter.ordering, *fields))
+    )
+    try:
+        page: KeysetPage = KeysetPage(
+            list_filter.apply(Task.objects.values(*columns)),
+            cursor=request.GET.get("cursor"),
+            page_size=settings.TODO_TASK_LIST_PAGE_SIZE,
+            ordering=list_filter.ordering,
+        )
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+
+    results: List[dict] = [
+        {field: row[field] for field in fields} for row in await page.afetch()
+    ]
+    return FastJsonResponse({
+        "results": results,
+        "next_cursor": page.next_cursor,
+    })
+
+
+async def api_task_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+
+    try:
+        fields: Tuple[str, ...] = parse_fields(
+            request.GET.get("fields"),
+            TASK_FIELDS,
+        )
+    except InvalidFields as e:
+        return HttpResponseBadRequest(str(e))
+
+    task: Optional[dict] = (
+        await Task.objects.filter(pk=pk).values(*fields).afirst()
+    )
+    if task is None:
+        raise Http404("No Task matches the given query.")
+    return FastJsonResponse(task)
+
+
+async def api_task_changes(request: HttpRequest) -> HttpResponse:
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+
+    try:
+        fields: Tuple[str, ...] = parse_fields(
+            request.GET.get("fields"),
+            TASK_FIELDS,
+        )
+    except InvalidFields as e:
+        return HttpResponseBadRequest(str(e))
+    try:
+        since: int = int(request.GET.get("since") or 0)
+        if since < 0:
+            raise ValueError(since)
+    except ValueError:
+        return HttpResponseBadRequest(
+            "\"since\" must be a non-negative integer."
+        )
+
+    # The horizon is read with raw SQL, which has no async API, so the
+    # changes are read in a thread.
+    if since and since < await sync_to_async(get_pruned_seq)():
+        return FastJsonResponse({
+            "reset": True,
+            "changes": [],
+            "next_since": 0,
+            "has_more": True,
+        })
+    changes, has_more, next_since = await sync_to_async(get_changes)(
+        since,
+        fields=fields,
+        limit=settings.TODO_CHANGES_PAGE_SIZE,
+    )
+    return FastJsonResponse({
+        "reset": False,
+        "changes": changes,
+        "next_since": next_since,
+        "has_more": has_more,
+    })
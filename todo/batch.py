@@ -0,0 +1,297 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import bump_task_list_version
+from .events import publish_all
+from .events import task_saved_event
+from .models import Task
+from .serializers import TASK_FIELDS
+
+from functools import partial
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+
+CREATE_FIELDS: Tuple[str, ...] = (
+    "title",
+    "completed",
+    "due_date",
+    "description",
+)
+
+
+class BatchError(Exception):
+    """
+    Raised when a batch cannot be applied. Nothing in the batch is applied.
+    errors maps the index of each invalid operation, or None for the batch
+    as a whole, to its error messages by field.
+    """
+    def __init__(
+        self,
+        errors: Dict[Optional[int], Dict[str, List[str]]],
+        status: int = 400,
+    ) -> None:
+        super().__init__(errors)
+        self.errors: Dict[Optional[int], Dict[str, List[str]]] = errors
+        self.status: int = status
+
+
+class ConcurrentChange(Exception):
+    """Raised to roll a batch back when its tasks change while it applies."""
+
+
+def _get_pk(operation: Dict[str, Any]) -> int:
+    pk: Any = operation.get("pk")
+    # bool is a subclass of int but is never a valid primary key.
+    if not isinstance(pk, int) or isinstance(pk, bool):
+        raise ValidationError({"pk": "An integer \"pk\" is required."})
+    return pk
+
+
+def _get_version(operation: Dict[str, Any]) -> Optional[int]:
+    version: Any = operation.get("version")
+    if version is None:
+        return None
+    # bool is a subclass of int but is never a valid version.
+    if (
+        not isinstance(version, int)
+        or isinstance(version, bool)
+        or version < 1
+    ):
+        raise ValidationError({"version": "Must be a positive integer."})
+    return version
+
+
+def _check_fields(operation: Dict[str, Any], allowed: Tuple[str, ...]) -> None:
+    unknown: List[str] = sorted(set(operation) - {"op", *allowed})
+    if unknown:
+        raise ValidationError({
+            field: "Unknown field." for field in unknown
+        })
+
+
+def _parse_create(operation: Dict[str, Any]) -> Task:
+    _check_fields(operation, CREATE_FIELDS)
+    task: Task = Task(
+        title=operation.get("title", ""),
+        completed=operation.get("completed", False),
+        due_date=operation.get("due_date"),
+        description=operation.get("description", ""),
+    )
+    # Uniqueness of titles is checked for the whole batch at once.
+    task.full_clean(validate_unique=False)
+    return task
+
+
+def _parse_complete(
+    operation: Dict[str, Any],
+) -> Tuple[int, Optional[int], bool]:
+    _check_fields(operation, ("pk", "version", "completed"))
+    completed: Any = operation.get("completed", True)
+    if not isinstance(completed, bool):
+        raise ValidationError({"completed": "Must be true or false."})
+    return _get_pk(operation), _get_version(operation), completed
+
+
+def _parse_delete(operation: Dict[str, Any]) -> Tuple[int, Optional[int]]:
+    _check_fields(operation, ("pk", "version"))
+    return _get_pk(operation), _get_version(operation)
+
+
+def _matching(pks: Iterable[int], versions: Dict[int, int]) -> Q:
+    """
+    A filter for the tasks with the given pks that, where versions has
+    their pk, are still at that version.
+    """
+    condition: Q = Q(pk__in=[pk for pk in pks if pk not in versions])
+    for pk in pks:
+        if pk in versions:
+            condition |= Q(pk=pk, version=versions[pk])
+    return condition
+
+
+def apply_task_batch(operations: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Apply a batch of task operations in one transaction and return a result
+    for each operation, in order.
+
+    Each operation is a JSON object with an "op" of:
+    - "create", with the fields of a new task;
+    - "complete", with a "pk" and optionally "completed" (default true);
+    - "delete", with a "pk".
+
+    "complete" and "delete" may also have the "version" of the task that
+    the client last saw, and then only apply if the task is still at that
+    version when the batch starts. If it is not, their result has status
+    409 and the task's current fields.
+
+    Operations are applied as if in order, so completing a task after
+    deleting it in the same batch results in 404. However, they are grouped
+    into a constant number of queries regardless of the size of the batch:
+    one to find the referenced tasks, one bulk insert, at most two updates
+    and one delete, and one to read tasks with the wrong version.
+
+    Raises BatchError without applying anything if any operation is invalid
+    or would create a task with a duplicate title, or if a task is changed
+    concurrently with the batch. Operations on tasks that do not exist are
+    not errors; their result has status 404.
+    """
+    errors: Dict[Optional[int], Dict[str, List[str]]] = {}
+    parsed: List[Tuple[str, Any]] = []
+    for index, operation in enumerate(operations):
+        try:
+            if not isinstance(operation, dict):
+                raise ValidationError("Each operation must be a JSON object.")
+            op: Any = operation.get("op")
+            if op == "create":
+                parsed.append((op, _parse_create(operation)))
+            elif op == "complete":
+                parsed.append((op, _parse_complete(operation)))
+            elif op == "delete":
+                parsed.append((op, _parse_delete(operation)))
+            else:
+                raise ValidationError({
+                    "op": "Must be \"create\", \"complete\" or \"delete\".",
+                })
+        except ValidationError as e:
+            if hasattr(e, "error_dict"):
+                errors[index] = e.message_dict
+            else:
+                errors[index] = {"__all__": e.messages}
+    if errors:
+        raise BatchError(errors)
+
+    titles: Dict[str, int] = {}
+    for index, (op, value) in enumerate(parsed):
+        if op == "create":
+            if value.title in titles:
+                errors[index] = {"title": [
+                    "Task with this Title is repeated in the batch.",
+                ]}
+            titles[value.title] = index
+    for title in Task.objects.filter(title__in=titles).values_list(
+        "title",
+        flat=True,
+    ):
+        errors[titles[title]] = {"title": [
+            "Task with this Title already exists.",
+        ]}
+    if errors:
+        raise BatchError(errors)
+
+    referenced_pks: Set[int] = {
+        value[0] for op, value in parsed if op != "create"
+    }
+    results: List[Dict[str, Any]] = []
+    new_tasks: List[Task] = []
+    completed_values: Dict[int, bool] = {}
+    deleted_pks: Set[int] = set()
+    # The versions that the writes to tasks are conditional on.
+    expected_versions: Dict[int, int] = {}
+    try:
+        with transaction.atomic():
+            existing_versions: Dict[int, int] = dict(
+                Task.objects.filter(pk__in=referenced_pks)
+                .values_list("pk", "version")
+            ) if referenced_pks else {}
+
+            # Work out each operation's result and the final state of each
+            # referenced task without touching the database.
+            conflicts: Dict[int, List[Dict[str, Any]]] = {}
+            for op, value in parsed:
+                if op == "create":
+                    new_tasks.append(value)
+                    results.append({"op": op, "status": 201})
+                    continue
+                pk: int = value[0]
+                version: Optional[int] = value[1]
+                if pk not in existing_versions:
+                    results.append({"op": op, "pk": pk, "status": 404})
+                    continue
+                if version is not None:
+                    if version != existing_versions[pk]:
+                        results.append({"op": op, "pk": pk, "status": 409})
+                        conflicts.setdefault(pk, []).append(results[-1])
+                        continue
+                    expected_versions[pk] = version
+                if op == "complete":
+                    completed_values[pk] = value[2]
+                else:
+                    del existing_versions[pk]
+                    completed_values.pop(pk, None)
+                    deleted_pks.add(pk)
+                results.append({"op": op, "pk": pk, "status": 200})
+            if conflicts:
+                for task in Task.objects.filter(pk__in=conflicts).values(
+                    *TASK_FIELDS,
+                ):
+                    for result in conflicts[task["pk"]]:
+                        result["task"] = task
+
+            Task.objects.bulk_create(new_tasks)
+            now = timezone.now()
+            for completed in (True, False):
+                pks: List[int] = [
+                    task_pk
+                    for task_pk, task_completed in completed_values.items()
+                    if task_completed == completed
+                ]
+                if not pks:
+                    continue
+                # The versions were checked above, and are checked again
+                # here in case the tasks have changed since.
+                updated: int = Task.objects.filter(
+                    _matching(pks, expected_versions),
+                ).update(
+                    completed=completed,
+                    updated_at=now,
+                )
+                if updated != len(pks):
+                    raise ConcurrentChange
+            if deleted_pks:
+                deleted, _ = Task.objects.filter(
+                    _matching(deleted_pks, expected_versions),
+                ).delete()
+                if deleted != len(deleted_pks):
+                    raise ConcurrentChange
+            # Bulk inserts and updates do not send model signals. Deletes
+            # do, so their events are published by the receivers.
+            transaction.on_commit(bump_task_list_version)
+            transaction.on_commit(partial(publish_all, [
+                *(task_saved_event(task) for task in new_tasks),
+                *(
+                    task_saved_event(
+                        {"pk": task_pk, "completed": completed},
+                        ("pk", "completed"),
+                    )
+                    for task_pk, completed in completed_values.items()
+                ),
+            ]))
+    except IntegrityError as e:
+        raise BatchError(
+            {None: {"title": [
+                "A task with one of the titles was created concurrently.",
+            ]}},
+            status=409,
+        ) from e
+    except ConcurrentChange as e:
+        raise BatchError(
+            {None: {"__all__": [
+                "One of the tasks was changed or deleted concurrently.",
+            ]}},
+            status=409,
+        ) from e
+
+    new_task_pks = iter(task.pk for task in new_tasks)
+    for result in results:
+        if result["op"] == "create":
+            result["pk"] = next(new_task_pks)
+    return results
@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.core.cache import BaseCache
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.utils.safestring import SafeString
+from django.utils.safestring import mark_safe
+
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+import threading
+import time
+
+
+# The key of the task-list version in the task-list cache. It must be shared
+# by every process that writes tasks, so that one process's writes
+# invalidate the fragments that the others cached.
+VERSION_KEY: str = "todo.task-list-version"
+
+
+class CacheStats:
+    """Thread-safe hit and miss counters for a cache."""
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+
+    @property
+    def hit_ratio(self) -> float:
+        """The fraction of lookups that were hits, or 0 with no lookups."""
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+# Counters for the task-list fragment cache in this process.
+task_list_cache_stats: CacheStats = CacheStats()
+
+
+def get_task_list_cache() -> BaseCache:
+    return caches[settings.TODO_TASK_LIST_CACHE]
+
+
+def get_task_list_version() -> int:
+    """
+    Get the current task list version. Every cached fragment is keyed by the
+    version it was rendered at, so bumping the version invalidates them all.
+    """
+    cache: BaseCache = get_task_list_cache()
+    version: Optional[int] = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the current time rather than from zero so that a version
+        # which was evicted from the cache is never handed out again while
+        # fragments rendered at it may still be cached.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY, time.time_ns())
+    return version
+
+
+async def aget_task_list_version() -> int:
+    cache: BaseCache = get_task_list_cache()
+    version: Optional[int] = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(VERSION_KEY, time.time_ns())
+    return version
+
+
+def bump_task_list_version() -> None:
+    """Invalidate every cached task-list fragment."""
+    cache: BaseCache = get_task_list_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # The version was never set or has been evicted.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+async def abump_task_list_version() -> None:
+    cache: BaseCache = get_task_list_cache()
+    try:
+        await cache.aincr(VERSION_KEY)
+    except ValueError:
+        await cache.aadd(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_or_render_fragment(
+    fragment_name: str,
+    render: Callable[[], str],
+    *vary_on: Any,
+) -> SafeString:
+    """
+    Get a rendered task-list fragment from the cache, calling render() to
+    render and store it on a miss. The fragment is keyed by its name, the
+    current task list version and vary_on.
+    """
+    cache: BaseCache = get_task_list_cache()
+    key: str = make_template_fragment_key(
+        fragment_name,
+        (get_task_list_version(), *vary_on),
+    )
+    html: Optional[str] = cache.get(key)
+    if html is None:
+        task_list_cache_stats.record_miss()
+        html = render()
+        cache.set(key, html)
+    else:
+        task_list_cache_stats.record_hit()
+    return mark_safe(html)
+
+
+async def aget_or_render_fragment(
+    fragment_name: str,
+    render: Callable[[], Awaitable[str]],
+    *vary_on: Any,
+) -> SafeString:
+    """
+    Like get_or_render_fragment(), for async callers. render() is awaited,
+    so it can query the database asynchronously.
+    """
+    cache: BaseCache = get_task_list_cache()
+    key: str = make_template_fragment_key(
+        fragment_name,
+        (await aget_task_list_version(), *vary_on),
+    )
+    html: Optional[str] = await cache.aget(key)
+    if html is None:
+        task_list_cache_stats.record_miss()
+        html = await render()
+        await cache.aset(key, html)
+    else:
+        task_list_cache_stats.record_hit()
+    return mark_safe(html)
@@ -0,0 +1,250 @@
+from django.db import connection
+from django.db import transaction
+from django.db.models import Max
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import Task
+from .models import TaskChangeCounter
+from .models import TaskTombstone
+
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+import heapq
+
+
+# Every insert, update and delete of a task is numbered, and deletes leave a
+# tombstone with their number. This is done by triggers, created by
+# migrations 0006, 0009 and 0010, so that it covers every way of writing,
+# including bulk and raw queries.
+#
+# On Postgres a change's number is the id of the transaction that made it
+# (pg_current_xact_id()), which Postgres hands out in order without locking
+# anything, so concurrent writes are not serialized. It is offset by the
+# value of the single row of todo_taskchangecounter, which migration 0009
+# set so that the numbers continue from those that the row handed out
+# before, or by 0 if the row is missing, as after a flush. Transactions
+# commit in a different order than they start, so a client is only sent
+# the changes below the visibility horizon: the oldest transaction still in
+# flight. Every transaction below it has ended and no later one can take a
+# number below it, so a client that has synced up to the horizon can never
+# later miss a change below it. The changes of one transaction share a
+# number.
+#
+# Changes numbered from the horizon on may still be uncommitted, or
+# committed after the ones below them were sent.
+POSTGRES_HORIZON_SQL: str = (
+    "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint "
+    "+ COALESCE((SELECT value FROM todo_taskchangecounter WHERE id = 1), 0)"
+)
+
+# SQLite has a single writer at a time, so changes are numbered from the
+# single row of todo_taskchangecounter, in the order that they commit, which
+# serializes nothing that is not serialized already. The row is created by
+# the first change if it is missing, as after a flush. Every change is below
+# the horizon.
+#
+# SQLite triggers cannot modify the row being written, so the number is set
+# by an UPDATE after the write. The update trigger lists every column but
+# change_seq and version, so that the UPDATEs of the insert trigger and of
+# migration 0007's versioning trigger do not fire it, and both must be
+# created again, by a migration, when columns are added.
+#
+# While tasks are inserted in bulk on SQLite, the insert trigger is dropped
+# and the inserted tasks, those above a pk, are numbered all at once, in
+# the order of their pks, as the trigger would have numbered them. The
+# trigger is then created again from the definition that SQLite kept of
+# it, so that there is no copy of it here to drift from the migrations'.
+SQLITE_INSERT_TRIGGER: str = "todo_task_change_insert"
+SQLITE_TRIGGER_SQL: str = (
+    "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = %s"
+)
+SQLITE_NUMBER_INSERTED_SQL: str = (
+    "UPDATE todo_task SET change_seq = numbered.change_seq FROM ("
+    "SELECT id, "
+    "COALESCE((SELECT value FROM todo_taskchangecounter WHERE id = 1), 0) "
+    "+ row_number() OVER (ORDER BY id) AS change_seq "
+    "FROM todo_task WHERE id > %s"
+    ") AS numbered WHERE todo_task.id = numbered.id"
+)
+SQLITE_COUNT_INSERTED_SQL: str = (
+    "INSERT INTO todo_taskchangecounter (id, value, pruned_seq) "
+    "VALUES (1, %s, 0) "
+    "ON CONFLICT (id) DO UPDATE SET value = value + excluded.value"
+)
+
+
+@contextmanager
+def defer_sqlite_numbering(cursor: Any, last_pk: int) -> Iterator[None]:
+    """
+    Number the tasks inserted in the block, whose pks must be above
+    last_pk, with one statement at its end instead of one trigger each,
+    which makes bulk inserts several times faster on SQLite.
+
+    Must run in a transaction, which, since triggers are transactional on
+    SQLite, hides the missing trigger from other connections and restores
+    it if the block fails.
+    """
+    cursor.execute(SQLITE_TRIGGER_SQL, [SQLITE_INSERT_TRIGGER])
+    create_trigger_sql: str = cursor.fetchone()[0]
+    cursor.execute(f"DROP TRIGGER {SQLITE_INSERT_TRIGGER}")
+    yield
+    cursor.execute(SQLITE_NUMBER_INSERTED_SQL, [last_pk])
+    cursor.execute(SQLITE_COUNT_INSERTED_SQL, [cursor.rowcount])
+    cursor.execute(create_trigger_sql)
+
+
+def get_horizon() -> int:
+    """
+    Get the number from which changes may still be in flight. Every change
+    below it has been committed or rolled back.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_HORIZON_SQL)
+            return cursor.fetchone()[0]
+    value: Optional[int] = (
+        TaskChangeCounter.objects.filter(pk=1)
+        .values_list("value", flat=True)
+        .first()
+    )
+    return (value or 0) + 1
+
+
+def merge_changes(
+    tasks: Iterable[Dict[str, Any]],
+    tombstones: Iterable[Dict[str, Any]],
+    fields: Tuple[str, ...],
+) -> List[Dict[str, Any]]:
+    """
+    Merge rows of tasks and of tombstones, each ordered by number, into
+    changes ordered by number.
+    """
+    # A task deleted and recreated with the same pk in one transaction has a
+    # tombstone and a row with the same number, which must be applied in
+    # that order.
+    return list(heapq.merge(
+        (
+            {
+                "seq": tombstone["change_seq"],
+                "pk": tombstone["task_pk"],
+                "deleted": True,
+                "task": None,
+            }
+            for tombstone in tombstones
+        ),
+        (
+            {
+                "seq": task.pop("change_seq"),
+                "pk": task["pk"],
+                "deleted": False,
+                "task": {field: task[field] for field in fields},
+            }
+            for task in tasks
+        ),
+        key=lambda change: change["seq"],
+    ))
+
+
+def get_changes(
+    since: int,
+    *,
+    fields: Tuple[str, ...],
+    limit: int,
+) -> Tuple[List[Dict[str, Any]], bool, int]:
+    """
+    Get the changes to tasks numbered after since and below the horizon,
+    oldest first.
+
+    Returns at most limit changes, whether there are more and the number to
+    get the next changes after. Each change has its number ("seq"), the
+    task's pk, whether it was deleted and, if not, the given fields of the
+    task as it is now. A task changed several times since then appears once,
+    at its latest change. The changes of a transaction are never split
+    between responses, so a transaction of more than limit changes is
+    returned whole.
+    """
+    # Read before the changes, so that every change below it is visible.
+    horizon: int = get_horizon()
+    tasks: QuerySet = Task.objects.filter(
+        change_seq__gt=since,
+        change_seq__lt=horizon,
+    )
+    tombstones: QuerySet = TaskTombstone.objects.filter(
+        change_seq__gt=since,
+        change_seq__lt=horizon,
+    )
+    task_columns: Tuple[str, ...] = (
+        "change_seq",
+        *dict.fromkeys(("pk", *fields)),
+    )
+
+    changes: List[Dict[str, Any]] = merge_changes(
+        tasks.order_by("change_seq").values(*task_columns)[:limit + 1],
+        tombstones.order_by("change_seq")
+        .values("change_seq", "task_pk")[:limit + 1],
+        fields,
+    )
+    if len(changes) <= limit:
+        # Every change below the horizon has been sent, even if the last of
+        # them were deletions whose tombstones have been pruned.
+        return changes, False, max(since, horizon - 1)
+    # End the page before the transaction that the limit falls in, or, if
+    # that is the first, after all of its changes.
+    boundary: int = changes[limit]["seq"]
+    changes = [change for change in changes if change["seq"] < boundary]
+    if not changes:
+        changes = merge_changes(
+            tasks.filter(change_seq=boundary).values(*task_columns),
+            tombstones.filter(change_seq=boundary)
+            .values("change_seq", "task_pk"),
+            fields,
+        )
+    return changes, True, changes[-1]["seq"]
+
+
+def get_pruned_seq() -> int:
+    """
+    Get the largest number of a pruned tombstone. A client that synced up
+    to an earlier number may have missed deletions, and must sync again
+    from the start.
+    """
+    return (
+        TaskChangeCounter.objects.filter(pk=1)
+        .values_list("pruned_seq", flat=True)
+        .first()
+    ) or 0
+
+
+def prune_tombstones(retention: timedelta) -> int:
+    """
+    Delete the tombstones of tasks deleted more than retention ago, and
+    record the largest of their numbers, from which get_pruned_seq() makes
+    older clients sync again. Returns the number of tombstones deleted.
+    """
+    cutoff: datetime = timezone.now() - retention
+    with transaction.atomic():
+        pruned: QuerySet = TaskTombstone.objects.filter(deleted_at__lt=cutoff)
+        pruned_seq: Optional[int] = pruned.aggregate(
+            Max("change_seq"),
+        )["change_seq__max"]
+        if pruned_seq is None:
+            return 0
+        # Tombstones share numbers on Postgres, so those with the largest
+        # number must all go, or a client could resume between them.
+        pruned = TaskTombstone.objects.filter(change_seq__lte=pruned_seq)
+        deleted: int = pruned.delete()[0]
+        TaskChangeCounter.objects.get_or_create(pk=1)
+        TaskChangeCounter.objects.filter(
+            pk=1,
+            pruned_seq__lt=pruned_seq,
+        ).update(pruned_seq=pruned_seq)
+    return deleted
@@ -0,0 +1,143 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.http import quote_etag
+
+from .cache import get_task_list_version
+from .filters import InvalidFilter
+from .filters import TaskListFilter
+from .models import Task
+
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from functools import wraps
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import Tuple
+import hashlib
+
+
+def make_etag(request: HttpRequest, *parts: Any) -> str:
+    """
+    Make a strong ETag from parts describing the resource's state.
+
+    The CSRF cookie is included because the pages embed a CSRF token: a page
+    cached under one CSRF cookie must not be revalidated under another.
+    """
+    hasher = hashlib.md5(usedforsecurity=False)
+    for part in (*parts, request.META.get("CSRF_COOKIE", "")):
+        hasher.update(str(part).encode())
+        hasher.update(b":")
+    return f"\"{hasher.hexdigest()}\""
+
+
+def task_list_etag(request: HttpRequest) -> Optional[str]:
+    """
+    Make the ETag of a task list from the task-list version, which every
+    write of tasks bumps, so that revalidating does not query the tasks.
+    """
+    try:
+        list_filter: TaskListFilter = TaskListFilter(request.GET)
+    except InvalidFilter:
+        return None
+    return make_etag(
+        request,
+        get_task_list_version(),
+        request.GET.urlencode(),
+        # Overdue tasks also change with the time.
+        list_filter.now,
+    )
+
+
+def get_task_updated_at(request: HttpRequest, pk: int) -> Optional[datetime]:
+    """
+    Get the time at which a task was last modified, or None if the task does
+    not exist.
+    """
+    if not hasattr(request, "_todo_task_updated_at"):
+        request._todo_task_updated_at = (
+            Task.objects.filter(pk=pk)
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+    return request._todo_task_updated_at
+
+
+def task_detail_etag(request: HttpRequest, pk: int) -> Optional[str]:
+    updated_at: Optional[datetime] = get_task_updated_at(request, pk)
+    if updated_at is None:
+        return None
+    return make_etag(request, pk, updated_at)
+
+
+def task_detail_last_modified(
+    request: HttpRequest,
+    pk: int,
+) -> Optional[datetime]:
+    return get_task_updated_at(request, pk)
+
+
+def async_condition(
+    etag_func: Callable[..., Optional[str]],
+    last_modified_func: Optional[Callable[..., Optional[datetime]]] = None,
+) -> Callable:
+    """
+    Like django.views.decorators.http.condition, for async views.
+
+    Django's decorator calls etag_func and last_modified_func synchronously
+    even around an async view, which is not allowed when they query the
+    database, so here they are run together in a thread.
+    """
+    def get_validators(
+        request: HttpRequest,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Tuple[Optional[str], Optional[int]]:
+        etag: Optional[str] = etag_func(request, *args, **kwargs)
+        last_modified: Optional[datetime] = (
+            last_modified_func(request, *args, **kwargs)
+            if last_modified_func is not None
+            else None
+        )
+        if last_modified is not None and not timezone.is_aware(last_modified):
+            last_modified = timezone.make_aware(last_modified, dt_timezone.utc)
+        return (
+            quote_etag(etag) if etag is not None else None,
+            int(last_modified.timestamp()) if last_modified else None,
+        )
+
+
+    def decorator(
+        view: Callable[..., Awaitable[HttpResponse]],
+    ) -> Callable[..., Awaitable[HttpResponse]]:
+        @wraps(view)
+        async def inner(
+            request: HttpRequest,
+            *args: Any,
+            **kwargs: Any,
+        ) -> HttpResponse:
+            etag, last_modified = await sync_to_async(get_validators)(
+                request,
+                *args,
+                **kwargs,
+            )
+            response: Optional[HttpResponse] = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=last_modified,
+            )
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                if last_modified and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+            return response
+        return inner
+    return decorator
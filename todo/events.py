@@ -0,0 +1,225 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from .serializers import dumps
+
+from contextlib import asynccontextmanager
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Set
+from typing import Tuple
+import asyncio
+import json
+import logging
+import threading
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Fields of a task sent in "saved" events. These are what the task list
+# shows, plus the due date for sorting.
+EVENT_TASK_FIELDS: Tuple[str, ...] = ("pk", "title", "completed", "due_date")
+# Sent to a subscriber that fell behind and missed events, which must then
+# reload instead of patching.
+RESET_EVENT: Dict[str, Any] = {"type": "reset"}
+
+
+def task_saved_event(
+    task: Any,
+    fields: Iterable[str] = EVENT_TASK_FIELDS,
+) -> Dict[str, Any]:
+    """
+    An event for a created or modified task, with the given fields of it.
+    task is a Task, whose deferred fields are left out, or a dictionary of
+    its fields.
+    """
+    if isinstance(task, dict):
+        values: Dict[str, Any] = {field: task[field] for field in fields}
+    else:
+        deferred: Set[str] = task.get_deferred_fields()
+        values = {
+            field: getattr(task, field)
+            for field in fields
+            if field not in deferred
+        }
+    return {"type": "saved", "task": values}
+
+
+def task_deleted_event(pk: int) -> Dict[str, Any]:
+    return {"type": "deleted", "task": {"pk": pk}}
+
+
+class Subscription:
+    """A queue of events for one subscriber, on the subscriber's loop."""
+    def __init__(self, max_size: int) -> None:
+        self.loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(max_size)
+
+
+    def put(self, event: Dict[str, Any]) -> None:
+        """Queue an event. Must be called on the subscriber's loop."""
+        if self.queue.full():
+            # Rather than grow without bound for a slow client, drop what it
+            # has not read and tell it to start over.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESET_EVENT
+        self.queue.put_nowait(event)
+
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """
+    Publishes task events to subscribers in this process.
+
+    Events may be published from any thread. With several server processes,
+    each only sees its own writes; use PostgresBroker to share them.
+    """
+    def __init__(self, max_queue_size: int = 100) -> None:
+        self.max_queue_size: int = max_queue_size
+        self._subscriptions: Set[Subscription] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.deliver(event)
+
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        """Hand an event to every subscriber in this process."""
+        with self._lock:
+            subscriptions: Set[Subscription] = set(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The subscriber's loop has been closed.
+                pass
+
+
+    async def start(self) -> None:
+        """Start receiving events from elsewhere, if the broker does."""
+
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[Subscription]:
+        await self.start()
+        subscription: Subscription = Subscription(self.max_queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions.discard(subscription)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Publishes task events to subscribers in every process through Postgres
+    NOTIFY. Each process holds one connection that LISTENs on the channel
+    and hands what it receives to its own subscribers.
+    """
+    channel: str = "todo_task_events"
+    # NOTIFY payloads must be shorter than 8000 bytes.
+    max_payload_size: int = 7999
+
+
+    def __init__(self, max_queue_size: int = 100) -> None:
+        super().__init__(max_queue_size)
+        self._listener: Optional[asyncio.Task] = None
+        self._listener_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        payload: str = dumps(event).decode()
+        if len(payload.encode()) > self.max_payload_size:
+            # A very long title. Subscribers reload instead.
+            payload = json.dumps(RESET_EVENT)
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+
+    async def start(self) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if (
+            self._listener is None
+            or self._listener.done()
+            or self._listener_loop is not loop
+        ):
+            self._listener = loop.create_task(self._listen())
+            self._listener_loop = loop
+
+
+    async def _listen(self) -> None:
+        import psycopg
+
+        params: Dict[str, Any] = connections[
+            DEFAULT_DB_ALIAS
+        ].get_connection_params()
+        # These are for Django's synchronous connections.
+        params.pop("cursor_factory", None)
+        params.pop("context", None)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    autocommit=True,
+                    **params,
+                ) as connection:
+                    await connection.execute(f"LISTEN {self.channel}")
+                    async for notify in connection.notifies():
+                        self._receive(notify.payload)
+            except Exception:
+                # Whatever failed, the listener must keep going, or this
+                # process's subscribers would silently stop getting events.
+                logger.exception("Lost the task event listener connection.")
+                # Events may have been missed while disconnected.
+                self.deliver(RESET_EVENT)
+                await asyncio.sleep(1)
+
+
+    def _receive(self, payload: str) -> None:
+        try:
+            event: Dict[str, Any] = json.loads(payload)
+        except ValueError:
+            # Not sent by publish(), so subscribers cannot tell what changed.
+            logger.exception("Received a malformed task event: %r", payload)
+            event = RESET_EVENT
+        self.deliver(event)
+
+
+_broker: Optional[LocalBroker] = None
+_broker_lock: threading.Lock = threading.Lock()
+
+
+def get_broker() -> LocalBroker:
+    """The broker named by the TODO_EVENTS_BROKER setting."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.TODO_EVENTS_BROKER)()
+        return _broker
+
+
+def publish(event: Dict[str, Any]) -> None:
+    get_broker().publish(event)
+
+
+def publish_all(events: Iterable[Dict[str, Any]]) -> None:
+    broker: LocalBroker = get_broker()
+    for event in events:
+        broker.publish(event)
+
+
+async def apublish(event: Dict[str, Any]) -> None:
+    # PostgresBroker queries the database to publish.
+    await sync_to_async(publish)(event)
@@ -0,0 +1,97 @@
+from django.db.models import QuerySet
+from django.http import QueryDict
+from django.utils import timezone
+
+from datetime import datetime
+from typing import Any
+from typing import Optional
+from typing import Tuple
+
+
+STATUS_CHOICES: Tuple[Tuple[str, str], ...] = (
+    ("all", "All tasks"),
+    ("pending", "Pending"),
+    ("completed", "Completed"),
+    ("overdue", "Overdue"),
+)
+SORT_CHOICES: Tuple[Tuple[str, str], ...] = (
+    ("created", "Date added"),
+    ("due", "Due date"),
+)
+STATUSES: Tuple[str, ...] = tuple(value for value, _ in STATUS_CHOICES)
+SORTS: Tuple[str, ...] = tuple(value for value, _ in SORT_CHOICES)
+
+
+class InvalidFilter(ValueError):
+    """Raised when the task list is requested with an unknown filter."""
+
+
+class TaskListFilter:
+    """
+    The filter and sort order of the task list, from the query parameters
+    "status" (one of STATUSES), "sort" (one of SORTS) and "q" (text that
+    titles must contain, ignoring case).
+
+    Each combination is served by an index on Postgres: tasks by date added
+    by the primary key, all tasks by due date by the (due_date, id) index,
+    pending and overdue tasks by due date by the partial index on incomplete
+    tasks, completed tasks by due date by the (completed, due_date, id)
+    index, and title search by the trigram index on UPPER(title).
+    """
+    status_choices = STATUS_CHOICES
+    sort_choices = SORT_CHOICES
+
+
+    def __init__(self, params: QueryDict) -> None:
+        self.status: str = params.get("status") or "all"
+        if self.status not in STATUSES:
+            raise InvalidFilter(f"Invalid status: {self.status!r}")
+        self.sort: str = params.get("sort") or "created"
+        if self.sort not in SORTS:
+            raise InvalidFilter(f"Invalid sort: {self.sort!r}")
+        self.q: str = params.get("q", "").strip()
+        # Whether a task is overdue depends on the time, so the overdue list
+        # is computed as of the start of the minute. This lets its cached
+        # copies and ETags stay valid for the rest of the minute.
+        self.now: Optional[datetime] = None
+        if self.status == "overdue":
+            self.now = timezone.now().replace(second=0, microsecond=0)
+
+
+    @property
+    def ordering(self) -> str:
+        """The field that the task list is ordered by before the pk."""
+        if self.sort == "due" or self.status == "overdue":
+            return "due_date"
+        return "pk"
+
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        if self.status == "pending":
+            queryset = queryset.pending()
+        elif self.status == "completed":
+            queryset = queryset.filter(completed=True)
+        elif self.status == "overdue":
+            queryset = queryset.overdue(self.now)
+        if self.q:
+            queryset = queryset.filter(title__icontains=self.q)
+        return queryset
+
+
+    @property
+    def key(self) -> Tuple[Any, ...]:
+        """Everything that affects which tasks are listed, for cache keys."""
+        return (self.status, self.sort, self.q, self.now)
+
+
+    @property
+    def query_params(self) -> QueryDict:
+        """The query parameters that select this filter."""
+        params: QueryDict = QueryDict(mutable=True)
+        if self.status != "all":
+            params["status"] = self.status
+        if self.sort != "created":
+            params["sort"] = self.sort
+        if self.q:
+            params["q"] = self.q
+        return params
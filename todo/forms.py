@@ -25,6 +25,22 @@ class DateTimeLocalInput(forms.widgets.Input):
                 return match[1]
 
 class TaskForm(forms.ModelForm):
+    # The version of the task that the form was filled in from, which the
+    # save is conditional on. Optional, so that a form posted without it
+    # saves unconditionally.
+    version = forms.IntegerField(
+        widget=forms.HiddenInput(),
+        required=False,
+        min_value=1,
+    )
+
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.fields["version"].initial = self.instance.version
+
+
     class Meta:
         model = Task
         fields = [
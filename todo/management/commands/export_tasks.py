@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+
+from todo.models import Task
+from todo.transfer import FORMATS
+from todo.transfer import format_rows
+from todo.transfer import guess_format
+from todo.transfer import iter_export_rows
+from todo.transfer import report_progress
+
+from typing import Any
+from typing import Iterator
+from typing import TextIO
+
+
+class Command(BaseCommand):
+    help = (
+        "Export every task as JSON Lines or CSV, streaming them so that "
+        "memory use does not grow with the number of tasks."
+    )
+
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "output",
+            nargs="?",
+            default="-",
+            help="File to write, or - (the default) for standard output.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Defaults to the output's extension, or else jsonl.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Tasks read from the database and written at a time.",
+        )
+
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        output: str = options["output"]
+        format: str = guess_format(output, options["format"])
+        batch_size: int = options["batch_size"]
+        chunks: Iterator[str] = format_rows(
+            report_progress(
+                iter_export_rows(batch_size),
+                self.stderr.write,
+                "Exported",
+                total=Task.objects.count(),
+            ),
+            format,
+            batch_size,
+        )
+        if output == "-":
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        file: TextIO
+        with open(output, "w", newline="", encoding="utf-8") as file:
+            for chunk in chunks:
+                file.write(chunk)
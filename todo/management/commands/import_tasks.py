@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.management.base import CommandParser
+from django.db import connection
+
+from todo.transfer import FORMATS
+from todo.transfer import InvalidRow
+from todo.transfer import ON_CONFLICT_CHOICES
+from todo.transfer import guess_format
+from todo.transfer import import_tasks
+from todo.transfer import parse_tasks
+from todo.transfer import read_rows
+from todo.transfer import report_progress
+
+from typing import Any
+from typing import TextIO
+import sys
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks from JSON Lines or CSV made by export_tasks, in "
+        "batches, streaming them so that memory use does not grow with the "
+        "number of tasks. Tasks are matched by title."
+    )
+
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "input",
+            help="File to read, or - for standard input.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Defaults to the input's extension, or else jsonl.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Tasks inserted at a time, each batch in a transaction.",
+        )
+        parser.add_argument(
+            "--on-conflict",
+            choices=ON_CONFLICT_CHOICES,
+            default="ignore",
+            help=(
+                "Whether tasks with the title of an existing task are "
+                "ignored (the default) or update it."
+            ),
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_false",
+            dest="copy",
+            help="On Postgres, insert with INSERT rather than COPY.",
+        )
+
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path: str = options["input"]
+        format: str = guess_format(path, options["format"])
+        file: TextIO = (
+            sys.stdin
+            if path == "-"
+            else open(path, newline="", encoding="utf-8")
+        )
+        try:
+            import_tasks(
+                report_progress(
+                    parse_tasks(read_rows(file, format)),
+                    self.stderr.write,
+                    "Imported",
+                ),
+                batch_size=options["batch_size"],
+                on_conflict=options["on_conflict"],
+                use_copy=options["copy"] and connection.vendor == "postgresql",
+            )
+        except InvalidRow as e:
+            # The batches before the invalid row have been imported.
+            raise CommandError(str(e)) from e
+        finally:
+            if file is not sys.stdin:
+                file.close()
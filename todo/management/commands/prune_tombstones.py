@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+
+from todo.changes import prune_tombstones
+
+from datetime import timedelta
+from typing import Any
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the tombstones of tasks deleted longer ago than the "
+        "retention, which syncing clients no longer need. Clients that last "
+        "synced before them are told to sync again from the start."
+    )
+
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TODO_CHANGES_RETENTION_DAYS,
+            help=(
+                "Days to keep tombstones for. Defaults to "
+                "TODO_CHANGES_RETENTION_DAYS."
+            ),
+        )
+
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        deleted: int = prune_tombstones(timedelta(days=options["days"]))
+        self.stderr.write(f"Pruned {deleted} tombstones")
@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.management.base import CommandParser
+from django.utils import timezone
+
+from todo.seeding import generate_rows
+from todo.seeding import seed_tasks
+from todo.transfer import report_progress
+
+from datetime import datetime
+from typing import Any
+
+
+def ratio(value: str) -> float:
+    """Parse a ratio between 0 and 1, for argparse."""
+    number: float = float(value)
+    if not 0 <= number <= 1:
+        raise ValueError(value)
+    return number
+
+
+class Command(BaseCommand):
+    help = (
+        "Add synthetic tasks for testing at scale. The same seed gives the "
+        "same tasks, with due dates relative to the start of the day. Tasks "
+        "whose titles exist already are skipped, so seeding twice with the "
+        "same seed adds nothing."
+    )
+
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=1000,
+            help="Number of tasks to generate.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of the random generator.",
+        )
+        parser.add_argument(
+            "--description-size",
+            type=int,
+            default=200,
+            help="Average length of descriptions, or 0 for none.",
+        )
+        parser.add_argument(
+            "--completed-ratio",
+            type=ratio,
+            default=0.3,
+            help="Fraction of tasks that are completed.",
+        )
+        parser.add_argument(
+            "--due-ratio",
+            type=ratio,
+            default=0.5,
+            help="Fraction of tasks that have a due date.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Tasks inserted at a time, each batch in a transaction.",
+        )
+
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["count"] < 0:
+            raise CommandError("--count must not be negative.")
+        now: datetime = timezone.now().replace(
+            hour=0,
+            minute=0,
+            second=0,
+            microsecond=0,
+        )
+        seed_tasks(
+            report_progress(
+                generate_rows(
+                    options["count"],
+                    seed=options["seed"],
+                    now=now,
+                    description_size=options["description_size"],
+                    completed_ratio=options["completed_ratio"],
+                    due_ratio=options["due_ratio"],
+                ),
+                self.stderr.write,
+                "Seeded",
+                total=options["count"],
+            ),
+            batch_size=options["batch_size"],
+        )
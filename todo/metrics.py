@@ -0,0 +1,417 @@
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template
+
+from .cache import task_list_cache_stats
+
+from contextvars import ContextVar
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+import hmac
+import threading
+import time
+
+
+# Metrics are kept in each process, so with several gunicorn workers each
+# scrape of /metrics sees the worker that served it. Scrape each worker, or
+# run a single worker, to see them all.
+
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+SECONDS_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS: Tuple[float, ...] = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS: Tuple[float, ...] = (
+    100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000,
+)
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs: str = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace("\n", "\\n")
+            .replace('"', '\\"'),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A Prometheus counter with labels."""
+    type_name: str = "counter"
+
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+    ) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.label_names: Tuple[str, ...] = label_names
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values: List[Tuple[Tuple[str, ...], float]] = list(
+                self.values.items()
+            )
+        return [
+            f"{self.name}{format_labels(self.label_names, labels)} "
+            f"{format_value(value)}"
+            for labels, value in sorted(values)
+        ]
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self.values.clear()
+
+
+class Histogram(Counter):
+    """A Prometheus histogram with labels."""
+    type_name: str = "histogram"
+
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+        *,
+        buckets: Tuple[float, ...],
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets: Tuple[float, ...] = (*buckets, float("inf"))
+        # For each set of labels, the number of observations in each bucket
+        # (not cumulative), then their sum.
+        self.observations: Dict[Tuple[str, ...], List[float]] = {}
+
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            counts: Optional[List[float]] = self.observations.get(labels)
+            if counts is None:
+                counts = self.observations[labels] = [0] * (
+                    len(self.buckets) + 1
+                )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            observations: List[Tuple[Tuple[str, ...], List[float]]] = [
+                (labels, list(counts))
+                for labels, counts in self.observations.items()
+            ]
+        lines: List[str] = []
+        bucket_label_names: Tuple[str, ...] = (*self.label_names, "le")
+        for labels, counts in sorted(observations):
+            total: float = 0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{format_labels(bucket_label_names, (*labels, format_value(bound)))} "
+                    f"{format_value(total)}"
+                )
+            formatted_labels: str = format_labels(self.label_names, labels)
+            lines.append(
+                f"{self.name}_sum{formatted_labels} {format_value(counts[-1])}"
+            )
+            lines.append(
+                f"{self.name}_count{formatted_labels} {format_value(total)}"
+            )
+        return lines
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self.observations.clear()
+
+
+REQUESTS: Counter = Counter(
+    "todo_requests_total",
+    "Requests, by view, method and status code.",
+    ("view", "method", "status"),
+)
+REQUEST_SECONDS: Histogram = Histogram(
+    "todo_request_duration_seconds",
+    "Time to produce a response, including middleware.",
+    ("view", "method"),
+    buckets=SECONDS_BUCKETS,
+)
+DB_QUERIES: Histogram = Histogram(
+    "todo_request_db_queries",
+    "Database queries made by a request.",
+    ("view",),
+    buckets=QUERY_BUCKETS,
+)
+DB_SECONDS: Histogram = Histogram(
+    "todo_request_db_duration_seconds",
+    "Time a request spent in database queries.",
+    ("view",),
+    buckets=SECONDS_BUCKETS,
+)
+TEMPLATE_SECONDS: Histogram = Histogram(
+    "todo_request_template_duration_seconds",
+    "Time a request spent rendering templates.",
+    ("view",),
+    buckets=SECONDS_BUCKETS,
+)
+RESPONSE_BYTES: Histogram = Histogram(
+    "todo_response_size_bytes",
+    "Size of response bodies. Streamed responses are left out.",
+    ("view",),
+    buckets=BYTES_BUCKETS,
+)
+METRICS: Tuple[Counter, ...] = (
+    REQUESTS,
+    REQUEST_SECONDS,
+    DB_QUERIES,
+    DB_SECONDS,
+    TEMPLATE_SECONDS,
+    RESPONSE_BYTES,
+)
+
+
+class RequestMetrics:
+    """What one request spent its time on, so far."""
+    def __init__(self) -> None:
+        self.queries: int = 0
+        self.query_seconds: float = 0.0
+        self.template_seconds: float = 0.0
+
+
+# The metrics of the request being handled. Context variables are copied
+# into the threads that sync_to_async() runs code in, so queries made there
+# are counted for the request too.
+current_request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "current_request_metrics",
+    default=None,
+)
+
+
+def time_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: Dict[str, Any],
+) -> Any:
+    """A database execute wrapper that times queries made by requests."""
+    metrics: Optional[RequestMetrics] = current_request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start: float = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.query_seconds += time.perf_counter() - start
+        metrics.queries += 1
+
+
+def install_query_timer(
+    connection: BaseDatabaseWrapper,
+    **kwargs: Any,
+) -> None:
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class InstrumentedTemplate(Template):
+    def render(
+        self,
+        context: Optional[Dict[str, Any]] = None,
+        request: Optional[HttpRequest] = None,
+    ) -> str:
+        metrics: Optional[RequestMetrics] = current_request_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        start: float = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_seconds += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing the templates that requests render.
+    Templates included by another are timed as part of it.
+    """
+    def from_string(self, template_code: str) -> InstrumentedTemplate:
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code),
+            self,
+        )
+
+
+    def get_template(self, template_name: str) -> InstrumentedTemplate:
+        # Reuse the parent's handling of TemplateDoesNotExist.
+        template: Template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+class MetricsMiddleware:
+    """
+    Record the time, database queries, template rendering and response size
+    of each request, labelled by the name of its view, for /metrics.
+
+    Unless settings.TODO_METRICS is set, the middleware removes itself from
+    the chain and queries are not wrapped, so it costs nothing.
+    """
+    sync_capable: bool = True
+    async_capable: bool = True
+
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.TODO_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response: Callable = get_response
+        self.is_async: bool = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_timer)
+        # Connections opened before the middleware was loaded.
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.is_async:
+            return self.__acall__(request)
+        metrics: RequestMetrics = RequestMetrics()
+        token = current_request_metrics.set(metrics)
+        start: float = time.perf_counter()
+        try:
+            response: HttpResponse = self.get_response(request)
+        finally:
+            current_request_metrics.reset(token)
+        record(request, response, metrics, time.perf_counter() - start)
+        return response
+
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        metrics: RequestMetrics = RequestMetrics()
+        token = current_request_metrics.set(metrics)
+        start: float = time.perf_counter()
+        try:
+            response: HttpResponse = await self.get_response(request)
+        finally:
+            current_request_metrics.reset(token)
+        record(request, response, metrics, time.perf_counter() - start)
+        return response
+
+
+def record(
+    request: HttpRequest,
+    response: HttpResponse,
+    metrics: RequestMetrics,
+    seconds: float,
+) -> None:
+    # Label by the view's name rather than by path, so that the number of
+    # series stays bounded.
+    view: str = (
+        request.resolver_match.view_name
+        if request.resolver_match is not None
+        else "unmatched"
+    )
+    method: str = request.method or ""
+    REQUESTS.inc(view, method, str(response.status_code))
+    REQUEST_SECONDS.observe(seconds, view, method)
+    DB_QUERIES.observe(metrics.queries, view)
+    DB_SECONDS.observe(metrics.query_seconds, view)
+    TEMPLATE_SECONDS.observe(metrics.template_seconds, view)
+    if not response.streaming:
+        RESPONSE_BYTES.observe(len(response.content), view)
+
+
+def is_scrape_authorized(request: HttpRequest) -> bool:
+    """
+    Whether a request for the metrics carries the bearer token of
+    settings.TODO_METRICS_TOKEN. Without a token set, none does.
+    """
+    token: str = settings.TODO_METRICS_TOKEN
+    if not token:
+        return False
+    return hmac.compare_digest(
+        request.headers.get("Authorization", "").encode(),
+        f"Bearer {token}".encode(),
+    )
+
+
+def render_metrics() -> str:
+    """Every metric of this process in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines += metric.samples()
+    for name, documentation, value in (
+        (
+            "todo_task_list_cache_hits_total",
+            "Lookups of task-list fragments found in the cache.",
+            task_list_cache_stats.hits,
+        ),
+        (
+            "todo_task_list_cache_misses_total",
+            "Lookups of task-list fragments that had to be rendered.",
+            task_list_cache_stats.misses,
+        ),
+    ):
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {value}")
+    lines.append(
+        "# HELP todo_task_list_cache_hit_ratio "
+        "Fraction of task-list fragment lookups that were hits."
+    )
+    lines.append("# TYPE todo_task_list_cache_hit_ratio gauge")
+    lines.append(
+        f"todo_task_list_cache_hit_ratio "
+        f"{format_value(task_list_cache_stats.hit_ratio)}"
+    )
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    for metric in METRICS:
+        metric.reset()
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0002_alter_task_due_date_alter_task_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='The date and time at which the task was last modified.'),
+            preserve_default=False,
+        ),
+    ]
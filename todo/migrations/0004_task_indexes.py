@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+def create_title_trigram_index(apps, schema_editor):
+    # Django's icontains lookup compiles to UPPER(title) LIKE UPPER(%s) on
+    # Postgres, which a trigram index on UPPER(title) can serve.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS todo_task_title_trgm_idx "
+        "ON todo_task USING gin (UPPER(title) gin_trgm_ops)"
+    )
+
+
+def drop_title_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS todo_task_title_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0003_task_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['completed', 'due_date'], name='todo_task_completed_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['due_date', 'id'], name='todo_task_pending_due_idx'),
+        ),
+        migrations.RunPython(
+            create_title_trigram_index,
+            drop_title_trigram_index,
+        ),
+    ]
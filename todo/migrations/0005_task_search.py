@@ -0,0 +1,83 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:40
+
+from django.db import migrations
+
+
+# The full-text search index that todo.search queries. Later migrations
+# that rebuild todo_task on SQLite create its triggers again from here.
+#
+# On Postgres the search vector is a stored generated column, indexed with
+# GIN. Title matches rank above description matches.
+POSTGRES_INSTALL_SQL = (
+    "ALTER TABLE todo_task ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', description), 'B')"
+    ") STORED",
+    "CREATE INDEX IF NOT EXISTS todo_task_search_idx "
+    "ON todo_task USING gin (search_vector)",
+)
+POSTGRES_UNINSTALL_SQL = (
+    "DROP INDEX IF EXISTS todo_task_search_idx",
+    "ALTER TABLE todo_task DROP COLUMN IF EXISTS search_vector",
+)
+
+# On SQLite, an FTS5 index over todo_task is kept up to date by triggers.
+SQLITE_INSTALL_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_task_fts USING fts5("
+    "title, description, content='todo_task', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS todo_task_fts_insert "
+    "AFTER INSERT ON todo_task BEGIN "
+    "INSERT INTO todo_task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS todo_task_fts_delete "
+    "AFTER DELETE ON todo_task BEGIN "
+    "INSERT INTO todo_task_fts(todo_task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS todo_task_fts_update "
+    "AFTER UPDATE OF title, description ON todo_task BEGIN "
+    "INSERT INTO todo_task_fts(todo_task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO todo_task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); "
+    "END",
+    "INSERT INTO todo_task_fts(todo_task_fts) VALUES ('rebuild')",
+)
+SQLITE_UNINSTALL_SQL = (
+    "DROP TRIGGER IF EXISTS todo_task_fts_insert",
+    "DROP TRIGGER IF EXISTS todo_task_fts_delete",
+    "DROP TRIGGER IF EXISTS todo_task_fts_update",
+    "DROP TABLE IF EXISTS todo_task_fts",
+)
+
+
+def install(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_INSTALL_SQL,
+        "sqlite": SQLITE_INSTALL_SQL,
+    }.get(schema_editor.connection.vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_UNINSTALL_SQL,
+        "sqlite": SQLITE_UNINSTALL_SQL,
+    }.get(schema_editor.connection.vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0004_task_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
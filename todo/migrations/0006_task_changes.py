@@ -0,0 +1,143 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:33
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models import Max
+
+from importlib import import_module
+
+
+# The change tracking that todo.changes reads. Every insert, update and delete of a task takes the next number
+# from the single row of todo_taskchangecounter, and deletes leave a
+# tombstone with their number.
+POSTGRES_INSTALL_SQL = (
+    "CREATE OR REPLACE FUNCTION todo_task_change() RETURNS trigger AS $$ "
+    "BEGIN "
+    "UPDATE todo_taskchangecounter SET value = value + 1 WHERE id = 1 "
+    "RETURNING value INTO NEW.change_seq; "
+    "RETURN NEW; "
+    "END; "
+    "$$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE FUNCTION todo_task_tombstone() RETURNS trigger AS $$ "
+    "BEGIN "
+    "WITH counter AS ("
+    "UPDATE todo_taskchangecounter SET value = value + 1 WHERE id = 1 "
+    "RETURNING value) "
+    "INSERT INTO todo_tasktombstone (task_pk, change_seq) "
+    "SELECT OLD.id, value FROM counter; "
+    "RETURN OLD; "
+    "END; "
+    "$$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE TRIGGER todo_task_change "
+    "BEFORE INSERT OR UPDATE ON todo_task "
+    "FOR EACH ROW EXECUTE FUNCTION todo_task_change()",
+    "CREATE OR REPLACE TRIGGER todo_task_tombstone "
+    "AFTER DELETE ON todo_task "
+    "FOR EACH ROW EXECUTE FUNCTION todo_task_tombstone()",
+)
+POSTGRES_UNINSTALL_SQL = (
+    "DROP TRIGGER IF EXISTS todo_task_change ON todo_task",
+    "DROP TRIGGER IF EXISTS todo_task_tombstone ON todo_task",
+    "DROP FUNCTION IF EXISTS todo_task_change()",
+    "DROP FUNCTION IF EXISTS todo_task_tombstone()",
+)
+SQLITE_INSTALL_SQL = (
+    "CREATE TRIGGER IF NOT EXISTS todo_task_change_insert "
+    "AFTER INSERT ON todo_task BEGIN "
+    "UPDATE todo_taskchangecounter SET value = value + 1 WHERE id = 1; "
+    "UPDATE todo_task SET change_seq = "
+    "(SELECT value FROM todo_taskchangecounter WHERE id = 1) "
+    "WHERE id = new.id; "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS todo_task_change_update "
+    "AFTER UPDATE OF completed, title, description, due_date, updated_at "
+    "ON todo_task BEGIN "
+    "UPDATE todo_taskchangecounter SET value = value + 1 WHERE id = 1; "
+    "UPDATE todo_task SET change_seq = "
+    "(SELECT value FROM todo_taskchangecounter WHERE id = 1) "
+    "WHERE id = new.id; "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS todo_task_tombstone "
+    "AFTER DELETE ON todo_task BEGIN "
+    "UPDATE todo_taskchangecounter SET value = value + 1 WHERE id = 1; "
+    "INSERT INTO todo_tasktombstone (task_pk, change_seq) "
+    "SELECT old.id, value FROM todo_taskchangecounter WHERE id = 1; "
+    "END",
+)
+SQLITE_UNINSTALL_SQL = (
+    "DROP TRIGGER IF EXISTS todo_task_change_insert",
+    "DROP TRIGGER IF EXISTS todo_task_change_update",
+    "DROP TRIGGER IF EXISTS todo_task_tombstone",
+)
+
+# Adding change_seq rebuilds the table on SQLite, dropping the triggers of
+# migration 0005's search index, which are created again as they were
+# there.
+SQLITE_SEARCH_INDEX_SQL = import_module(
+    "todo.migrations.0005_task_search"
+).SQLITE_INSTALL_SQL
+
+
+def number_existing_tasks(apps, schema_editor):
+    Task = apps.get_model("todo", "Task")
+    TaskChangeCounter = apps.get_model("todo", "TaskChangeCounter")
+    Task.objects.update(change_seq=F("id"))
+    TaskChangeCounter.objects.create(
+        id=1,
+        value=Task.objects.aggregate(Max("id"))["id__max"] or 0,
+    )
+
+
+def install(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_INSTALL_SQL,
+        "sqlite": SQLITE_SEARCH_INDEX_SQL + SQLITE_INSTALL_SQL,
+    }.get(schema_editor.connection.vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_UNINSTALL_SQL,
+        "sqlite": SQLITE_UNINSTALL_SQL,
+    }.get(schema_editor.connection.vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0005_task_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChangeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_pk', models.BigIntegerField(db_index=True, help_text='The primary key of the deleted task.')),
+                ('change_seq', models.BigIntegerField(help_text='The position of the deletion in the sequence of changes.', unique=True)),
+                ('deleted_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), help_text='The date and time at which the task was deleted.')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='change_seq',
+            field=models.BigIntegerField(db_default=0, db_index=True, editable=False, help_text="The position of the task's last change in the sequence of all changes to tasks. Set by the database on every write."),
+        ),
+        migrations.RunPython(
+            number_existing_tasks,
+            migrations.RunPython.noop,
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
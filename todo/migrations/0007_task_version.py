@@ -0,0 +1,91 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+from importlib import import_module
+
+
+# Every update of a task increments its version, so that a write can be
+# made conditional on the task being unchanged since it was read, by
+# filtering on the version that was read. This is done by triggers so that
+# it covers every way of writing, including bulk and raw queries and the
+# admin, and so that a save of a stale instance, which writes the version it
+# read, cannot set the version back. Inserted tasks start at version 1, the
+# column's default.
+POSTGRES_INSTALL_SQL = (
+    "CREATE OR REPLACE FUNCTION todo_task_version() RETURNS trigger AS $$ "
+    "BEGIN "
+    "NEW.version := OLD.version + 1; "
+    "RETURN NEW; "
+    "END; "
+    "$$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE TRIGGER todo_task_version "
+    "BEFORE UPDATE ON todo_task "
+    "FOR EACH ROW EXECUTE FUNCTION todo_task_version()",
+)
+POSTGRES_UNINSTALL_SQL = (
+    "DROP TRIGGER IF EXISTS todo_task_version ON todo_task",
+    "DROP FUNCTION IF EXISTS todo_task_version()",
+)
+# SQLite triggers cannot modify the row being written, so the version is set
+# by an UPDATE after the write. The trigger lists the columns of migration
+# 0006's update trigger, which leaves out change_seq and version, so that
+# neither trigger's UPDATE fires it.
+SQLITE_INSTALL_SQL = (
+    "CREATE TRIGGER IF NOT EXISTS todo_task_version "
+    "AFTER UPDATE OF completed, title, description, due_date, updated_at "
+    "ON todo_task BEGIN "
+    "UPDATE todo_task SET version = old.version + 1 WHERE id = new.id; "
+    "END",
+)
+SQLITE_UNINSTALL_SQL = (
+    "DROP TRIGGER IF EXISTS todo_task_version",
+)
+
+# Adding version may rebuild the table on SQLite, dropping the triggers of
+# migration 0005's search index and migration 0006's change tracking,
+# which are created again as they were there.
+SQLITE_SEARCH_INDEX_SQL = import_module(
+    "todo.migrations.0005_task_search"
+).SQLITE_INSTALL_SQL
+SQLITE_CHANGE_TRACKING_SQL = import_module(
+    "todo.migrations.0006_task_changes"
+).SQLITE_INSTALL_SQL
+
+
+def install(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_INSTALL_SQL,
+        "sqlite": (
+            SQLITE_SEARCH_INDEX_SQL
+            + SQLITE_CHANGE_TRACKING_SQL
+            + SQLITE_INSTALL_SQL
+        ),
+    }.get(schema_editor.connection.vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_UNINSTALL_SQL,
+        "sqlite": SQLITE_UNINSTALL_SQL,
+    }.get(schema_editor.connection.vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0006_task_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(db_default=1, editable=False, help_text='The number of times the task has been written, counting its creation. Set by the database on every write, so that writes can be made conditional on it being unchanged.'),
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+from importlib import import_module
+
+
+# The earlier migrations whose frozen SQL this one reuses.
+CHANGES = import_module("todo.migrations.0006_task_changes")
+
+# Number changes by transaction id on Postgres instead of taking the next
+# number from the counter row, which serialized every write. The counter
+# row's value becomes an offset added to the transaction ids, chosen so
+# that the new numbers continue above those handed out before. See
+# todo.changes. The SQL is frozen here as it was at this migration.
+POSTGRES_FORWARD_SQL = (
+    "UPDATE todo_taskchangecounter "
+    "SET value = GREATEST(value - pg_current_xact_id()::text::bigint + 1, 0) "
+    "WHERE id = 1",
+    "CREATE OR REPLACE FUNCTION todo_task_change() RETURNS trigger AS $$ "
+    "BEGIN "
+    "NEW.change_seq := pg_current_xact_id()::text::bigint "
+    "+ (SELECT value FROM todo_taskchangecounter WHERE id = 1); "
+    "RETURN NEW; "
+    "END; "
+    "$$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE FUNCTION todo_task_tombstone() RETURNS trigger AS $$ "
+    "BEGIN "
+    "INSERT INTO todo_tasktombstone (task_pk, change_seq) "
+    "VALUES (OLD.id, pg_current_xact_id()::text::bigint "
+    "+ (SELECT value FROM todo_taskchangecounter WHERE id = 1)); "
+    "RETURN OLD; "
+    "END; "
+    "$$ LANGUAGE plpgsql",
+)
+# The counter of migration 0006, continuing from the largest number. Going
+# back fails if transactions deleted several tasks, whose tombstones share
+# a number that must be unique again.
+POSTGRES_BACKWARD_SQL = (
+    "UPDATE todo_taskchangecounter SET value = GREATEST("
+    "(SELECT COALESCE(MAX(change_seq), 0) FROM todo_task), "
+    "(SELECT COALESCE(MAX(change_seq), 0) FROM todo_tasktombstone)"
+    ") WHERE id = 1",
+    # The functions todo_task_change() and todo_task_tombstone().
+    *CHANGES.POSTGRES_INSTALL_SQL[:2],
+)
+
+
+# Rebuilding todo_taskchangecounter and todo_tasktombstone, as adding and
+# altering their columns does on SQLite, fails while triggers refer to
+# them, so the change triggers of migration 0006 are dropped for the
+# rebuild and created again after it.
+SQLITE_DROP_TRIGGERS_SQL = CHANGES.SQLITE_UNINSTALL_SQL
+SQLITE_CREATE_TRIGGERS_SQL = CHANGES.SQLITE_INSTALL_SQL
+
+
+def drop_sqlite_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in SQLITE_DROP_TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+def create_sqlite_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in SQLITE_CREATE_TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+def number_by_transaction(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in POSTGRES_FORWARD_SQL:
+        schema_editor.execute(statement)
+
+
+def number_by_counter(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in POSTGRES_BACKWARD_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0008_task_due_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_sqlite_triggers, create_sqlite_triggers),
+        migrations.AddField(
+            model_name='taskchangecounter',
+            name='pruned_seq',
+            field=models.BigIntegerField(default=0, help_text='The largest number of a pruned tombstone. Clients that synced before it must sync again from the start.'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='change_seq',
+            field=models.BigIntegerField(db_default=0, db_index=True, editable=False, help_text="The number of the task's last change, which orders the changes to tasks. Set by the database on every write."),
+        ),
+        migrations.AlterField(
+            model_name='tasktombstone',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, help_text='The number of the deletion among the changes to tasks.'),
+        ),
+        migrations.RunPython(create_sqlite_triggers, drop_sqlite_triggers),
+        migrations.RunPython(number_by_transaction, number_by_counter),
+    ]
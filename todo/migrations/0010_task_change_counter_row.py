@@ -0,0 +1,93 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:05
+
+from django.db import migrations
+
+from importlib import import_module
+
+
+# The earlier migrations whose frozen SQL this one reuses.
+CHANGES = import_module("todo.migrations.0006_task_changes")
+HORIZON = import_module("todo.migrations.0009_task_change_horizon")
+
+# Number changes even when the counter row is missing, as after a flush,
+# which deletes it: on Postgres a missing row is an offset of 0, and on
+# SQLite the first change creates it. The SQL is frozen here as it was at
+# this migration.
+POSTGRES_FORWARD_SQL = (
+    "CREATE OR REPLACE FUNCTION todo_task_change() RETURNS trigger AS $$ "
+    "BEGIN "
+    "NEW.change_seq := pg_current_xact_id()::text::bigint "
+    "+ COALESCE((SELECT value FROM todo_taskchangecounter WHERE id = 1), 0); "
+    "RETURN NEW; "
+    "END; "
+    "$$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE FUNCTION todo_task_tombstone() RETURNS trigger AS $$ "
+    "BEGIN "
+    "INSERT INTO todo_tasktombstone (task_pk, change_seq) "
+    "VALUES (OLD.id, pg_current_xact_id()::text::bigint "
+    "+ COALESCE((SELECT value FROM todo_taskchangecounter WHERE id = 1), 0)); "
+    "RETURN OLD; "
+    "END; "
+    "$$ LANGUAGE plpgsql",
+)
+# The functions of migration 0009.
+POSTGRES_BACKWARD_SQL = HORIZON.POSTGRES_FORWARD_SQL[1:]
+
+SQLITE_DROP_TRIGGERS_SQL = CHANGES.SQLITE_UNINSTALL_SQL
+SQLITE_FORWARD_SQL = SQLITE_DROP_TRIGGERS_SQL + (
+    "CREATE TRIGGER todo_task_change_insert "
+    "AFTER INSERT ON todo_task BEGIN "
+    "INSERT INTO todo_taskchangecounter (id, value, pruned_seq) "
+    "VALUES (1, 1, 0) ON CONFLICT (id) DO UPDATE SET value = value + 1; "
+    "UPDATE todo_task SET change_seq = "
+    "(SELECT value FROM todo_taskchangecounter WHERE id = 1) "
+    "WHERE id = new.id; "
+    "END",
+    "CREATE TRIGGER todo_task_change_update "
+    "AFTER UPDATE OF completed, title, description, due_date, updated_at "
+    "ON todo_task BEGIN "
+    "INSERT INTO todo_taskchangecounter (id, value, pruned_seq) "
+    "VALUES (1, 1, 0) ON CONFLICT (id) DO UPDATE SET value = value + 1; "
+    "UPDATE todo_task SET change_seq = "
+    "(SELECT value FROM todo_taskchangecounter WHERE id = 1) "
+    "WHERE id = new.id; "
+    "END",
+    "CREATE TRIGGER todo_task_tombstone "
+    "AFTER DELETE ON todo_task BEGIN "
+    "INSERT INTO todo_taskchangecounter (id, value, pruned_seq) "
+    "VALUES (1, 1, 0) ON CONFLICT (id) DO UPDATE SET value = value + 1; "
+    "INSERT INTO todo_tasktombstone (task_pk, change_seq) "
+    "SELECT old.id, value FROM todo_taskchangecounter WHERE id = 1; "
+    "END",
+)
+# The triggers of migration 0006.
+SQLITE_BACKWARD_SQL = SQLITE_DROP_TRIGGERS_SQL + CHANGES.SQLITE_INSTALL_SQL
+
+
+def forward(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_FORWARD_SQL,
+        "sqlite": SQLITE_FORWARD_SQL,
+    }.get(schema_editor.connection.vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def backward(apps, schema_editor):
+    statements = {
+        "postgresql": POSTGRES_BACKWARD_SQL,
+        "sqlite": SQLITE_BACKWARD_SQL,
+    }.get(schema_editor.connection.vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0009_task_change_horizon'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
@@ -1,4 +1,25 @@
 from django.db import models
+from django.db.models.functions import Now
+
+from datetime import datetime
+
+
+class TaskQuerySet(models.QuerySet):
+    def for_list(self, *fields: str) -> "TaskQuerySet":
+        """
+        Only load the columns shown in lists of tasks, and any extra fields
+        given, leaving out the potentially long description.
+        """
+        return self.only("title", "completed", *fields)
+
+
+    def pending(self) -> "TaskQuerySet":
+        return self.filter(completed=False)
+
+
+    def overdue(self, now: datetime) -> "TaskQuerySet":
+        """Incomplete tasks that were due before now."""
+        return self.filter(completed=False, due_date__lt=now)
 
 
 class Task(models.Model):
@@ -19,7 +40,100 @@ class Task(models.Model):
         null=True,
         blank=True,
     )
+    updated_at = models.DateTimeField(
+        help_text="The date and time at which the task was last modified.",
+        auto_now=True,
+    )
+    change_seq = models.BigIntegerField(
+        help_text=(
+            "The number of the task's last change, which orders the changes "
+            "to tasks. Set by the database on every write."
+        ),
+        db_default=0,
+        editable=False,
+        db_index=True,
+    )
+
+    version = models.PositiveIntegerField(
+        help_text=(
+            "The number of times the task has been written, counting its "
+            "creation. Set by the database on every write, so that writes "
+            "can be made conditional on it being unchanged."
+        ),
+        db_default=1,
+        editable=False,
+    )
+
+    objects = TaskQuerySet.as_manager()
+
+
+    class Meta:
+        indexes = [
+            # All tasks by due date. The pk follows the due date in this
+            # index and the next ones so that the cursor of a page of tasks
+            # by due date is a single seek in them.
+            models.Index(
+                fields=["due_date", "id"],
+                name="todo_task_due_idx",
+            ),
+            # Filtering by completion and sorting by due date.
+            models.Index(
+                fields=["completed", "due_date", "id"],
+                name="todo_task_completed_due_idx",
+            ),
+            # Pending and overdue tasks by due date. Only incomplete tasks
+            # are indexed, which keeps the index small as tasks are done.
+            models.Index(
+                fields=["due_date", "id"],
+                condition=models.Q(completed=False),
+                name="todo_task_pending_due_idx",
+            ),
+        ]
+        # Case-insensitive title search is served on Postgres by a trigram
+        # index that is created in migration 0004, since it is specific to
+        # Postgres.
 
 
     def __str__(self) -> str:
         return str(self.title)
+
+
+class TaskChangeCounter(models.Model):
+    """
+    The single row holding the last change sequence number handed out to a
+    task write or deletion on SQLite, or on Postgres the offset added to
+    transaction ids to number changes, and the number up to which
+    tombstones have been pruned. See todo.changes.
+    """
+    value = models.BigIntegerField(default=0)
+    pruned_seq = models.BigIntegerField(
+        help_text=(
+            "The largest number of a pruned tombstone. Clients that synced "
+            "before it must sync again from the start."
+        ),
+        default=0,
+    )
+
+
+class TaskTombstone(models.Model):
+    """A record of a deleted task, so that syncing clients can delete it."""
+    # Not unique, since a task imported with the pk of a deleted one can be
+    # deleted again.
+    task_pk = models.BigIntegerField(
+        help_text="The primary key of the deleted task.",
+        db_index=True,
+    )
+    # Not unique either, since on Postgres the deletions made by one
+    # transaction share its number.
+    change_seq = models.BigIntegerField(
+        help_text="The number of the deletion among the changes to tasks.",
+        db_index=True,
+    )
+    deleted_at = models.DateTimeField(
+        help_text="The date and time at which the task was deleted.",
+        db_default=Now(),
+    )
+
+
+    def __str__(self) -> str:
+        return f"Deleted task {self.task_pk}"
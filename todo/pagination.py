@@ -0,0 +1,242 @@
+from django.db.models import BooleanField
+from django.db.models import DateTimeField
+from django.db.models import F
+from django.db.models import Func
+from django.db.models import QuerySet
+from django.db.models import Value
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+
+ORDERINGS: Tuple[str, ...] = ("pk", "due_date")
+
+EPOCH: datetime = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class RowAfter(Func):
+    """
+    The row-value comparison (lhs, ...) > (rhs, ...), which the database can
+    answer with a single range scan of an index on the lhs columns, unlike
+    the equivalent OR of comparisons of each column.
+    """
+    output_field = BooleanField()
+
+
+    def __init__(self, lhs: Sequence[Any], rhs: Sequence[Any]) -> None:
+        if len(lhs) != len(rhs):
+            raise ValueError("Rows of different lengths cannot be compared.")
+        super().__init__(*lhs, *rhs)
+
+
+    def as_sql(
+        self,
+        compiler: Any,
+        connection: Any,
+        **extra_context: Any,
+    ) -> Tuple[str, List[Any]]:
+        sqls: List[str] = []
+        params: List[Any] = []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(expression_params)
+        width: int = len(sqls) // 2
+        return (
+            f"({', '.join(sqls[:width])}) > ({', '.join(sqls[width:])})",
+            params,
+        )
+
+
+def _decode_pk(value: str) -> int:
+    pk: int = int(value)
+    if pk < 0:
+        raise ValueError(value)
+    return pk
+
+
+def decode_cursor(cursor: Optional[str], ordering: str) -> Optional[Tuple]:
+    """
+    Decode a cursor from a query string into the key of the row that the
+    page starts after: (pk,) when ordered by pk and (due_date, pk) when
+    ordered by due date. Returns None for the first page.
+    """
+    if cursor is None or cursor == "":
+        return None
+    try:
+        if ordering == "pk":
+            return (_decode_pk(cursor),)
+        # Due dates are encoded as microseconds since the epoch, which need
+        # no escaping in a URL, and are empty for tasks without one.
+        due_value, pk_value = cursor.split(",")
+        due_date: Optional[datetime] = None
+        if due_value != "":
+            due_date = EPOCH + timedelta(microseconds=int(due_value))
+        return (due_date, _decode_pk(pk_value))
+    except (ValueError, OverflowError):
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+
+
+def _get_value(row: Any, field: str) -> Any:
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+def encode_cursor(row: Any, ordering: str) -> str:
+    """
+    Encode the key of the last row on a page, which is a model instance or a
+    dictionary from QuerySet.values(), as a cursor.
+    """
+    pk: int = _get_value(row, "pk")
+    if ordering == "pk":
+        return str(pk)
+    due_date: Optional[datetime] = _get_value(row, "due_date")
+    due_value: str = ""
+    if due_date is not None:
+        due_value = str((due_date - EPOCH) // timedelta(microseconds=1))
+    return f"{due_value},{pk}"
+
+
+class KeysetPage:
+    """
+    One page of a queryset using keyset (cursor) pagination, ordered by the
+    primary key or by due date (tasks without one last) then primary key.
+
+    Unlike OFFSET pagination, fetching a page costs the same no matter how
+    deep into the table it is, because the database seeks straight to the
+    cursor using an index. Ordered by due date, the tasks with one and those
+    without are fetched separately, each with a seek of its own, so a page
+    that reaches the end of the dated tasks takes a second query. The
+    queryset is only evaluated when the page is first iterated, so an unused
+    page costs no query. The rows must include the pk, and the due date when
+    ordering by due date.
+    """
+    def __init__(
+        self,
+        queryset: QuerySet,
+        *,
+        cursor: Optional[str],
+        page_size: int,
+        ordering: str = "pk",
+    ) -> None:
+        if ordering not in ORDERINGS:
+            raise ValueError(f"Unknown ordering: {ordering!r}")
+        self.queryset: QuerySet = queryset
+        self.ordering: str = ordering
+        self.after: Optional[Tuple] = decode_cursor(cursor, ordering)
+        self.page_size: int = page_size
+        self._rows: Optional[List[Any]] = None
+        self._has_next: bool = False
+
+
+    @staticmethod
+    def order(queryset: QuerySet, ordering: str) -> QuerySet:
+        """Order a queryset for keyset pagination."""
+        if ordering == "pk":
+            return queryset.order_by("pk")
+        return queryset.order_by(F("due_date").asc(nulls_last=True), "pk")
+
+
+    def _segments(self) -> List[QuerySet]:
+        """
+        The querysets of the rows after the cursor, in order, each of which
+        is a seek in an index.
+        """
+        if self.ordering == "pk":
+            queryset: QuerySet = self.queryset.order_by("pk")
+            if self.after is not None:
+                queryset = queryset.filter(pk__gt=self.after[0])
+            return [queryset]
+        dated: QuerySet = self.queryset.filter(
+            due_date__isnull=False,
+        ).order_by("due_date", "pk")
+        undated: QuerySet = self.queryset.filter(
+            due_date__isnull=True,
+        ).order_by("pk")
+        if self.after is None:
+            return [dated, undated]
+        due_date, pk = self.after
+        if due_date is None:
+            return [undated.filter(pk__gt=pk)]
+        return [
+            dated.filter(RowAfter(
+                (F("due_date"), F("pk")),
+                (Value(due_date, output_field=DateTimeField()), Value(pk)),
+            )),
+            undated,
+        ]
+
+
+    def _set_rows(self, rows: List[Any]) -> None:
+        self._has_next = len(rows) > self.page_size
+        self._rows = rows[:self.page_size]
+
+
+    def _fetch(self) -> List[Any]:
+        if self._rows is None:
+            # Fetch one extra row to find out whether there is a next page
+            # without a separate COUNT query.
+            rows: List[Any] = []
+            for segment in self._segments():
+                rows += segment[:self.page_size + 1 - len(rows)]
+                if len(rows) > self.page_size:
+                    break
+            self._set_rows(rows)
+        return self._rows
+
+
+    async def afetch(self) -> List[Any]:
+        """
+        Evaluate the page asynchronously. Async code must call this before
+        using the page, which would otherwise query synchronously.
+        """
+        if self._rows is None:
+            rows: List[Any] = []
+            for segment in self._segments():
+                rows += [
+                    row async for row
+                    in segment[:self.page_size + 1 - len(rows)]
+                ]
+                if len(rows) > self.page_size:
+                    break
+            self._set_rows(rows)
+        return self._rows
+
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._fetch())
+
+
+    def __len__(self) -> int:
+        return len(self._fetch())
+
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+    @property
+    def has_next(self) -> bool:
+        self._fetch()
+        return self._has_next
+
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        """The cursor for the following page, or None on the last page."""
+        rows: List[Any] = self._fetch()
+        if not self._has_next:
+            return None
+        return encode_cursor(rows[-1], self.ordering)
@@ -0,0 +1,420 @@
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest
+from django.http import HttpResponse
+
+from contextvars import ContextVar
+from pathlib import Path
+from types import CodeType
+from types import FrameType
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+import cProfile
+import io
+import json
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+
+# A profile is dumped as files that share a name, which starts with the time
+# so that names sort oldest first: the profile, ending in PROFILE_SUFFIXES,
+# and the SQL that the request issued, ending in SQL_SUFFIX.
+PSTATS_SUFFIX: str = ".pstats"
+SPEEDSCOPE_SUFFIX: str = ".speedscope.json"
+PROFILE_SUFFIXES: Tuple[str, ...] = (PSTATS_SUFFIX, SPEEDSCOPE_SUFFIX)
+SQL_SUFFIX: str = ".sql"
+DUMP_NAME_PATTERN: re.Pattern = re.compile(
+    r"[0-9]{8}T[0-9]{6}-[0-9a-f]{8}-[\w-]+-[0-9]+ms"
+    r"(\.pstats|\.speedscope\.json|\.sql)"
+)
+
+# A frame of a sampled stack: its code and line. The code's function and
+# file names are only looked up when a profile is dumped.
+Frame = Tuple[CodeType, int]
+
+
+class StackSampler:
+    """
+    A statistical profiler shared by the requests of a process. While any
+    request is profiled, a single thread records the stack of every other
+    thread at an interval, and gives each sample to every running profile,
+    rather than each request starting a thread of its own.
+
+    Every thread is sampled, because under ASGI a view runs in a different
+    thread from the one that handles its request. With workers that serve
+    requests concurrently, the samples therefore include other requests.
+    """
+    def __init__(self) -> None:
+        self.thread_names: Dict[int, str] = {}
+        self._profiles: Set["SampledProfile"] = set()
+        self._lock: threading.Lock = threading.Lock()
+        self._running: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+
+    def add(self, profile: "SampledProfile") -> None:
+        with self._lock:
+            self._profiles.add(profile)
+            # Started on first use, and again after a fork, which leaves
+            # the child without the parent's thread.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="todo-stack-sampler",
+                    daemon=True,
+                )
+                self._thread.start()
+            self._running.set()
+
+
+    def remove(self, profile: "SampledProfile") -> None:
+        with self._lock:
+            self._profiles.discard(profile)
+
+
+    def _run(self) -> None:
+        while True:
+            self._running.wait()
+            time.sleep(settings.TODO_PROFILING_INTERVAL)
+            with self._lock:
+                if not self._profiles:
+                    # Sleep until a request is profiled again.
+                    self._running.clear()
+                    continue
+            stacks: Dict[int, Tuple[Frame, ...]] = self._sample()
+            # A profile removed while sampling is not given the sample.
+            with self._lock:
+                for profile in self._profiles:
+                    profile.add_sample(stacks)
+
+
+    def _sample(self) -> Dict[int, Tuple[Frame, ...]]:
+        """The stack of each thread but this one, outermost frame first."""
+        this_ident: int = threading.get_ident()
+        frames: Dict[int, FrameType] = sys._current_frames()
+        stacks: Dict[int, Tuple[Frame, ...]] = {}
+        for ident, frame in frames.items():
+            if ident == this_ident:
+                continue
+            stack: List[Frame] = []
+            current: Optional[FrameType] = frame
+            while current is not None:
+                stack.append((current.f_code, current.f_lineno))
+                current = current.f_back
+            stack.reverse()
+            stacks[ident] = tuple(stack)
+        if frames.keys() - self.thread_names.keys():
+            self.thread_names.update(
+                (thread.ident, thread.name)
+                for thread in threading.enumerate()
+                if thread.ident is not None
+            )
+        return stacks
+
+
+# The sampler of this process.
+sampler: StackSampler = StackSampler()
+
+
+class SampledProfile:
+    """The stacks that the process's sampler recorded while it ran."""
+    def __init__(self, interval: float) -> None:
+        self.interval: float = interval
+        # Stacks of each thread, outermost frame first.
+        self.samples: Dict[int, List[Tuple[Frame, ...]]] = {}
+        self.duration: float = 0.0
+
+
+    def start(self) -> None:
+        self._start: float = time.perf_counter()
+        sampler.add(self)
+
+
+    def stop(self) -> None:
+        sampler.remove(self)
+        self.duration = time.perf_counter() - self._start
+
+
+    def add_sample(self, stacks: Dict[int, Tuple[Frame, ...]]) -> None:
+        for ident, stack in stacks.items():
+            self.samples.setdefault(ident, []).append(stack)
+
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """
+        The samples in speedscope's file format, with a profile for each
+        thread. https://www.speedscope.app/file-format-schema.json
+        """
+        frame_indexes: Dict[Frame, int] = {}
+        profiles: List[Dict[str, Any]] = []
+        for ident, stacks in self.samples.items():
+            samples: List[List[int]] = [
+                [
+                    frame_indexes.setdefault(frame, len(frame_indexes))
+                    for frame in stack
+                ]
+                for stack in stacks
+            ]
+            profiles.append({
+                "type": "sampled",
+                "name": sampler.thread_names.get(ident, str(ident)),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.duration,
+                "samples": samples,
+                "weights": [self.interval] * len(samples),
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "django-to-do-list",
+            "shared": {
+                "frames": [
+                    {
+                        "name": code.co_name,
+                        "file": code.co_filename,
+                        "line": line,
+                    }
+                    for code, line in frame_indexes
+                ],
+            },
+            "profiles": profiles,
+        }
+
+
+class RequestProfile:
+    """A profiler running for a request, and the queries it has made."""
+    def __init__(self) -> None:
+        self.profiler: Any
+        if settings.TODO_PROFILING_PROFILER == "cprofile":
+            self.profiler = cProfile.Profile()
+        else:
+            self.profiler = SampledProfile(settings.TODO_PROFILING_INTERVAL)
+        # Each query's SQL, parameters and seconds.
+        self.queries: List[Tuple[str, Any, float]] = []
+
+
+    def start(self) -> None:
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+
+    def stop(self) -> None:
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+
+
+    def dump(self, directory: Path, stem: str) -> None:
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.dump_stats(directory / f"{stem}{PSTATS_SUFFIX}")
+        else:
+            (directory / f"{stem}{SPEEDSCOPE_SUFFIX}").write_text(
+                json.dumps(self.profiler.to_speedscope(stem))
+            )
+        (directory / f"{stem}{SQL_SUFFIX}").write_text("".join(
+            f"-- {seconds * 1000:.2f} ms, parameters {params!r}\n{sql};\n\n"
+            for sql, params, seconds in self.queries
+        ))
+
+
+# The profile of the request being handled, if it is profiled.
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "current_profile",
+    default=None,
+)
+
+
+def record_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: Dict[str, Any],
+) -> Any:
+    """A database execute wrapper that records the queries of profiles."""
+    profile: Optional[RequestProfile] = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start: float = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append((sql, params, time.perf_counter() - start))
+
+
+def install_query_recorder(
+    connection: BaseDatabaseWrapper,
+    **kwargs: Any,
+) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a random fraction of requests (TODO_PROFILING_SAMPLE_RATE) and
+    every request slower than TODO_PROFILING_SLOW_MS, and dump each profile
+    with the SQL that its request issued to TODO_PROFILING_DIR, keeping the
+    newest TODO_PROFILING_MAX_DUMPS.
+
+    Catching slow requests means profiling every request, and keeping only
+    the slow ones, which is cheap with the default sampler but not with
+    cProfile. Unless settings.TODO_PROFILING is set, the middleware removes
+    itself from the chain.
+    """
+    sync_capable: bool = True
+    async_capable: bool = True
+
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.TODO_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response: Callable = get_response
+        self.is_async: bool = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_recorder)
+        # Connections opened before the middleware was loaded.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+
+    def start_profile(self) -> Tuple[Optional[RequestProfile], bool]:
+        """Start a profile if needed, and return it and whether it is sampled."""
+        sampled: bool = random.random() < settings.TODO_PROFILING_SAMPLE_RATE
+        if not sampled and not settings.TODO_PROFILING_SLOW_MS:
+            return None, False
+        profile: RequestProfile = RequestProfile()
+        try:
+            profile.start()
+        except ValueError:
+            # cProfile is already profiling a concurrent request, and only
+            # one profile can run at a time.
+            return None, False
+        return profile, sampled
+
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.is_async:
+            return self.__acall__(request)
+        profile, sampled = self.start_profile()
+        if profile is None:
+            return self.get_response(request)
+        token = current_profile.set(profile)
+        start: float = time.perf_counter()
+        try:
+            response: HttpResponse = self.get_response(request)
+        finally:
+            profile.stop()
+            current_profile.reset(token)
+        finish_profile(request, profile, sampled, time.perf_counter() - start)
+        return response
+
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        profile, sampled = self.start_profile()
+        if profile is None:
+            return await self.get_response(request)
+        token = current_profile.set(profile)
+        start: float = time.perf_counter()
+        try:
+            response: HttpResponse = await self.get_response(request)
+        finally:
+            profile.stop()
+            current_profile.reset(token)
+        finish_profile(request, profile, sampled, time.perf_counter() - start)
+        return response
+
+
+def finish_profile(
+    request: HttpRequest,
+    profile: RequestProfile,
+    sampled: bool,
+    seconds: float,
+) -> None:
+    """Dump the profile if the request was sampled or slow."""
+    milliseconds: int = int(seconds * 1000)
+    slow_ms: int = settings.TODO_PROFILING_SLOW_MS
+    if not sampled and milliseconds < slow_ms:
+        return
+    view: str = (
+        request.resolver_match.view_name
+        if request.resolver_match is not None
+        else "unmatched"
+    )
+    stem: str = "{}-{}-{}-{}ms".format(
+        time.strftime("%Y%m%dT%H%M%S"),
+        uuid.uuid4().hex[:8],
+        re.sub(r"[^\w-]", "-", view),
+        milliseconds,
+    )
+    directory: Path = get_profile_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile.dump(directory, stem)
+    rotate_dumps(directory, settings.TODO_PROFILING_MAX_DUMPS)
+
+
+def get_profile_directory() -> Path:
+    return Path(settings.TODO_PROFILING_DIR)
+
+
+def list_dumps() -> List[Tuple[str, List[str]]]:
+    """The name and files of each dumped profile, newest first."""
+    directory: Path = get_profile_directory()
+    if not directory.is_dir():
+        return []
+    dumps: Dict[str, List[str]] = {}
+    for path in directory.iterdir():
+        if DUMP_NAME_PATTERN.fullmatch(path.name):
+            stem: str = path.name.split(".", 1)[0]
+            dumps.setdefault(stem, []).append(path.name)
+    return [
+        (stem, sorted(dumps[stem]))
+        for stem in sorted(dumps, reverse=True)
+    ]
+
+
+def rotate_dumps(directory: Path, max_dumps: int) -> None:
+    """Delete all but the newest max_dumps profiles."""
+    for _, names in list_dumps()[max_dumps:]:
+        for name in names:
+            # Another process may be rotating at the same time.
+            (directory / name).unlink(missing_ok=True)
+
+
+def get_dump_path(name: str) -> Optional[Path]:
+    """
+    The path of a dumped file, or None if there is no such file. Only names
+    of dumps are accepted, so that no other file can be read.
+    """
+    if not DUMP_NAME_PATTERN.fullmatch(name):
+        return None
+    path: Path = get_profile_directory() / name
+    return path if path.is_file() else None
+
+
+def format_pstats(path: Path, limit: int = 50) -> str:
+    """The functions of a cProfile dump with the most cumulative time."""
+    stream: io.StringIO = io.StringIO()
+    stats: pstats.Stats = pstats.Stats(str(path), stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return stream.getvalue()
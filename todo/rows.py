@@ -0,0 +1,53 @@
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import SafeString
+from django.utils.safestring import mark_safe
+
+from typing import Iterable
+from typing import Tuple
+import html
+
+
+# The fields of a task that a row of the task list shows, in the order that
+# render_task_rows() takes them. Pass them to QuerySet.values_list().
+ROW_FIELDS: Tuple[str, ...] = ("pk", "title", "completed")
+
+# A pk that is reversed into the task detail URL and replaced, to split the
+# URL around the pk.
+PK_PLACEHOLDER: str = "2147483647"
+
+
+def get_detail_url_parts() -> Tuple[str, str]:
+    """
+    The escaped parts of a task's detail URL before and after its pk. They
+    depend on the script prefix of the current request, so are reversed
+    for each render rather than once.
+    """
+    url: str = reverse("todo:task-detail", args=(PK_PLACEHOLDER,))
+    prefix, suffix = url.split(PK_PLACEHOLDER)
+    return escape(prefix), escape(suffix)
+
+
+def render_task_rows(rows: Iterable[Tuple[int, str, bool]]) -> SafeString:
+    """
+    Render the task-list rows of (pk, title, completed) tuples.
+
+    The output is exactly that of the template todo/task-list-items.html,
+    which is kept as the reference for the markup, but costs about a
+    microsecond per row rather than the tens of microseconds that the
+    template engine spends resolving variables and reversing the URL of
+    each row. Change both together; the tests compare them.
+    """
+    url_prefix, url_suffix = get_detail_url_parts()
+    return mark_safe("".join([
+        f"\n        <li class=\"task-list-item\" data-task-pk=\"{pk}\">\n"
+        "            <input\n"
+        "                type=\"checkbox\"\n"
+        "                class=\"task-list-checkbox\"\n"
+        f"                {'checked' if completed else ''}\n"
+        "            >\n"
+        f"            <a href=\"{url_prefix}{pk}{url_suffix}\">"
+        f"{html.escape(title)}</a>\n"
+        "        </li>\n"
+        for pk, title, completed in rows
+    ]))
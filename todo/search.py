@@ -0,0 +1,118 @@
+from django.db import connection
+from django.db.models import Q
+
+from .models import Task
+
+from contextlib import contextmanager
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+
+# The search index is created by migration 0005 (and again by the migrations
+# that rebuild todo_task on SQLite). On Postgres the search vector is a
+# stored generated column, so it is kept up to date on every write,
+# including bulk and raw ones, and is indexed with GIN. On SQLite, an FTS5
+# index over todo_task, todo_task_fts, is kept up to date by triggers.
+#
+# While tasks are inserted in bulk on SQLite, the insert trigger is dropped
+# and the inserted tasks, those above a pk, are indexed all at once. The
+# trigger is then created again from the definition that SQLite kept of
+# it, so that there is no copy of it here to drift from the migrations'.
+SQLITE_INSERT_TRIGGER: str = "todo_task_fts_insert"
+SQLITE_TRIGGER_SQL: str = (
+    "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = %s"
+)
+SQLITE_INDEX_INSERTED_SQL: str = (
+    "INSERT INTO todo_task_fts(rowid, title, description) "
+    "SELECT id, title, description FROM todo_task WHERE id > %s"
+)
+
+
+@contextmanager
+def defer_sqlite_indexing(cursor: Any, last_pk: int) -> Iterator[None]:
+    """
+    Index the tasks inserted in the block, whose pks must be above last_pk,
+    with one statement at its end instead of one trigger each, which makes
+    bulk inserts several times faster on SQLite.
+
+    Must run in a transaction, which, since triggers are transactional on
+    SQLite, hides the missing trigger from other connections and restores
+    it if the block fails.
+    """
+    cursor.execute(SQLITE_TRIGGER_SQL, [SQLITE_INSERT_TRIGGER])
+    create_trigger_sql: str = cursor.fetchone()[0]
+    cursor.execute(f"DROP TRIGGER {SQLITE_INSERT_TRIGGER}")
+    yield
+    cursor.execute(SQLITE_INDEX_INSERTED_SQL, [last_pk])
+    cursor.execute(create_trigger_sql)
+
+
+def to_fts5_query(query: str) -> str:
+    """
+    Convert search text into an FTS5 query matching rows that contain every
+    word. Each word is quoted so that FTS5 syntax in it is taken literally.
+    """
+    return " ".join(
+        "\"" + word.replace("\"", "\"\"") + "\"" for word in query.split()
+    )
+
+
+def _fetch_rows(sql: str, params: List[Any]) -> List[Tuple]:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search_tasks(
+    query: str,
+    *,
+    page: int,
+    page_size: int,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Search the titles and descriptions of tasks, best matches first.
+
+    Returns one page of results, each with the pk, title and completed status
+    of the task and its rank (higher is better), and whether there is a next
+    page. Databases other than Postgres and SQLite fall back to an unranked
+    substring search.
+    """
+    offset: int = (page - 1) * page_size
+    # Fetch one extra row to find out whether there is a next page.
+    limit: int = page_size + 1
+    rows: List[Tuple]
+    if connection.vendor == "postgresql":
+        rows = _fetch_rows(
+            "SELECT id, title, completed, ts_rank(search_vector, query) "
+            "FROM todo_task, websearch_to_tsquery('english', %s) query "
+            "WHERE search_vector @@ query "
+            "ORDER BY 4 DESC, id LIMIT %s OFFSET %s",
+            [query, limit, offset],
+        )
+    elif connection.vendor == "sqlite":
+        # bm25() is lower for better matches. Title matches weigh more.
+        rows = _fetch_rows(
+            "SELECT t.id, t.title, t.completed, "
+            "-bm25(todo_task_fts, 10.0, 1.0) AS rank "
+            "FROM todo_task_fts JOIN todo_task t ON t.id = todo_task_fts.rowid "
+            "WHERE todo_task_fts MATCH %s "
+            "ORDER BY rank DESC, t.id LIMIT %s OFFSET %s",
+            [to_fts5_query(query), limit, offset],
+        )
+    else:
+        rows = [
+            (*row, 0.0) for row in Task.objects.filter(
+                Q(title__icontains=query) | Q(description__icontains=query)
+            )
+            .order_by("pk")
+            .values_list("pk", "title", "completed")[offset:offset + limit]
+        ]
+
+    results: List[Dict[str, Any]] = [
+        {"pk": pk, "title": title, "completed": bool(completed), "rank": rank}
+        for pk, title, completed, rank in rows[:page_size]
+    ]
+    return results, len(rows) > page_size
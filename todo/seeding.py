@@ -0,0 +1,184 @@
+from django.db import connection
+from django.db.models import Field
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from . import changes
+from . import search
+from .models import Task
+from .transfer import copy_rows
+from .transfer import insert_in_batches
+
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+import random
+
+
+# A generated task's title, completed, due date and description.
+Row = Tuple[str, bool, Optional[datetime], str]
+
+# Words that synthetic tasks are made of. Titles are a verb and an object
+# and numbered, since titles are unique; descriptions are sentences of all
+# of the words.
+VERBS: Tuple[str, ...] = (
+    "Buy", "Call", "Clean", "Email", "Fix", "Pay", "Plan", "Read", "Renew",
+    "Review", "Schedule", "Send", "Update", "Wash", "Write",
+)
+OBJECTS: Tuple[str, ...] = (
+    "the car", "the dentist", "groceries", "the report", "the kitchen",
+    "rent", "the trip", "the invoice", "the contract", "the garden",
+    "the laundry", "the slides", "a birthday card", "the insurance",
+    "the budget",
+)
+WORDS: Tuple[str, ...] = tuple(
+    " ".join(VERBS + OBJECTS).lower().split()
+) + (
+    "before", "after", "and", "with", "for", "about", "check", "again",
+    "remember", "next", "week", "today", "tomorrow", "notes", "first",
+)
+
+# Due dates are spread over this many days either side of the reference
+# time, so that some tasks are overdue.
+DUE_DAYS: int = 60
+
+# Descriptions are drawn from this many generated ones, since generating
+# each would take most of the time of seeding.
+DESCRIPTION_POOL_SIZE: int = 1024
+
+# SQLite's page cache while seeding, in KiB. The default of 2 MiB is too
+# small for the title index once there are a few hundred thousand tasks.
+SQLITE_SEED_CACHE_KIB: int = 256 * 1024
+
+# The columns of generated rows, and the order of the fields in them.
+SEED_FIELDS: Tuple[str, ...] = ("title", "completed", "due_date", "description")
+
+
+def generate_description(rng: random.Random, size: int) -> str:
+    """
+    Sentences of random words, of random length averaging size characters,
+    or nothing if size is 0.
+    """
+    if size <= 0:
+        return ""
+    target: int = rng.randint(0, 2 * size)
+    # Words average about six characters with their spaces.
+    words: List[str] = rng.choices(WORDS, k=max(target // 6, 1))
+    return " ".join(words).capitalize()[:target].rstrip() + "."
+
+
+def generate_rows(
+    count: int,
+    *,
+    seed: int,
+    now: datetime,
+    description_size: int,
+    completed_ratio: float,
+    due_ratio: float,
+) -> Iterator[Row]:
+    """
+    Rows of SEED_FIELDS of tasks titled "<verb> <object> #1" to
+    "#<count>", the same for the same arguments.
+
+    About completed_ratio of them are completed and due_ratio have a due
+    date within DUE_DAYS of now, to the minute.
+    """
+    rng: random.Random = random.Random(seed)
+    descriptions: List[str] = [
+        generate_description(rng, description_size)
+        for _ in range(DESCRIPTION_POOL_SIZE)
+    ]
+    due_minutes: int = DUE_DAYS * 24 * 60
+    for number in range(1, count + 1):
+        due_date: Optional[datetime] = None
+        if rng.random() < due_ratio:
+            due_date = now + timedelta(
+                minutes=rng.randint(-due_minutes, due_minutes),
+            )
+        yield (
+            f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} #{number}",
+            rng.random() < completed_ratio,
+            due_date,
+            rng.choice(descriptions),
+        )
+
+
+def insert_rows(rows: List[Row]) -> None:
+    """
+    Insert rows of SEED_FIELDS, skipping those whose titles exist, with a
+    single prepared statement executed for every row, which skips the
+    compiling of each row's SQL that bulk_create() does and is several times
+    faster. On Postgres, transfer.copy_rows() is faster still.
+    """
+    fields: List[Field] = [Task._meta.get_field(name) for name in SEED_FIELDS]
+    fields.append(Task._meta.get_field("updated_at"))
+    updated_at: Any = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql: str = "{} {} ({}) VALUES ({}) {}".format(
+        connection.ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        connection.ops.quote_name(Task._meta.db_table),
+        ", ".join(connection.ops.quote_name(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+        connection.ops.on_conflict_suffix_sql(
+            fields,
+            OnConflict.IGNORE,
+            None,
+            None,
+        ),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            (
+                title,
+                completed,
+                connection.ops.adapt_datetimefield_value(due_date),
+                description,
+                updated_at,
+            )
+            for title, completed, due_date, description in rows
+        ])
+
+
+def sqlite_insert_rows(rows: List[Row]) -> None:
+    """
+    Like insert_rows(), several times faster on SQLite, where the triggers
+    of each inserted row take most of the time: the batch is indexed for
+    search and numbered as changes all at once instead. Must run in a
+    transaction.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM todo_task")
+        last_pk: int = cursor.fetchone()[0]
+        with (
+            search.defer_sqlite_indexing(cursor, last_pk),
+            changes.defer_sqlite_numbering(cursor, last_pk),
+        ):
+            insert_rows(rows)
+
+
+def seed_tasks(rows: Iterable[Row], *, batch_size: int) -> None:
+    """
+    Insert generated rows a batch at a time, by the fastest means that the
+    database has.
+    """
+    if connection.vendor == "postgresql":
+        insert_in_batches(
+            rows,
+            batch_size,
+            lambda batch: copy_rows(batch, "ignore"),
+        )
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA cache_size")
+            cache_size: int = cursor.fetchone()[0]
+            cursor.execute(f"PRAGMA cache_size = -{SQLITE_SEED_CACHE_KIB}")
+            try:
+                insert_in_batches(rows, batch_size, sqlite_insert_rows)
+            finally:
+                cursor.execute(f"PRAGMA cache_size = {cache_size}")
+    else:
+        insert_in_batches(rows, batch_size, insert_rows)
@@ -0,0 +1,82 @@
+from django.http import HttpResponse
+
+from datetime import date
+from datetime import datetime
+from typing import Any
+from typing import Optional
+from typing import Tuple
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Fields of a task that the JSON API can return.
+TASK_FIELDS: Tuple[str, ...] = (
+    "pk",
+    "title",
+    "completed",
+    "due_date",
+    "description",
+    "updated_at",
+    "version",
+)
+# Fields returned in lists of tasks unless others are requested. The
+# description is left out since it can be long.
+TASK_LIST_FIELDS: Tuple[str, ...] = ("pk", "title", "completed", "due_date")
+
+
+class InvalidFields(ValueError):
+    """Raised when unknown fields are requested."""
+
+
+def parse_fields(
+    value: Optional[str],
+    default: Tuple[str, ...],
+) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated "fields" query parameter into the fields to
+    return, or default when it is absent or empty.
+    """
+    if not value:
+        return default
+    fields: Tuple[str, ...] = tuple(dict.fromkeys(
+        field.strip() for field in value.split(",") if field.strip()
+    ))
+    unknown: Tuple[str, ...] = tuple(
+        field for field in fields if field not in TASK_FIELDS
+    )
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(unknown)}")
+    return fields or default
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Serialize data as compact JSON, using orjson when it is installed since
+    it is several times faster than the standard library. Both give dates in
+    ISO 8601 format.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(
+        data,
+        default=_default,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode()
+
+
+class FastJsonResponse(HttpResponse):
+    """An HttpResponse of data serialized with dumps()."""
+    def __init__(self, data: Any, **kwargs: Any) -> None:
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(dumps(data), **kwargs)
@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .cache import bump_task_list_version
+from .events import publish
+from .events import task_deleted_event
+from .events import task_saved_event
+from .models import Task
+
+from functools import partial
+from typing import Any
+
+
+@receiver(post_save, sender=Task, dispatch_uid="todo.task_saved")
+@receiver(post_delete, sender=Task, dispatch_uid="todo.task_deleted")
+def invalidate_task_list_cache(sender: type, using: str, **kwargs: Any) -> None:
+    # Wait for the commit so that a fragment rendered from the old rows by a
+    # concurrent request cannot be cached under the new version.
+    transaction.on_commit(bump_task_list_version, using=using)
+
+
+@receiver(post_save, sender=Task, dispatch_uid="todo.publish_task_saved")
+def publish_task_saved(
+    sender: type,
+    instance: Task,
+    using: str,
+    **kwargs: Any,
+) -> None:
+    # The event is built now, while the instance has the saved values, but
+    # only sent if they are committed.
+    transaction.on_commit(
+        partial(publish, task_saved_event(instance)),
+        using=using,
+    )
+
+
+@receiver(post_delete, sender=Task, dispatch_uid="todo.publish_task_deleted")
+def publish_task_deleted(
+    sender: type,
+    instance: Task,
+    using: str,
+    **kwargs: Any,
+) -> None:
+    transaction.on_commit(
+        partial(publish, task_deleted_event(instance.pk)),
+        using=using,
+    )
@@ -1,20 +1,34 @@
 "use strict";
 
-function deleteTask(taskPrimaryKey) {
+function deleteTask(taskPrimaryKey, version) {
     const xhr = new XMLHttpRequest();
     xhr.open("POST", "/api/delete-task/" + taskPrimaryKey.toString(), true)
     xhr.setRequestHeader("X-CSRFToken", CSRF_TOKEN);
+    xhr.setRequestHeader(
+        "Content-Type",
+        "application/x-www-form-urlencoded"
+    );
     xhr.onreadystatechange = () => {
-        if (xhr.readyState === XMLHttpRequest.DONE && xhr.status === 200) {
+        if (xhr.readyState !== XMLHttpRequest.DONE) {
+            return;
+        }
+        if (xhr.status === 200) {
             window.location.replace("/")
+        } else if (xhr.status === 409) {
+            // The task was changed since the page was loaded, so it was not
+            // deleted. Show it as it is now.
+            window.location.reload()
         }
     }
-    xhr.send()
+    xhr.send(new URLSearchParams({version: version}).toString())
 }
 
 const deleteButton = document.querySelector(
     "button.task-detail-delete-button"
 );
 deleteButton.addEventListener("click", () => {
-        deleteTask(deleteButton.dataset.taskPk);
+        deleteTask(
+            deleteButton.dataset.taskPk,
+            document.querySelector("input[name=version]").value
+        );
 });
\ No newline at end of file
@@ -1,65 +1,314 @@
 "use strict";
 
-function objectToUrlEncoded(dataObject) {
-    let encoded = "";
-    for (const [key, value] of Object.entries(dataObject)) {
-        encoded += `${key}=${value}&`;
-    }
-    return encoded;
-}
-
-function send_post_request(path, dataObject, doneStatusCode, onDone) {
-    const xhr = new XMLHttpRequest();
-    xhr.open("POST", path, true);
-    xhr.setRequestHeader("Content-Type", "application/x-www-form-urlencoded");
-    xhr.setRequestHeader("X-CSRFToken", CSRF_TOKEN);
-    xhr.onreadystatechange = () => {
-        if (xhr.readyState === XMLHttpRequest.DONE && xhr.status === doneStatusCode) {
-            onDone();
+// Delays before retrying a request that failed with a network or server
+// error. Each is randomized by up to half either way, so that clients that
+// failed together do not all retry together.
+const RETRY_DELAYS_MS = [500, 1000, 2000, 4000, 8000];
+
+function sleep(milliseconds) {
+    return new Promise((resolve) => setTimeout(resolve, milliseconds));
+}
+
+async function postWithRetry(path, body, headers = {}, keepalive = false) {
+    for (let attempt = 0; ; attempt++) {
+        let response = null;
+        try {
+            response = await fetch(path, {
+                method: "POST",
+                headers: { "X-CSRFToken": CSRF_TOKEN, ...headers },
+                body: body,
+                // Lets a request outlive the page.
+                keepalive: keepalive,
+            });
+        } catch (error) {
+            // A network error, which is retried.
+        }
+        if (
+            response !== null
+            && response.status < 500
+            && response.status !== 429
+        ) {
+            // Whether an earlier attempt, which failed, may still have
+            // reached the server.
+            response.retried = attempt > 0;
+            return response;
+        }
+        if (attempt === RETRY_DELAYS_MS.length) {
+            throw new Error(`POST ${path} failed after ${attempt + 1} attempts.`);
+        }
+        await sleep(RETRY_DELAYS_MS[attempt] * (0.5 + Math.random()));
+    }
+}
+
+// The task with a title, or null if there is none. The title is searched
+// for, and the task with that exact title picked out of the matches.
+async function findTaskByTitle(title) {
+    const params = new URLSearchParams({
+        q: title,
+        fields: "pk,title,completed",
+    });
+    for (;;) {
+        const response = await fetch(`/api/tasks?${params}`);
+        if (!response.ok) {
+            throw new Error(`GET /api/tasks failed with ${response.status}.`);
         }
-    };
-    xhr.send(objectToUrlEncoded(dataObject));
+        const page = await response.json();
+        const task = page.results.find((task) => task.title === title);
+        if (task !== undefined) {
+            return task;
+        }
+        if (page.next_cursor === null) {
+            return null;
+        }
+        params.set("cursor", page.next_cursor);
+    }
 }
 
-function createTask(dataObject) {
-    send_post_request(
+async function createTask(title) {
+    // Retrying is safe, because titles are unique: if a request that was
+    // retried had created the task, the retry fails with 400.
+    const response = await postWithRetry(
         "/api/create-task",
-        dataObject,
-        201,
-        () => { window.location.reload(); },
+        new URLSearchParams({ title: title }),
     );
+    let task = null;
+    if (response.status === 201) {
+        task = await response.json();
+    } else if (response.status === 400 && response.retried) {
+        // The task may have been created by the request that was retried,
+        // whose response was lost. Titles are saved without surrounding
+        // whitespace.
+        try {
+            task = await findTaskByTitle(title.trim());
+        } catch (error) {
+            // Whether the task was created is unknown, and the page shows
+            // it if it was.
+            window.location.reload();
+            return;
+        }
+    }
+    if (task === null) {
+        return;
+    }
+    if (taskTitleTextarea.value === title) {
+        taskTitleTextarea.value = "";
+    }
+    // The task may also arrive as an event, before or after this, which
+    // updates the same row.
+    applyTaskSaved(task);
 }
 
+// Changes of checkboxes waiting to be sent, by task pk. Changes made within
+// TOGGLE_DELAY_MS of each other are sent in one request to the batch API,
+// and only the last change of each task is sent.
+const TOGGLE_DELAY_MS = 300;
+const pendingToggles = new Map();
+let toggleTimeout = null;
+
 function editTaskCompleted(taskPrimaryKey, completed) {
-    send_post_request(
-        "/api/edit-task-completed/" + taskPrimaryKey.toString(),
-        { completed: completed },
-        200,
-        () => {},
+    pendingToggles.set(Number(taskPrimaryKey), completed);
+    if (toggleTimeout === null) {
+        toggleTimeout = setTimeout(sendToggles, TOGGLE_DELAY_MS);
+    }
+}
+
+async function sendToggles(keepalive = false) {
+    clearTimeout(toggleTimeout);
+    toggleTimeout = null;
+    if (pendingToggles.size === 0) {
+        return;
+    }
+    const operations = Array.from(
+        pendingToggles,
+        ([pk, completed]) => ({ op: "complete", pk: pk, completed: completed }),
     );
+    pendingToggles.clear();
+    try {
+        const response = await postWithRetry(
+            "/api/tasks/batch",
+            JSON.stringify(operations),
+            { "Content-Type": "application/json" },
+            keepalive,
+        );
+        if (response.ok) {
+            return;
+        }
+    } catch (error) {
+        // Gave up retrying.
+    }
+    if (!keepalive) {
+        // The checkboxes no longer show what is saved.
+        window.location.reload();
+    }
 }
 
+// Send the changes that are still waiting when the page is left.
+window.addEventListener("pagehide", () => sendToggles(true));
+
 const taskTitleTextarea = document.querySelector("textarea.task-title");
 taskTitleTextarea.addEventListener("keyup", ({key}) => {
     if (key === "Enter") {
         if (taskTitleTextarea.value.length > 0) {
-            createTask({ title: taskTitleTextarea.value });
+            createTask(taskTitleTextarea.value);
         }
     }
 });
 const addTaskButton = document.querySelector("#add-task-button");
 addTaskButton.addEventListener("click", () => {
     if (taskTitleTextarea.value.length > 0) {
-        createTask({ title: taskTitleTextarea.value });
+        createTask(taskTitleTextarea.value);
     }
 });
 
-const taskListCheckboxes = document.querySelectorAll("input.task-list-checkbox")
-for (const checkbox of taskListCheckboxes) {
+function addCheckboxListener(checkbox) {
     checkbox.addEventListener("change", () => {
         editTaskCompleted(
             checkbox.parentNode.dataset.taskPk,
             checkbox.checked,
         );
     });
+}
+
+const taskListCheckboxes = document.querySelectorAll("input.task-list-checkbox")
+for (const checkbox of taskListCheckboxes) {
+    addCheckboxListener(checkbox);
+}
+
+// Live updates
+
+const taskListFilters = document.querySelector("#task-list-filters");
+
+function listedStatus() {
+    return taskListFilters.elements["status"].value;
+}
+
+function isOverdue(task) {
+    // A task saved without its due date, as by a checkbox, keeps the due
+    // date that it was listed with, and so is still overdue.
+    if (!("due_date" in task)) {
+        return true;
+    }
+    return task.due_date !== null && new Date(task.due_date) < new Date();
+}
+
+function matchesListedStatus(task) {
+    switch (listedStatus()) {
+        case "pending":
+            return !task.completed;
+        case "completed":
+            return task.completed;
+        case "overdue":
+            return !task.completed && isOverdue(task);
+        default:
+            return true;
+    }
+}
+
+function canAppendNewTasks() {
+    // New tasks have the highest pk, so they belong at the end of the list
+    // when it is unfiltered, ordered by pk and on its last page.
+    return listedStatus() === "all"
+        && taskListFilters.elements["sort"].value === "created"
+        && taskListFilters.elements["q"].value === ""
+        && document.querySelector("#next-page-link") === null;
+}
+
+function findTaskListItem(taskPrimaryKey) {
+    return document.querySelector(
+        `li.task-list-item[data-task-pk="${taskPrimaryKey}"]`
+    );
+}
+
+// The form that holds the list, and the URL of a task's detail page, which
+// it gives with a placeholder in place of the pk.
+const taskListForm = document.querySelector("#add-task-container").parentNode;
+
+function getTaskDetailUrl(taskPrimaryKey) {
+    const { taskDetailUrl, pkPlaceholder } = taskListForm.dataset;
+    return taskDetailUrl.replace(pkPlaceholder, taskPrimaryKey.toString());
+}
+
+function createTaskListItem(task) {
+    const item = document.createElement("li");
+    item.className = "task-list-item";
+    item.dataset.taskPk = task.pk;
+    const checkbox = document.createElement("input");
+    checkbox.type = "checkbox";
+    checkbox.className = "task-list-checkbox";
+    addCheckboxListener(checkbox);
+    const link = document.createElement("a");
+    link.href = getTaskDetailUrl(task.pk);
+    item.append(checkbox, link);
+    return item;
+}
+
+function getTaskListElement() {
+    let list = taskListForm.querySelector("ul");
+    if (list === null) {
+        list = document.createElement("ul");
+        const noTasksMessage = taskListForm.querySelector("p");
+        if (noTasksMessage !== null) {
+            noTasksMessage.replaceWith(list);
+        } else {
+            taskListForm.append(list);
+        }
+    }
+    return list;
+}
+
+function updateTaskListItem(item, task) {
+    if ("title" in task) {
+        item.querySelector("a").textContent = task.title;
+    }
+    if ("completed" in task) {
+        item.querySelector("input.task-list-checkbox").checked = task.completed;
+    }
+}
+
+function applyTaskSaved(task) {
+    let item = findTaskListItem(task.pk);
+    if ("completed" in task && !matchesListedStatus(task)) {
+        if (item !== null) {
+            item.remove();
+        }
+        return;
+    }
+    if (item === null) {
+        // Only whole new tasks can be added, and only where they belong.
+        if (!("title" in task) || !canAppendNewTasks()) {
+            return;
+        }
+        item = createTaskListItem(task);
+        getTaskListElement().append(item);
+    }
+    updateTaskListItem(item, task);
+}
+
+function applyTaskDeleted(task) {
+    const item = findTaskListItem(task.pk);
+    if (item !== null) {
+        item.remove();
+    }
+}
+
+let taskEvents = null;
+if ("EventSource" in window) {
+    taskEvents = new EventSource("/api/tasks/events");
+    taskEvents.addEventListener("saved", (event) => {
+        applyTaskSaved(JSON.parse(event.data).task);
+    });
+    taskEvents.addEventListener("deleted", (event) => {
+        applyTaskDeleted(JSON.parse(event.data).task);
+    });
+    taskEvents.addEventListener("reset", () => {
+        window.location.reload();
+    });
+    let taskEventsOpened = false;
+    taskEvents.addEventListener("open", () => {
+        // Changes made while reconnecting were missed.
+        if (taskEventsOpened) {
+            window.location.reload();
+        }
+        taskEventsOpened = true;
+    });
 }
\ No newline at end of file
@@ -0,0 +1,121 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+
+# Extensions of files worth compressing. Images and fonts are compressed
+# already.
+COMPRESSIBLE_EXTENSIONS: Tuple[str, ...] = (
+    ".css",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".xml",
+)
+
+
+def get_minifiers() -> Dict[str, Callable[[str], str]]:
+    """Minifiers for each extension, for those that are installed."""
+    minifiers: Dict[str, Callable[[str], str]] = {}
+    if rcssmin is not None:
+        minifiers[".css"] = rcssmin.cssmin
+    if rjsmin is not None:
+        minifiers[".js"] = rjsmin.jsmin
+    return minifiers
+
+
+def compress(content: bytes) -> Iterator[Tuple[str, bytes]]:
+    """
+    The suffix and content of each compressed encoding of content, always
+    gzip and also Brotli when it is installed.
+    """
+    # A fixed mtime keeps the output the same for the same input.
+    yield ".gz", gzip.compress(content, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield ".br", brotli.compress(content, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage, which names files by a hash of their
+    content so that they can be cached forever, that also minifies CSS and
+    JavaScript and writes .gz and .br siblings of compressible files for the
+    web server to send as they are.
+
+    Minifying needs the "static" extra (rcssmin and rjsmin), as does Brotli.
+    Without it, files are not minified and only gzip siblings are written.
+    """
+    def post_process(
+        self,
+        paths: Dict[str, Tuple[Any, str]],
+        dry_run: bool = False,
+        **options: Any,
+    ) -> Iterator[Tuple[str, Optional[str], Any]]:
+        if not dry_run:
+            # Minify the collected files before they are hashed, so that the
+            # hashes are of what is served.
+            paths = self.minify(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            # Files with references to others are hashed over several
+            # passes, and only the final names are in the manifest.
+            for hashed_name in set(self.hashed_files.values()):
+                self.write_compressed(hashed_name)
+
+
+    def minify(
+        self,
+        paths: Dict[str, Tuple[Any, str]],
+    ) -> Dict[str, Tuple[Any, str]]:
+        """
+        Minify the collected copies of files, and return paths with the
+        minified ones read from this storage instead of from their source.
+        """
+        minifiers: Dict[str, Callable[[str], str]] = get_minifiers()
+        minified: Dict[str, Tuple[Any, str]] = dict(paths)
+        for name in paths:
+            path: Path = Path(self.path(name))
+            minifier: Optional[Callable[[str], str]] = minifiers.get(
+                path.suffix
+            )
+            # Files named .min. are minified already.
+            if minifier is None or ".min." in path.name:
+                continue
+            path.write_text(minifier(path.read_text(encoding="utf-8")))
+            minified[name] = (self, name)
+        return minified
+
+
+    def write_compressed(self, name: str) -> None:
+        path: Path = Path(self.path(name))
+        if path.suffix not in COMPRESSIBLE_EXTENSIONS:
+            return
+        content: bytes = path.read_bytes()
+        for suffix, compressed in compress(content):
+            # The web server would send the smaller original anyway.
+            if len(compressed) < len(content):
+                path.with_name(path.name + suffix).write_bytes(compressed)
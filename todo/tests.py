@@ -1,17 +1,55 @@
+from asgiref.sync import sync_to_async
 from django.test import TestCase
+from django.test import TransactionTestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db import transaction
+from django.db.models import QuerySet
+from django.conf import settings
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
+from django.contrib.auth.models import User
 
+from django.urls import include
+from django.urls import path
+from django.urls import resolve
 from django.urls import reverse
+from django.template.loader import get_template
 from django.http import HttpResponse
+from django.http import QueryDict
 from django.utils import timezone
 
+from .cache import get_task_list_cache
+from .cache import task_list_cache_stats
+from .changes import get_changes
+from .events import PostgresBroker
+from .events import RESET_EVENT
+from .events import task_deleted_event
+from .metrics import reset_metrics
+from .profiling import list_dumps
+from .rows import PK_PLACEHOLDER
+from .rows import render_task_rows
+from .search import search_tasks
+from . import async_views
+from . import seeding
+from .batch import apply_task_batch
 from .models import Task
+from .models import TaskChangeCounter
+from .models import TaskTombstone
+from .urls import get_urlpatterns
+from .views import iter_task_events
 from .forms import DateTimeLocalInput
 from .forms import TaskForm
 
+from datetime import datetime
+from typing import Any
+from typing import Callable
 from typing import List
 from typing import Sequence
 from typing import Optional
+from typing import Tuple
 
 from bs4 import BeautifulSoup
 from bs4 import Tag
@@ -20,14 +58,83 @@ from bs4 import ResultSet
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 
+from pathlib import Path
+from unittest import mock
+import asyncio
+import gzip
+import io
+import json
+import sys
+import tempfile
+import threading
 import time
 
 
-class ViewTests(TestCase):
+class ViewBudgetMixin:
+    """
+    Assertions that the cost of a request to a view stays within a budget
+    and does not grow with the number of tasks, which catches N+1 queries
+    and accidental loads of the whole table.
+    """
+    # The numbers of other tasks that the request is measured with.
+    budget_task_counts: Tuple[int, ...] = (5, 50)
+
+
+    def assert_within_budget(
+        self,
+        request: Callable[[Task], HttpResponse],
+        *,
+        max_queries: int,
+        max_bytes: int,
+        max_seconds: float = 1.0,
+    ) -> None:
+        """
+        Assert that request(), given a new task with other tasks around it,
+        makes the same number of queries whatever the number of other tasks,
+        at most max_queries, and that its response has at most max_bytes and
+        takes at most max_seconds.
+        """
+        query_counts: List[int] = []
+        for count in self.budget_task_counts:
+            Task.objects.bulk_create(
+                Task(title=f"Other task {i}")
+                for i in range(Task.objects.count(), count)
+            )
+            task: Task = Task.objects.create(title=f"Budget task {count}")
+            # Measure the work of a request that is not cached.
+            get_task_list_cache().clear()
+            with CaptureQueriesContext(connection) as queries:
+                start: float = time.perf_counter()
+                response: HttpResponse = request(task)
+                content: bytes = (
+                    b"".join(response.streaming_content)
+                    if response.streaming else response.content
+                )
+                seconds: float = time.perf_counter() - start
+            self.assertLess(response.status_code, 400)
+            self.assertLessEqual(len(content), max_bytes)
+            self.assertLessEqual(seconds, max_seconds)
+            query_counts.append(len(queries))
+        self.assertEqual(
+            len(set(query_counts)),
+            1,
+            "The number of queries grows with the number of tasks: "
+            f"{dict(zip(self.budget_task_counts, query_counts))}",
+        )
+        self.assertLessEqual(query_counts[0], max_queries)
+
+
+class ViewTests(ViewBudgetMixin, TestCase):
     """Base class for testing views."""
     view_name: str
 
 
+    def setUp(self) -> None:
+        # Rows are rolled back between tests without bumping the task list
+        # version, so cached fragments must not outlive a test.
+        get_task_list_cache().clear()
+
+
     def get_view_response(self, *, path_args: Sequence=()) -> HttpResponse:
         """Get an HttpResponse for a simple GET request to the view."""
         return self.client.get(reverse(self.view_name, args=path_args))
@@ -36,6 +143,33 @@ class ViewTests(TestCase):
 class TaskListViewTests(ViewTests):
     """Tests for the Task List view."""
     view_name = "todo:task-list"
+
+
+    @override_settings(TODO_TASK_LIST_PAGE_SIZE=10)
+    def test_budget(self) -> None:
+        """
+        Test that the paginated task list makes a constant number of
+        queries and that its size is bounded by the page size.
+        """
+        self.assert_within_budget(
+            lambda task: self.get_view_response(),
+            max_queries=2,
+            max_bytes=8_000,
+        )
+
+
+    def test_stream_budget(self) -> None:
+        """
+        Test that the streamed task list makes a constant number of queries.
+        """
+        self.assert_within_budget(
+            lambda task: self.client.get(
+                reverse(self.view_name),
+                {"stream": 1},
+            ),
+            max_queries=2,
+            max_bytes=20_000,
+        )
     
 
     def test_no_tasks(self) -> None:
@@ -45,8 +179,62 @@ class TaskListViewTests(ViewTests):
         response: HttpResponse = self.get_view_response()
         self.assertContains(response, "You have no tasks.")
         self.assertQuerySetEqual(response.context["task_list"], [])
+
+
+    def test_task_detail_url(self) -> None:
+        """
+        Test that the task list gives its script the URL of task detail
+        pages, with the placeholder that stands for a task's pk.
+        """
+        response: HttpResponse = self.get_view_response()
+        self.assertContains(
+            response,
+            "data-task-detail-url=\"{}\"".format(
+                reverse("todo:task-detail", args=(PK_PLACEHOLDER,)),
+            ),
+        )
+        self.assertContains(
+            response,
+            f"data-pk-placeholder=\"{PK_PLACEHOLDER}\"",
+        )
+
+
+    def test_no_context_processors(self) -> None:
+        """
+        Test that the page is rendered without the context processors that
+        only the admin needs, but with the CSRF token.
+        """
+        response: HttpResponse = self.get_view_response()
+        self.assertNotIn("user", response.context)
+        self.assertNotIn("messages", response.context)
+        self.assertIn("csrf_token", response.context)
     
 
+    def test_rows_match_template(self) -> None:
+        """
+        Test that the fast row renderer's output is identical to that of
+        the reference template, including the escaping of titles.
+        """
+        tasks: List[Task] = [
+            Task.objects.create(title="Plain task"),
+            Task.objects.create(
+                title="<b>\"Tom's\" & Jerry's</b>",
+                completed=True,
+            ),
+            Task.objects.create(title="Multi\nline {{ task }}"),
+        ]
+        self.assertEqual(
+            render_task_rows(
+                (task.pk, task.title, task.completed) for task in tasks
+            ),
+            get_template(
+                "todo/task-list-items.html",
+                using="todo",
+            ).render({"task_list": tasks}),
+        )
+        self.assertEqual(render_task_rows([]), "")
+
+
     def test_multiple_tasks(self) -> None:
         """
         Test the view when multiple tasks exist. The view should display the
@@ -79,11 +267,371 @@ class TaskListViewTests(ViewTests):
                 self.assertNotIn("checked", checkbox.attrs)
 
 
+    @override_settings(TODO_TASK_LIST_PAGE_SIZE=2)
+    def test_pagination(self) -> None:
+        """
+        Test that the tasks are split into pages ordered by primary key and
+        that following the "Next page" link from each page visits every task
+        exactly once.
+        """
+        tasks: List[Task] = [
+            Task.objects.create(title=f"Task {i}") for i in range(5)
+        ]
+        seen_pks: List[int] = []
+        path: str = reverse(self.view_name)
+        for _ in range(3):
+            response: HttpResponse = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            seen_pks += [task.pk for task in response.context["task_list"]]
+            soup: BeautifulSoup = BeautifulSoup(response.content, "lxml")
+            next_links: ResultSet = soup.select("a#next-page-link")
+            if not next_links:
+                break
+            path = reverse(self.view_name) + next_links[0]["href"]
+        self.assertEqual(seen_pks, [task.pk for task in tasks])
+
+
+    def test_invalid_cursor(self) -> None:
+        """
+        Test that a 400 Bad Request is returned for a malformed cursor.
+        """
+        response: HttpResponse = self.client.get(
+            reverse(self.view_name),
+            {"cursor": "not-a-cursor"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+    @override_settings(TODO_TASK_LIST_CHUNK_SIZE=2)
+    def test_stream(self) -> None:
+        """
+        Test that the streamed task list contains every task, in order,
+        across several chunks.
+        """
+        tasks: List[Task] = [
+            Task.objects.create(title=f"Task {i}", completed=i % 2 == 0)
+            for i in range(5)
+        ]
+        response = self.client.get(reverse(self.view_name), {"stream": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content: bytes = b"".join(response.streaming_content)
+        soup: BeautifulSoup = BeautifulSoup(content, "lxml")
+        list_items: ResultSet = soup.select("li.task-list-item")
+        self.assertEqual(
+            [int(item["data-task-pk"]) for item in list_items],
+            [task.pk for task in tasks],
+        )
+        for task, item in zip(tasks, list_items):
+            checkbox: Tag = item.select("input.task-list-checkbox")[0]
+            self.assertEqual("checked" in checkbox.attrs, task.completed)
+
+
+    async def test_asgi(self) -> None:
+        """
+        Test that the task list is served under ASGI, both paginated and
+        streamed with an asynchronous iterator.
+        """
+        await Task.objects.acreate(title="Test task")
+        response = await self.async_client.get(reverse(self.view_name))
+        self.assertContains(response, "Test task")
+        self.assertIn("ETag", response.headers)
+
+        response = await self.async_client.get(
+            reverse(self.view_name),
+            {"stream": 1},
+        )
+        self.assertTrue(response.is_async)
+        content: bytes = b"".join(
+            [chunk async for chunk in response.streaming_content]
+        )
+        self.assertIn(b"Test task", content)
+
+
+    def test_only_list_columns_queried(self) -> None:
+        """
+        Test that neither the paginated nor the streamed task list queries
+        the description or due date of the tasks.
+        """
+        Task.objects.create(title="Test task", description="Unused " * 1000)
+        for params in ({}, {"stream": 1}):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(self.view_name), params)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            task_queries: List[str] = [
+                query["sql"] for query in queries.captured_queries
+                if "\"title\"" in query["sql"]
+            ]
+            self.assertEqual(len(task_queries), 1)
+            self.assertNotIn("description", task_queries[0])
+            self.assertNotIn("due_date", task_queries[0])
+
+
+class TaskListFilterTests(ViewTests):
+    """Tests for filtering, sorting and searching the task list."""
+    view_name = "todo:task-list"
+
+
+    def setUp(self) -> None:
+        super().setUp()
+        now = timezone.now()
+        self.done: Task = Task.objects.create(
+            title="Done task",
+            completed=True,
+            due_date=now - timezone.timedelta(days=2),
+        )
+        self.overdue: Task = Task.objects.create(
+            title="Overdue task",
+            due_date=now - timezone.timedelta(days=1),
+        )
+        self.undated: Task = Task.objects.create(title="Undated task")
+        self.upcoming: Task = Task.objects.create(
+            title="Upcoming task",
+            due_date=now + timezone.timedelta(days=1),
+        )
+
+
+    def get_listed_pks(self, params: dict) -> List[int]:
+        response: HttpResponse = self.client.get(
+            reverse(self.view_name),
+            params,
+        )
+        self.assertEqual(response.status_code, 200)
+        return [task.pk for task in response.context["task_list"]]
+
+
+    def test_status(self) -> None:
+        """
+        Test that the status filter lists only the matching tasks.
+        """
+        expected_tasks = {
+            "all": [self.done, self.overdue, self.undated, self.upcoming],
+            "pending": [self.overdue, self.undated, self.upcoming],
+            "completed": [self.done],
+            "overdue": [self.overdue],
+        }
+        for status, tasks in expected_tasks.items():
+            with self.subTest(status=status):
+                self.assertEqual(
+                    self.get_listed_pks({"status": status}),
+                    [task.pk for task in tasks],
+                )
+
+
+    def test_search(self) -> None:
+        """
+        Test that searching lists the tasks whose titles contain the search
+        text, ignoring case.
+        """
+        self.assertEqual(
+            self.get_listed_pks({"q": "DUE"}),
+            [self.overdue.pk],
+        )
+        self.assertEqual(
+            self.get_listed_pks({"q": "e TASK"}),
+            [self.done.pk, self.overdue.pk],
+        )
+
+
+    @override_settings(TODO_TASK_LIST_PAGE_SIZE=1)
+    def test_sort_by_due_date_across_pages(self) -> None:
+        """
+        Test that sorting by due date lists tasks without one last, and that
+        the cursor carries the sort order and filter to the next page.
+        """
+        seen_pks: List[int] = []
+        params: dict = {"status": "pending", "sort": "due"}
+        for _ in range(4):
+            response: HttpResponse = self.client.get(
+                reverse(self.view_name),
+                params,
+            )
+            seen_pks += [task.pk for task in response.context["task_list"]]
+            soup: BeautifulSoup = BeautifulSoup(response.content, "lxml")
+            next_links: ResultSet = soup.select("a#next-page-link")
+            if not next_links:
+                break
+            params = QueryDict(next_links[0]["href"].lstrip("?"))
+        self.assertEqual(
+            seen_pks,
+            [self.overdue.pk, self.upcoming.pk, self.undated.pk],
+        )
+
+
+    def test_invalid_filter(self) -> None:
+        """
+        Test that a 400 Bad Request is returned for an unknown status or
+        sort order.
+        """
+        for params in ({"status": "someday"}, {"sort": "title"}):
+            response: HttpResponse = self.client.get(
+                reverse(self.view_name),
+                params,
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class TaskListCacheTests(ViewTests):
+    """Tests for the task-list fragment cache."""
+    view_name = "todo:task-list"
+
+
+    def test_repeat_request_skips_task_query(self) -> None:
+        """
+        Test that a second request for an unchanged task list is served
+        from the cache without querying the database.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title="Test task")
+        task_list_cache_stats.reset()
+        first_response: HttpResponse = self.get_view_response()
+        with self.assertNumQueries(0):
+            second_response: HttpResponse = self.get_view_response()
+        self.assertContains(second_response, "Test task")
+        self.assertEqual(
+            second_response.context["task_list_html"],
+            first_response.context["task_list_html"],
+        )
+        self.assertEqual(task_list_cache_stats.misses, 1)
+        self.assertEqual(task_list_cache_stats.hits, 1)
+
+
+    def test_task_changes_invalidate_cache(self) -> None:
+        """
+        Test that creating, editing and deleting a task each invalidate the
+        cached task list once the change is committed.
+        """
+        self.assertContains(self.get_view_response(), "You have no tasks.")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task: Task = Task.objects.create(title="Test task")
+        self.assertContains(self.get_view_response(), "Test task")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.title = "Renamed task"
+            task.save()
+        response: HttpResponse = self.get_view_response()
+        self.assertContains(response, "Renamed task")
+        self.assertNotContains(response, "Test task")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertContains(self.get_view_response(), "You have no tasks.")
+
+
+class ConditionalGetTests(ViewTests):
+    """Tests for ETag and Last-Modified revalidation of the HTML views."""
+    def setUp(self) -> None:
+        super().setUp()
+        # The ETags depend on the CSRF cookie, which the first page sets.
+        self.client.get(reverse("todo:task-list"))
+
+
+    def assert_revalidates(
+        self,
+        path: str,
+        last_modified: bool = True,
+    ) -> HttpResponse:
+        """
+        Assert that a GET of path has validators, and that repeating it with
+        the ETag returns a 304 Not Modified without rendering a template.
+        Returns the first response.
+        """
+        response: HttpResponse = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response.headers)
+        self.assertEqual("Last-Modified" in response.headers, last_modified)
+        not_modified: HttpResponse = self.client.get(
+            path,
+            headers={"if-none-match": response.headers["ETag"]},
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.templates, [])
+        self.assertEqual(not_modified.content, b"")
+        return response
+
+
+    def test_task_list(self) -> None:
+        """
+        Test that the task list revalidates while unchanged, and that its
+        ETag changes when a task is created, modified or deleted.
+        """
+        path: str = reverse("todo:task-list")
+        with self.captureOnCommitCallbacks(execute=True):
+            task: Task = Task.objects.create(title="Test task")
+        etags: List[str] = [
+            self.assert_revalidates(path, last_modified=False).headers["ETag"],
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title="Another task")
+        etags.append(
+            self.assert_revalidates(path, last_modified=False).headers["ETag"],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            task.title = "Renamed task"
+            task.save()
+        etags.append(
+            self.assert_revalidates(path, last_modified=False).headers["ETag"],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        etags.append(
+            self.assert_revalidates(path, last_modified=False).headers["ETag"],
+        )
+        self.assertEqual(len(set(etags)), len(etags))
+
+
+    def test_task_list_revalidation_skips_queries(self) -> None:
+        """
+        Test that revalidating the task list does not query the database.
+        """
+        path: str = reverse("todo:task-list")
+        Task.objects.create(title="Test task")
+        etag: str = self.client.get(path).headers["ETag"]
+        with self.assertNumQueries(0):
+            response: HttpResponse = self.client.get(
+                path,
+                headers={"if-none-match": etag},
+            )
+        self.assertEqual(response.status_code, 304)
+
+
+    def test_task_detail(self) -> None:
+        """
+        Test that the task detail page revalidates while unchanged, and that
+        a stale ETag gets the modified page.
+        """
+        task: Task = Task.objects.create(title="Test task")
+        path: str = reverse("todo:task-detail", args=(task.pk,))
+        etag: str = self.assert_revalidates(path).headers["ETag"]
+
+        task.title = "Renamed task"
+        task.save()
+        response: HttpResponse = self.client.get(
+            path,
+            headers={"if-none-match": etag},
+        )
+        self.assertContains(response, "Renamed task")
+
+
 class TaskDetailViewTests(ViewTests):
     """Tests for the Task Detail view."""
     view_name = "todo:task-detail"
 
 
+    def test_budget(self) -> None:
+        """
+        Test that the task detail page makes a constant number of queries.
+        """
+        self.assert_within_budget(
+            lambda task: self.get_view_response(path_args=(task.pk,)),
+            max_queries=2,
+            max_bytes=4_000,
+        )
+
+
     def test_nonexistent_task(self) -> None:
         """
         Test that a 404 Not Found is returned for the detail view of a
@@ -211,6 +759,34 @@ class TaskDetailViewTests(ViewTests):
             self.assertEqual(getattr(task, field_name), original_value)
 
 
+
+    def test_stale_version_conflicts(self) -> None:
+        """
+        Test that a form filled in from a task that has changed since is not
+        saved, and that the response is a 409 showing the task as it is now,
+        while a form of the current version is saved.
+        """
+        task: Task = Task.objects.create(title="Test task")
+        url: str = reverse(self.view_name, args=(task.pk,))
+        Task.objects.filter(pk=task.pk).update(title="Renamed elsewhere")
+        response: HttpResponse = self.client.post(url, {
+            "title": "Renamed here",
+            "version": task.version,
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, "Renamed elsewhere", status_code=409)
+        self.assertContains(response, "was changed", status_code=409)
+        task.refresh_from_db()
+        self.assertEqual(task.title, "Renamed elsewhere")
+
+        response = self.client.post(url, {
+            "title": "Renamed here",
+            "version": task.version,
+        })
+        self.assertEqual(response.status_code, 302)
+        task.refresh_from_db()
+        self.assertEqual(task.title, "Renamed here")
+
 class TaskFormTests(TestCase):
     """Tests for TaskForm."""
     def test_completed_and_incomplete_tasks(self) -> None:
@@ -273,6 +849,20 @@ class CreateTaskViewTests(ViewTests):
     view_name = "todo:create-task"
 
 
+    def test_budget(self) -> None:
+        """
+        Test that creating a task makes a constant number of queries.
+        """
+        self.assert_within_budget(
+            lambda task: self.client.post(
+                reverse(self.view_name),
+                {"title": f"New {task.title}"},
+            ),
+            max_queries=2,
+            max_bytes=100,
+        )
+
+
     def test_get_request_not_allowed(self) -> None:
         """
         Test that the view returns a 405 Method Not Allowed for a GET request.
@@ -298,6 +888,11 @@ class CreateTaskViewTests(ViewTests):
         )
         self.assertEqual(response.status_code, 201)
         self.assertEqual(len(Task.objects.all()), 1)
+        task: Task = Task.objects.get()
+        self.assertEqual(
+            response.json(),
+            {"pk": task.pk, "title": task_title, "completed": True},
+        )
     
 
     def test_invalid_post_request(self) -> None:
@@ -321,6 +916,20 @@ class EditTaskCompletedViewTests(ViewTests):
     view_name = "todo:edit-task-completed"
 
 
+    def test_budget(self) -> None:
+        """
+        Test that completing a task makes a constant number of queries.
+        """
+        self.assert_within_budget(
+            lambda task: self.client.post(
+                reverse(self.view_name, args=(task.pk,)),
+                {"completed": True},
+            ),
+            max_queries=1,
+            max_bytes=0,
+        )
+
+
     def test_get_request_not_allowed(self) -> None:
         """
         Test that the view returns a 405 Method Not Allowed for a GET request.
@@ -369,6 +978,24 @@ class EditTaskCompletedViewTests(ViewTests):
         self.assertTrue(task.completed)
 
 
+    def test_single_query(self) -> None:
+        """
+        Test that the task is updated with a single query and that the
+        update records the modification time.
+        """
+        task: Task = Task.objects.create(title="Test task", completed=False)
+        with self.assertNumQueries(1) as queries:
+            response: HttpResponse = self.client.post(
+                reverse(self.view_name, args=(task.pk,)),
+                { "completed": True },
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries.captured_queries[0]["sql"].startswith("UPDATE"))
+        previous_updated_at = task.updated_at
+        task.refresh_from_db()
+        self.assertGreater(task.updated_at, previous_updated_at)
+
+
     def test_set_task_not_completed(self) -> None:
         """
         Test that a task's completed field is set to False in response
@@ -385,10 +1012,48 @@ class EditTaskCompletedViewTests(ViewTests):
         self.assertFalse(task.completed)
 
 
+
+    def test_stale_version_conflicts(self) -> None:
+        """
+        Test that an update conditional on a version that the task no longer
+        has is not applied, and that the response is a 409 with the task's
+        current fields.
+        """
+        task: Task = Task.objects.create(title="Test task", completed=False)
+        Task.objects.filter(pk=task.pk).update(title="Renamed elsewhere")
+        response: HttpResponse = self.client.post(
+            reverse(self.view_name, args=(task.pk,)),
+            {"completed": True, "version": task.version},
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["title"], "Renamed elsewhere")
+        self.assertEqual(response.json()["version"], task.version + 1)
+        self.assertFalse(Task.objects.get(pk=task.pk).completed)
+
+        response = self.client.post(
+            reverse(self.view_name, args=(task.pk,)),
+            {"completed": True, "version": task.version + 1},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Task.objects.get(pk=task.pk).completed)
+
 class DeleteTaskViewTests(ViewTests):
     view_name = "todo:delete-task"
 
 
+    def test_budget(self) -> None:
+        """
+        Test that deleting a task makes a constant number of queries.
+        """
+        self.assert_within_budget(
+            lambda task: self.client.post(
+                reverse(self.view_name, args=(task.pk,)),
+            ),
+            max_queries=1,
+            max_bytes=0,
+        )
+
+
     def test_get_returns_not_allowed(self) -> None:
         """
         Test that the view returns a 405 Method Not Allowed in
@@ -423,59 +1088,1559 @@ class DeleteTaskViewTests(ViewTests):
         self.assertEqual(len(Task.objects.all()), 0)
 
 
-class SeleniumTests(StaticLiveServerTestCase):
-    """Tests using Selenium."""
-    @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
-        cls.chrome_driver = webdriver.Chrome()
-        cls.chrome_driver.implicitly_wait(5)
+    def test_single_query(self) -> None:
+        """
+        Test that the task is deleted with a single DELETE query.
+        """
+        task: Task = Task.objects.create(title="Test task")
+        with self.assertNumQueries(1) as queries:
+            response: HttpResponse = self.client.post(
+                reverse(self.view_name, args=(task.pk,))
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries.captured_queries[0]["sql"].startswith("DELETE"))
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
 
 
-    @classmethod
-    def tearDownClass(cls):
-        cls.chrome_driver.quit()
-    
 
-    def verify_tasks_listed(self, tasks: List[Task]) -> None:
+    def test_stale_version_conflicts(self) -> None:
         """
-        Verify that a list of tasks is being listed correctly
-        in the current task-list view.
+        Test that a delete conditional on a version that the task no longer
+        has is not applied, and that the response is a 409.
         """
-        for task in tasks:
-            list_item = self.chrome_driver.find_element(
-                By.CSS_SELECTOR,
-                f"li[data-task-pk=\"{task.pk}\"]",
-            )
-            self.assertEqual(
-                list_item.find_element(By.TAG_NAME, "a").text,
-                task.title,
-            )
+        task: Task = Task.objects.create(title="Test task")
+        Task.objects.filter(pk=task.pk).update(completed=True)
+        response: HttpResponse = self.client.post(
+            reverse(self.view_name, args=(task.pk,)),
+            {"version": task.version},
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(Task.objects.filter(pk=task.pk).exists())
 
+class ApiTaskListViewTests(ViewTests):
+    view_name = "todo:api-task-list"
 
-    def test_add_tasks_from_list_view(self) -> None:
+
+    @override_settings(TODO_TASK_LIST_PAGE_SIZE=10)
+    def test_budget(self) -> None:
         """
-        Test that tasks are successfully created and displayed after
-        using the "Add a new task" input from the task-list view.
+        Test that the JSON task list makes a constant number of queries and
+        that its size is bounded by the page size.
         """
-        self.chrome_driver.get(
-            self.live_server_url + reverse("todo:task-list")
+        self.assert_within_budget(
+            lambda task: self.get_view_response(),
+            max_queries=1,
+            max_bytes=2_000,
         )
-        tasks_created: List[str] = []
-        for i in range(5):
-            task_title: str = f"Test task {i}"
-            add_task_input = self.chrome_driver.find_element(
-                By.ID,
-                "add-task-input"
-            )
-            add_task_input.send_keys(task_title, webdriver.Keys.ENTER)
-            # Wait for the task to be added to the database
-            time.sleep(0.2)
-            tasks_created.append(Task.objects.get(title=task_title))
-            self.verify_tasks_listed(tasks_created)
 
 
-    def test_add_tasks_from_list_view_using_button(self) -> None:
+    def test_default_fields(self) -> None:
+        """
+        Test that tasks are listed with every field except the description,
+        which is not queried.
+        """
+        due_date = timezone.make_aware(timezone.datetime(2026, 4, 8, 13, 15))
+        task: Task = Task.objects.create(
+            title="Test task",
+            due_date=due_date,
+            description="Unused",
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response: HttpResponse = self.get_view_response()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "results": [{
+                "pk": task.pk,
+                "title": "Test task",
+                "completed": False,
+                # 13:15 EDT in UTC
+                "due_date": "2026-04-08T17:15:00+00:00",
+            }],
+            "next_cursor": None,
+        })
+        self.assertNotIn("description", queries.captured_queries[0]["sql"])
+
+
+    def test_sparse_fields(self) -> None:
+        """
+        Test that only the fields requested are returned.
+        """
+        Task.objects.create(title="Test task")
+        response: HttpResponse = self.client.get(
+            reverse(self.view_name),
+            {"fields": "title"},
+        )
+        self.assertEqual(response.json()["results"], [{"title": "Test task"}])
+
+
+    @override_settings(TODO_TASK_LIST_PAGE_SIZE=2)
+    def test_pagination_and_filter(self) -> None:
+        """
+        Test that the filter applies and that following the cursors visits
+        every matching task exactly once.
+        """
+        tasks: List[Task] = [
+            Task.objects.create(title=f"Task {i}", completed=i % 2 == 0)
+            for i in range(7)
+        ]
+        seen_pks: List[int] = []
+        params: dict = {"status": "completed", "fields": "pk"}
+        while True:
+            page: dict = self.client.get(reverse(self.view_name), params).json()
+            seen_pks += [result["pk"] for result in page["results"]]
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+        self.assertEqual(
+            seen_pks,
+            [task.pk for task in tasks if task.completed],
+        )
+
+
+    @override_settings(TODO_TASK_LIST_PAGE_SIZE=2)
+    def test_pagination_by_due_date(self) -> None:
+        """
+        Test that following the cursors of every task by due date visits
+        the tasks with one in order, ties by pk, then the tasks without one,
+        each exactly once, including across the page between the two.
+        """
+        now = timezone.now()
+        due_dates: List[Optional[datetime]] = [
+            now, None, now - timezone.timedelta(days=1), now, None, now,
+            None,
+        ]
+        tasks: List[Task] = [
+            Task.objects.create(title=f"Task {i}", due_date=due_date)
+            for i, due_date in enumerate(due_dates)
+        ]
+        seen_pks: List[int] = []
+        params: dict = {"status": "all", "sort": "due", "fields": "pk"}
+        while True:
+            page: dict = self.client.get(reverse(self.view_name), params).json()
+            seen_pks += [result["pk"] for result in page["results"]]
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+        self.assertEqual(seen_pks, [
+            task.pk for task in sorted(
+                tasks,
+                key=lambda task: (
+                    task.due_date is None,
+                    task.due_date or now,
+                    task.pk,
+                ),
+            )
+        ])
+
+
+    def test_invalid_parameters(self) -> None:
+        """
+        Test that unknown fields or an invalid cursor return 400 Bad Request.
+        """
+        for params in ({"fields": "pk,secret"}, {"cursor": "x"}):
+            response: HttpResponse = self.client.get(
+                reverse(self.view_name),
+                params,
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class ApiTaskDetailViewTests(ViewTests):
+    view_name = "todo:api-task-detail"
+
+
+    def test_budget(self) -> None:
+        """
+        Test that the JSON task detail makes a constant number of queries.
+        """
+        self.assert_within_budget(
+            lambda task: self.get_view_response(path_args=(task.pk,)),
+            max_queries=1,
+            max_bytes=500,
+        )
+
+
+    def test_existing_task(self) -> None:
+        """
+        Test that every field of the task is returned by default, and only
+        the requested fields otherwise.
+        """
+        task: Task = Task.objects.create(
+            title="Test task",
+            description="A description",
+        )
+        response: HttpResponse = self.get_view_response(path_args=(task.pk,))
+        self.assertEqual(response.status_code, 200)
+        data: dict = response.json()
+        self.assertEqual(
+            set(data),
+            {
+                "pk",
+                "title",
+                "completed",
+                "due_date",
+                "description",
+                "updated_at",
+                "version",
+            },
+        )
+        self.assertEqual(data["description"], "A description")
+        self.assertIsNone(data["due_date"])
+
+        response = self.client.get(
+            reverse(self.view_name, args=(task.pk,)),
+            {"fields": "completed,title"},
+        )
+        self.assertEqual(
+            response.json(),
+            {"completed": False, "title": "Test task"},
+        )
+
+
+    def test_nonexistent_task(self) -> None:
+        """
+        Test that a 404 Not Found is returned for a nonexistent task.
+        """
+        response: HttpResponse = self.get_view_response(path_args=(1,))
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchTasksViewTests(ViewTests):
+    view_name = "todo:batch-tasks"
+
+
+    def test_budget(self) -> None:
+        """
+        Test that a batch makes a constant number of queries however many
+        tasks there are.
+        """
+        self.assert_within_budget(
+            lambda task: self.client.post(
+                reverse(self.view_name),
+                [
+                    {"op": "create", "title": f"New {task.title}"},
+                    {"op": "complete", "pk": task.pk},
+                    {"op": "delete", "pk": task.pk},
+                ],
+                content_type="application/json",
+            ),
+            max_queries=7,
+            max_bytes=500,
+        )
+
+
+    def post_batch(self, operations: Any) -> HttpResponse:
+        return self.client.post(
+            reverse(self.view_name),
+            operations,
+            content_type="application/json",
+        )
+
+
+    def test_get_request_not_allowed(self) -> None:
+        """
+        Test that the view returns a 405 Method Not Allowed for a GET request.
+        """
+        response: HttpResponse = self.get_view_response()
+        self.assertEqual(response.status_code, 405)
+
+
+    def test_mixed_operations(self) -> None:
+        """
+        Test that create, complete and delete operations are applied in
+        order and that each gets its own result.
+        """
+        to_complete: Task = Task.objects.create(title="Complete me")
+        to_delete: Task = Task.objects.create(title="Delete me")
+        response: HttpResponse = self.post_batch([
+            {"op": "create", "title": "New task"},
+            {"op": "complete", "pk": to_complete.pk},
+            {"op": "delete", "pk": to_delete.pk},
+            {"op": "complete", "pk": to_delete.pk},
+            {"op": "delete", "pk": to_delete.pk + 100},
+        ])
+        self.assertEqual(response.status_code, 200)
+        new_task: Task = Task.objects.get(title="New task")
+        self.assertEqual(response.json()["results"], [
+            {"op": "create", "pk": new_task.pk, "status": 201},
+            {"op": "complete", "pk": to_complete.pk, "status": 200},
+            {"op": "delete", "pk": to_delete.pk, "status": 200},
+            {"op": "complete", "pk": to_delete.pk, "status": 404},
+            {"op": "delete", "pk": to_delete.pk + 100, "status": 404},
+        ])
+        self.assertFalse(new_task.completed)
+        to_complete.refresh_from_db()
+        self.assertTrue(to_complete.completed)
+        self.assertFalse(Task.objects.filter(pk=to_delete.pk).exists())
+
+
+    def test_query_count_independent_of_batch_size(self) -> None:
+        """
+        Test that a batch of many operations takes as many queries as a
+        batch of a few.
+        """
+        def count_queries(size: int) -> int:
+            tasks: List[Task] = Task.objects.bulk_create(
+                Task(title=f"Task {size} {i}") for i in range(2 * size)
+            )
+            operations: List[dict] = []
+            for i in range(size):
+                operations += [
+                    {"op": "create", "title": f"New task {size} {i}"},
+                    {"op": "complete", "pk": tasks[i].pk},
+                    {"op": "delete", "pk": tasks[size + i].pk},
+                ]
+            with CaptureQueriesContext(connection) as queries:
+                response: HttpResponse = self.post_batch(operations)
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        self.assertEqual(count_queries(2), count_queries(20))
+
+
+    def test_invalid_operation_applies_nothing(self) -> None:
+        """
+        Test that no operation in a batch is applied if one is invalid, and
+        that the errors identify the invalid operation.
+        """
+        task: Task = Task.objects.create(title="Test task")
+        response: HttpResponse = self.post_batch([
+            {"op": "create", "title": "New task"},
+            {"op": "delete", "pk": task.pk},
+            {"op": "complete", "pk": "not a pk"},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [error["index"] for error in response.json()["errors"]],
+            [2],
+        )
+        self.assertQuerySetEqual(Task.objects.all(), [task])
+
+
+    def test_duplicate_titles(self) -> None:
+        """
+        Test that a batch creating a task with an existing title, or with a
+        title repeated in the batch, is rejected.
+        """
+        Task.objects.create(title="Test task")
+        for operations in (
+            [{"op": "create", "title": "Test task"}],
+            [
+                {"op": "create", "title": "New task"},
+                {"op": "create", "title": "New task"},
+            ],
+        ):
+            response: HttpResponse = self.post_batch(operations)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.count(), 1)
+
+
+    def test_malformed_body(self) -> None:
+        """
+        Test that a body which is not a JSON array is rejected.
+        """
+        for body in ("not json", "{}"):
+            response: HttpResponse = self.client.post(
+                reverse(self.view_name),
+                body,
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+
+    def test_stale_versions(self) -> None:
+        """
+        Test that operations conditional on a version that their task no
+        longer has are not applied, and get a 409 result with the task's
+        current fields, while the rest of the batch is applied.
+        """
+        stale: Task = Task.objects.create(title="Stale task")
+        current: Task = Task.objects.create(title="Current task")
+        Task.objects.filter(pk=stale.pk).update(title="Renamed elsewhere")
+        response: HttpResponse = self.post_batch([
+            {"op": "complete", "pk": stale.pk, "version": stale.version},
+            {"op": "delete", "pk": stale.pk, "version": stale.version},
+            {"op": "complete", "pk": current.pk, "version": current.version},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results: List[dict] = response.json()["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            [409, 409, 200],
+        )
+        self.assertEqual(results[0]["task"]["title"], "Renamed elsewhere")
+        self.assertEqual(results[1]["task"]["version"], stale.version + 1)
+        stale.refresh_from_db()
+        self.assertFalse(stale.completed)
+        self.assertTrue(Task.objects.get(pk=current.pk).completed)
+
+
+    def test_concurrent_change_applies_nothing(self) -> None:
+        """
+        Test that a batch is rolled back with a 409 if a task changes
+        between the batch checking its version and writing it.
+        """
+        task: Task = Task.objects.create(title="Test task")
+        original_update = QuerySet.update
+
+        def update_after_change(queryset: QuerySet, **kwargs: Any) -> int:
+            original_update(
+                Task.objects.filter(pk=task.pk),
+                title="Renamed elsewhere",
+            )
+            return original_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", update_after_change):
+            response: HttpResponse = self.post_batch([
+                {"op": "create", "title": "New task"},
+                {"op": "complete", "pk": task.pk, "version": task.version},
+            ])
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Task.objects.get(pk=task.pk).completed)
+        self.assertFalse(Task.objects.filter(title="New task").exists())
+
+class TaskSearchViewTests(ViewTests):
+    view_name = "todo:task-search"
+
+
+    @override_settings(TODO_SEARCH_PAGE_SIZE=10)
+    def test_budget(self) -> None:
+        """
+        Test that search makes a constant number of queries and that its
+        size is bounded by the page size.
+        """
+        self.assert_within_budget(
+            lambda task: self.search({"q": "task"}),
+            max_queries=1,
+            max_bytes=2_000,
+        )
+
+
+    def search(self, params: dict) -> HttpResponse:
+        return self.client.get(reverse(self.view_name), params)
+
+
+    def test_ranked_results(self) -> None:
+        """
+        Test that tasks are found by words in their title or description,
+        in any form, and that title matches rank first.
+        """
+        in_description: Task = Task.objects.create(
+            title="Chores",
+            description="Walk the dogs",
+        )
+        in_title: Task = Task.objects.create(title="Walking the dog")
+        Task.objects.create(title="Unrelated", description="Feed the cat")
+        response: HttpResponse = self.search({"q": "dog walk"})
+        self.assertEqual(response.status_code, 200)
+        results: List[dict] = response.json()["results"]
+        self.assertEqual(
+            [result["pk"] for result in results],
+            [in_title.pk, in_description.pk],
+        )
+        self.assertGreater(results[0]["rank"], results[1]["rank"])
+
+
+    def test_index_follows_writes(self) -> None:
+        """
+        Test that the search index reflects edited and deleted tasks.
+        """
+        task: Task = Task.objects.create(title="Buy milk")
+        task.title = "Buy bread"
+        task.save()
+        self.assertEqual(self.search({"q": "milk"}).json()["results"], [])
+        self.assertEqual(
+            len(self.search({"q": "bread"}).json()["results"]),
+            1,
+        )
+        Task.objects.filter(pk=task.pk).delete()
+        self.assertEqual(self.search({"q": "bread"}).json()["results"], [])
+
+
+    @override_settings(TODO_SEARCH_PAGE_SIZE=2)
+    def test_pagination(self) -> None:
+        """
+        Test that results are split into pages.
+        """
+        for i in range(3):
+            Task.objects.create(title=f"Task {i}", description="Shared word")
+        first_page: dict = self.search({"q": "shared"}).json()
+        second_page: dict = self.search({"q": "shared", "page": 2}).json()
+        self.assertEqual(len(first_page["results"]), 2)
+        self.assertTrue(first_page["has_next"])
+        self.assertEqual(len(second_page["results"]), 1)
+        self.assertFalse(second_page["has_next"])
+
+
+    def test_query_syntax_is_literal(self) -> None:
+        """
+        Test that search syntax characters in the query do not cause an
+        error.
+        """
+        response: HttpResponse = self.search({"q": "\"unbalanced OR ( *"})
+        self.assertEqual(response.status_code, 200)
+
+
+    def test_invalid_parameters(self) -> None:
+        """
+        Test that a missing query or an invalid page returns 400 Bad Request.
+        """
+        for params in ({}, {"q": " "}, {"q": "task", "page": 0}):
+            self.assertEqual(self.search(params).status_code, 400)
+
+
+class ApiTaskChangesViewTests(ViewTests):
+    view_name = "todo:api-task-changes"
+
+
+    @override_settings(TODO_CHANGES_PAGE_SIZE=10)
+    def test_budget(self) -> None:
+        """
+        Test that the changes API makes a constant number of queries and
+        that its size is bounded by the page size.
+        """
+        self.assert_within_budget(
+            lambda task: self.client.get(reverse(self.view_name)),
+            max_queries=3,
+            max_bytes=4_000,
+        )
+
+
+    def get_changes(self, params: dict) -> dict:
+        response: HttpResponse = self.client.get(reverse(self.view_name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+
+    def test_changes_since(self) -> None:
+        """
+        Test that only tasks changed since the cursor are returned, in the
+        order of their last change, and that deleted tasks are returned as
+        deleted.
+        """
+        first: Task = Task.objects.create(title="First task")
+        second: Task = Task.objects.create(title="Second task")
+        data: dict = self.get_changes({"fields": "title"})
+        self.assertEqual(
+            [(change["pk"], change["task"]) for change in data["changes"]],
+            [
+                (first.pk, {"title": "First task"}),
+                (second.pk, {"title": "Second task"}),
+            ],
+        )
+        self.assertFalse(data["has_more"])
+
+        Task.objects.filter(pk=first.pk).update(completed=True)
+        second_pk: int = second.pk
+        second.delete()
+        third: Task = Task.objects.create(title="Third task")
+        data = self.get_changes({
+            "since": data["next_since"],
+            "fields": "completed",
+        })
+        self.assertEqual(
+            [
+                (change["pk"], change["deleted"], change["task"])
+                for change in data["changes"]
+            ],
+            [
+                (first.pk, False, {"completed": True}),
+                (second_pk, True, None),
+                (third.pk, False, {"completed": False}),
+            ],
+        )
+        self.assertEqual(
+            self.get_changes({"since": data["next_since"]})["changes"],
+            [],
+        )
+
+
+    @override_settings(TODO_CHANGES_PAGE_SIZE=2)
+    def test_pagination(self) -> None:
+        """
+        Test that following "next_since" while "has_more" is true returns
+        every change exactly once.
+        """
+        tasks: List[Task] = [
+            Task.objects.create(title=f"Task {i}") for i in range(3)
+        ]
+        Task.objects.filter(pk=tasks[0].pk).delete()
+        seen: List[tuple] = []
+        data: dict = {"next_since": 0, "has_more": True}
+        while data["has_more"]:
+            data = self.get_changes({"since": data["next_since"]})
+            seen += [
+                (change["pk"], change["deleted"]) for change in data["changes"]
+            ]
+        self.assertEqual(
+            seen,
+            [(tasks[1].pk, False), (tasks[2].pk, False), (tasks[0].pk, True)],
+        )
+
+
+    def test_reset_after_pruning(self) -> None:
+        """
+        Test that pruning tombstones only removes those past the retention,
+        that a client that synced before a pruned deletion is told to sync
+        again from the start, and that it can then sync normally.
+        """
+        kept: Task = Task.objects.create(title="Kept task")
+        Task.objects.create(title="Old task").delete()
+        stale_since: int = self.get_changes({})["next_since"]
+        Task.objects.create(title="Deleted task").delete()
+        TaskTombstone.objects.filter(
+            change_seq__lte=stale_since,
+        ).update(deleted_at=timezone.now() - timezone.timedelta(days=31))
+        Task.objects.create(title="Newer task").delete()
+        TaskTombstone.objects.filter(
+            change_seq__gt=stale_since,
+        ).update(deleted_at=timezone.now() - timezone.timedelta(days=40))
+        Task.objects.create(title="Recent task").delete()
+
+        call_command("prune_tombstones", days=30, stderr=io.StringIO())
+        self.assertEqual(TaskTombstone.objects.count(), 1)
+        data: dict = self.get_changes({"since": stale_since})
+        self.assertEqual(data, {
+            "reset": True,
+            "changes": [],
+            "next_since": 0,
+            "has_more": True,
+        })
+
+        data = self.get_changes({"since": 0})
+        self.assertFalse(data["reset"])
+        self.assertEqual(
+            [(change["pk"], change["deleted"]) for change in data["changes"]],
+            [
+                (kept.pk, False),
+                (TaskTombstone.objects.get().task_pk, True),
+            ],
+        )
+        self.assertFalse(
+            self.get_changes({"since": data["next_since"]})["reset"],
+        )
+
+
+    def test_invalid_parameters(self) -> None:
+        """
+        Test that an invalid cursor or unknown field returns 400 Bad Request.
+        """
+        for params in ({"since": "x"}, {"since": -1}, {"fields": "secret"}):
+            response: HttpResponse = self.client.get(
+                reverse(self.view_name),
+                params,
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class TaskEventsViewTests(ViewTests):
+    view_name = "todo:task-events"
+
+
+    def test_budget(self) -> None:
+        """
+        Test that the event stream makes no queries.
+        """
+        self.assert_within_budget(
+            lambda task: self.get_view_response(),
+            max_queries=0,
+            max_bytes=0,
+        )
+
+
+    async def next_event(self, events: Any) -> str:
+        """Read the next non-comment chunk of an event stream."""
+        while True:
+            chunk: str = await asyncio.wait_for(anext(events), 5)
+            if not chunk.startswith(":"):
+                return chunk
+
+
+    def post_and_commit(self, path: str, data: Any = None) -> None:
+        """
+        Post to a view and run the on-commit callbacks that publish its
+        events. They must be captured on the main thread's connection, which
+        the view writes through, rather than on the event loop's.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(path, data)
+
+
+    async def test_streams_changes(self) -> None:
+        """
+        Test that edits and deletes made through the API are streamed to
+        subscribers as events.
+        """
+        task: Task = await Task.objects.acreate(title="Test task")
+        response = await self.async_client.get(reverse(self.view_name))
+        self.assertEqual(response.headers["Content-Type"], "text/event-stream")
+        # The test client's wrapping of the response's stream does not close
+        # it, and closing it ends the subscription, so read a stream of its
+        # own.
+        events: Any = iter_task_events()
+        self.assertEqual(await anext(events), ": connected\n\n")
+
+        await sync_to_async(self.post_and_commit)(
+            reverse("todo:edit-task-completed", args=(task.pk,)),
+            {"completed": True},
+        )
+        self.assertEqual(
+            await self.next_event(events),
+            "event: saved\n"
+            f"data: {{\"type\":\"saved\",\"task\":"
+            f"{{\"pk\":{task.pk},\"completed\":true}}}}\n\n",
+        )
+        await sync_to_async(self.post_and_commit)(
+            reverse("todo:delete-task", args=(task.pk,)),
+        )
+        self.assertIn(
+            f"\"task\":{{\"pk\":{task.pk}}}",
+            await self.next_event(events),
+        )
+        await events.aclose()
+
+
+    async def test_malformed_notification(self) -> None:
+        """
+        Test that the Postgres broker's listener turns a notification that it
+        cannot read into a reset event, and goes on delivering the ones after
+        it.
+        """
+        class Connection:
+            async def __aenter__(self) -> "Connection":
+                return self
+
+
+            async def __aexit__(self, *exc_info: Any) -> None:
+                pass
+
+
+            async def execute(self, sql: str) -> None:
+                pass
+
+
+            async def notifies(self) -> Any:
+                yield mock.Mock(payload="{\"type\": ")
+                yield mock.Mock(payload=json.dumps(task_deleted_event(1)))
+                # Stay connected.
+                await asyncio.Event().wait()
+
+        psycopg: mock.Mock = mock.Mock()
+        psycopg.AsyncConnection.connect = mock.AsyncMock(
+            return_value=Connection(),
+        )
+        broker: PostgresBroker = PostgresBroker()
+        with (
+            mock.patch.dict(sys.modules, {"psycopg": psycopg}),
+            self.assertLogs("todo.events", "ERROR"),
+        ):
+            async with broker.subscribe() as subscription:
+                self.assertEqual(
+                    await asyncio.wait_for(subscription.get(), 5),
+                    RESET_EVENT,
+                )
+                self.assertEqual(
+                    await asyncio.wait_for(subscription.get(), 5),
+                    task_deleted_event(1),
+                )
+        broker._listener.cancel()
+
+
+    def test_saves_published_on_commit(self) -> None:
+        """
+        Test that saving a task publishes its listed fields once the change
+        is committed, and that batch creates publish too.
+        """
+        published: List[dict] = []
+        with mock.patch("todo.events.get_broker") as get_broker:
+            get_broker.return_value.publish = published.append
+            with self.captureOnCommitCallbacks() as callbacks:
+                task: Task = Task.objects.create(title="Test task")
+            self.assertEqual(published, [])
+            for callback in callbacks:
+                callback()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    reverse("todo:batch-tasks"),
+                    [{"op": "create", "title": "Batch task"}],
+                    content_type="application/json",
+                )
+        self.assertEqual(published[0], {"type": "saved", "task": {
+            "pk": task.pk,
+            "title": "Test task",
+            "completed": False,
+            "due_date": None,
+        }})
+        self.assertEqual(published[-1]["task"]["title"], "Batch task")
+
+
+    def test_wsgi_returns_no_content(self) -> None:
+        """
+        Test that the stream is not served under WSGI, where it would hold a
+        worker, and that 204 No Content is returned instead.
+        """
+        self.assertEqual(self.get_view_response().status_code, 204)
+
+
+METRICS_SETTINGS: dict = {
+    "TODO_METRICS": True,
+    "TODO_METRICS_TOKEN": "metrics-token",
+    "TEMPLATES": [
+        {**engine, "BACKEND": "todo.metrics.InstrumentedDjangoTemplates"}
+        for engine in settings.TEMPLATES
+    ],
+}
+
+
+@override_settings(**METRICS_SETTINGS)
+class MetricsViewTests(ViewTests):
+    view_name = "todo:metrics"
+
+
+    def setUp(self) -> None:
+        super().setUp()
+        reset_metrics()
+        task_list_cache_stats.reset()
+
+
+    def test_budget(self) -> None:
+        """
+        Test that the metrics make no queries.
+        """
+        self.assert_within_budget(
+            lambda task: self.get_view_response(),
+            max_queries=0,
+            max_bytes=20_000,
+        )
+
+
+    def get_view_response(self, *, path_args: Sequence=()) -> HttpResponse:
+        """Get the metrics with the token."""
+        return self.client.get(
+            reverse(self.view_name, args=path_args),
+            headers={"authorization": "Bearer metrics-token"},
+        )
+
+
+    def get_metrics(self) -> List[str]:
+        response: HttpResponse = self.get_view_response()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["Content-Type"].startswith(
+            "text/plain; version=0.0.4"
+        ))
+        return response.content.decode().splitlines()
+
+
+    def test_records_requests(self) -> None:
+        """
+        Test that requests are counted by view, and that their queries,
+        template rendering and response size are recorded.
+        """
+        Task.objects.create(title="Test task")
+        self.client.get(reverse("todo:task-list"))
+        self.client.get(reverse("todo:task-list"))
+        lines: List[str] = self.get_metrics()
+        self.assertIn(
+            'todo_requests_total{view="todo:task-list",method="GET",'
+            'status="200"} 2',
+            lines,
+        )
+        self.assertIn(
+            'todo_request_duration_seconds_count{view="todo:task-list",'
+            'method="GET"} 2',
+            lines,
+        )
+        # The first request queries the page, and the second is served from
+        # the cache without a query.
+        self.assertIn(
+            'todo_request_db_queries_bucket{view="todo:task-list",le="0"} 1',
+            lines,
+        )
+        self.assertIn(
+            'todo_request_db_queries_count{view="todo:task-list"} 2',
+            lines,
+        )
+        template_sum: str = next(
+            line for line in lines
+            if line.startswith(
+                'todo_request_template_duration_seconds_sum'
+                '{view="todo:task-list"}'
+            )
+        )
+        self.assertGreater(float(template_sum.split()[-1]), 0)
+        self.assertIn(
+            'todo_response_size_bytes_count{view="todo:task-list"} 2',
+            lines,
+        )
+        self.assertIn("todo_task_list_cache_hits_total 1", lines)
+        self.assertIn("todo_task_list_cache_misses_total 1", lines)
+        self.assertIn("todo_task_list_cache_hit_ratio 0.5", lines)
+
+
+    def test_unmatched_paths(self) -> None:
+        """
+        Test that requests that match no view share one label.
+        """
+        self.client.get("/no/such/path")
+        self.assertIn(
+            'todo_requests_total{view="unmatched",method="GET",status="404"} 1',
+            self.get_metrics(),
+        )
+
+
+    def test_requires_token(self) -> None:
+        """
+        Test that the metrics are refused without the token, with another
+        token, and to every request when no token is set.
+        """
+        path: str = reverse(self.view_name)
+        for headers in ({}, {"authorization": "Bearer wrong-token"}):
+            response: HttpResponse = self.client.get(path, headers=headers)
+            self.assertEqual(response.status_code, 403)
+            self.assertNotIn(b"todo_requests_total", response.content)
+        with self.settings(TODO_METRICS_TOKEN=""):
+            self.assertEqual(self.get_view_response().status_code, 403)
+
+
+    @override_settings(TODO_METRICS=False)
+    def test_disabled(self) -> None:
+        """
+        Test that nothing is recorded or served when metrics are disabled.
+        """
+        self.client.get(reverse("todo:task-list"))
+        self.assertEqual(self.get_view_response().status_code, 404)
+        with self.settings(TODO_METRICS=True):
+            lines: List[str] = self.get_metrics()
+        self.assertFalse(any(
+            line.startswith("todo_requests_total{") for line in lines
+        ))
+
+
+class ProfileViewTests(ViewTests):
+    view_name = "todo:profile-list"
+
+
+    def setUp(self) -> None:
+        super().setUp()
+        directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            TODO_PROFILING=True,
+            TODO_PROFILING_DIR=directory.name,
+            TODO_PROFILING_SAMPLE_RATE=1.0,
+            TODO_PROFILING_SLOW_MS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff: User = User.objects.create(username="staff", is_staff=True)
+
+
+    def test_budget(self) -> None:
+        """
+        Test that listing profiles makes a constant number of queries.
+        """
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            lambda task: self.get_view_response(),
+            max_queries=2,
+            max_bytes=10_000,
+        )
+
+
+    def test_file_budget(self) -> None:
+        """
+        Test that reading a dumped profile makes a constant number of
+        queries.
+        """
+        self.client.get(reverse("todo:api-task-list"))
+        name, files = list_dumps()[0]
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            lambda task: self.client.get(
+                reverse("todo:profile-file", args=(f"{name}.speedscope.json",)),
+            ),
+            max_queries=2,
+            max_bytes=10_000,
+        )
+
+
+    def test_sampled_requests_dumped(self) -> None:
+        """
+        Test that a sampled request's stack samples and SQL are dumped, and
+        that staff can read them.
+        """
+        task: Task = Task.objects.create(title="Test task")
+        self.client.get(reverse("todo:task-detail", args=(task.pk,)))
+        dumps: List[Tuple[str, List[str]]] = list_dumps()
+        self.assertEqual(len(dumps), 1)
+        name, files = dumps[0]
+        self.assertIn("-todo-task-detail-", name)
+        self.assertEqual(
+            files,
+            [f"{name}.speedscope.json", f"{name}.sql"],
+        )
+
+        self.client.force_login(self.staff)
+        response: HttpResponse = self.get_view_response()
+        self.assertContains(response, f"{name}.speedscope.json")
+        response = self.client.get(
+            reverse("todo:profile-file", args=(f"{name}.speedscope.json",)),
+        )
+        profile: dict = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(profile["profiles"][0]["type"], "sampled")
+        response = self.client.get(
+            reverse("todo:profile-file", args=(f"{name}.sql",)),
+        )
+        self.assertIn(b"todo_task", b"".join(response.streaming_content))
+
+
+    @override_settings(TODO_PROFILING_PROFILER="cprofile")
+    def test_cprofile(self) -> None:
+        """
+        Test that cProfile dumps are shown as a summary of the slowest
+        functions.
+        """
+        self.client.get(reverse("todo:api-task-list"))
+        name, files = list_dumps()[0]
+        self.assertIn(f"{name}.pstats", files)
+        self.client.force_login(self.staff)
+        response: HttpResponse = self.client.get(
+            reverse("todo:profile-file", args=(f"{name}.pstats",)),
+        )
+        self.assertContains(response, "Ordered by: cumulative time")
+
+
+    @override_settings(
+        TODO_PROFILING_SAMPLE_RATE=0.0,
+        TODO_PROFILING_SLOW_MS=10,
+    )
+    def test_slow_requests_dumped(self) -> None:
+        """
+        Test that requests are only dumped when they are slower than the
+        threshold, unless sampled.
+        """
+        self.client.get(reverse("todo:api-task-list"))
+        self.assertEqual(list_dumps(), [])
+
+        def render_slowly(*args: Any) -> str:
+            time.sleep(0.02)
+            return ""
+
+        with mock.patch("todo.views.get_or_render_fragment", render_slowly):
+            self.client.get(reverse("todo:task-list"))
+        self.assertEqual(len(list_dumps()), 1)
+
+
+    def test_one_sampler_thread(self) -> None:
+        """
+        Test that the profiles of requests share one sampler thread, which
+        outlives them.
+        """
+        for _ in range(3):
+            self.client.get(reverse("todo:api-task-list"))
+        self.assertEqual(len(list_dumps()), 3)
+        self.assertEqual(
+            sum(
+                thread.name == "todo-stack-sampler"
+                for thread in threading.enumerate()
+            ),
+            1,
+        )
+
+
+    @override_settings(TODO_PROFILING_MAX_DUMPS=2)
+    def test_rotation(self) -> None:
+        """
+        Test that only the newest dumps are kept.
+        """
+        for _ in range(3):
+            self.client.get(reverse("todo:api-task-list"))
+        self.assertEqual(len(list_dumps()), 2)
+
+
+    def test_staff_only(self) -> None:
+        """
+        Test that profiles are only shown to staff, and that only the files
+        of dumps can be read.
+        """
+        self.client.get(reverse("todo:api-task-list"))
+        name, files = list_dumps()[0]
+        self.assertEqual(self.get_view_response().status_code, 302)
+        self.assertEqual(
+            self.client.get(
+                reverse("todo:profile-file", args=(files[0],)),
+            ).status_code,
+            302,
+        )
+        self.client.force_login(self.staff)
+        self.assertEqual(
+            self.client.get(
+                reverse("todo:profile-file", args=("settings.py",)),
+            ).status_code,
+            404,
+        )
+
+
+# A URLconf routing to the async views, as todo.urls does under ASGI, under
+# which the tests of the task views are run again.
+urlpatterns = [
+    path("", include((get_urlpatterns(async_views), "todo"))),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncTaskListViewTests(TaskListViewTests):
+    """TaskListViewTests, against the async views."""
+    def test_async_view(self) -> None:
+        """
+        Test that these tests request the async view.
+        """
+        self.assertIs(
+            resolve(reverse(self.view_name)).func,
+            async_views.task_list,
+        )
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncTaskListFilterTests(TaskListFilterTests):
+    """TaskListFilterTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncTaskListCacheTests(TaskListCacheTests):
+    """TaskListCacheTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncConditionalGetTests(ConditionalGetTests):
+    """ConditionalGetTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncTaskDetailViewTests(TaskDetailViewTests):
+    """TaskDetailViewTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncCreateTaskViewTests(CreateTaskViewTests):
+    """CreateTaskViewTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncEditTaskCompletedViewTests(EditTaskCompletedViewTests):
+    """EditTaskCompletedViewTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncDeleteTaskViewTests(DeleteTaskViewTests):
+    """DeleteTaskViewTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncApiTaskListViewTests(ApiTaskListViewTests):
+    """ApiTaskListViewTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncApiTaskDetailViewTests(ApiTaskDetailViewTests):
+    """ApiTaskDetailViewTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncTaskSearchViewTests(TaskSearchViewTests):
+    """TaskSearchViewTests, against the async views."""
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncApiTaskChangesViewTests(ApiTaskChangesViewTests):
+    """ApiTaskChangesViewTests, against the async views."""
+
+
+class StaticFilesStorageTests(TestCase):
+    def collectstatic(self) -> Path:
+        """Collect static files with the production storage."""
+        directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with self.settings(
+            STATIC_ROOT=directory.name,
+            STORAGES={
+                **settings.STORAGES,
+                "staticfiles": {
+                    "BACKEND": "todo.storage.CompressedManifestStaticFilesStorage",
+                },
+            },
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+        return Path(directory.name)
+
+
+    def get_hashed_path(self, root: Path, name: str) -> Path:
+        manifest: dict = json.loads((root / "staticfiles.json").read_text())
+        return root / manifest["paths"][name]
+
+
+    def test_hashed_and_compressed(self) -> None:
+        """
+        Test that static files are named by a hash of their content and have
+        gzip siblings with the same content.
+        """
+        root: Path = self.collectstatic()
+        path: Path = self.get_hashed_path(root, "todo/styles.css")
+        self.assertRegex(path.name, r"^styles\.[0-9a-f]{12}\.css$")
+        self.assertEqual(
+            gzip.decompress(path.with_name(path.name + ".gz").read_bytes()),
+            path.read_bytes(),
+        )
+
+
+    def test_minified_before_hashing(self) -> None:
+        """
+        Test that files are minified when a minifier is installed, and that
+        the hash is of the minified content.
+        """
+        with mock.patch(
+            "todo.storage.get_minifiers",
+            return_value={".js": lambda script: "minified();"},
+        ):
+            root: Path = self.collectstatic()
+        path: Path = self.get_hashed_path(root, "todo/task-list.js")
+        self.assertEqual(path.read_text(), "minified();")
+        # Too short for compressing to make it smaller.
+        self.assertFalse(path.with_name(path.name + ".gz").exists())
+        # Files from other apps that are minified already are left alone.
+        self.assertNotEqual(
+            self.get_hashed_path(root, "admin/js/vendor/jquery/jquery.min.js")
+            .read_text(),
+            "minified();",
+        )
+
+
+class TransferCommandTests(TestCase):
+    def export_tasks(self, *args: str) -> str:
+        stdout: io.StringIO = io.StringIO()
+        call_command("export_tasks", *args, stdout=stdout, stderr=io.StringIO())
+        return stdout.getvalue()
+
+
+    def import_tasks(self, content: str, suffix: str, *args: str) -> None:
+        directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path: Path = Path(directory.name) / f"tasks{suffix}"
+        path.write_text(content, encoding="utf-8")
+        call_command("import_tasks", str(path), *args, stderr=io.StringIO())
+
+
+    def create_tasks(self) -> List[Tuple[Any, ...]]:
+        Task.objects.create(
+            title="Task, with \"quotes\"",
+            description="First line\nsecond line",
+            due_date=timezone.now().replace(microsecond=0),
+        )
+        Task.objects.create(title="Task 2", completed=True)
+        return list(
+            Task.objects.order_by("pk")
+            .values_list("title", "completed", "due_date", "description")
+        )
+
+
+    def test_round_trip(self) -> None:
+        """
+        Test that tasks exported as JSON Lines or CSV are imported the same,
+        in batches.
+        """
+        for format in ("jsonl", "csv"):
+            with self.subTest(format=format):
+                tasks: List[Tuple[Any, ...]] = self.create_tasks()
+                content: str = self.export_tasks(
+                    "--format", format, "--batch-size", "1",
+                )
+                Task.objects.all().delete()
+                self.import_tasks(content, f".{format}", "--batch-size", "1")
+                self.assertEqual(
+                    list(
+                        Task.objects.order_by("pk").values_list(
+                            "title", "completed", "due_date", "description",
+                        )
+                    ),
+                    tasks,
+                )
+                Task.objects.all().delete()
+
+
+    def test_export_progress(self) -> None:
+        """Test that the export reports its progress."""
+        self.create_tasks()
+        stderr: io.StringIO = io.StringIO()
+        call_command("export_tasks", stdout=io.StringIO(), stderr=stderr)
+        self.assertIn("Exported 2 of 2 tasks", stderr.getvalue())
+
+
+    def test_on_conflict(self) -> None:
+        """
+        Test that imported tasks with the title of an existing task are
+        ignored by default and update it with --on-conflict update.
+        """
+        Task.objects.create(title="Task 1")
+        content: str = (
+            '{"title": "Task 1", "completed": true}\n'
+            '{"title": "Task 2"}\n'
+        )
+        self.import_tasks(content, ".jsonl")
+        self.assertFalse(Task.objects.get(title="Task 1").completed)
+        self.assertEqual(Task.objects.count(), 2)
+        self.import_tasks(content, ".jsonl", "--on-conflict", "update")
+        self.assertTrue(Task.objects.get(title="Task 1").completed)
+        self.assertEqual(Task.objects.count(), 2)
+
+
+    def test_invalid_row(self) -> None:
+        """
+        Test that an invalid row stops the import with an error naming it,
+        keeping the batches before it.
+        """
+        content: str = (
+            '{"title": "Task 1"}\n'
+            '{"title": "Task 2", "completed": "maybe"}\n'
+        )
+        with self.assertRaisesMessage(CommandError, "Row 2: completed"):
+            self.import_tasks(content, ".jsonl", "--batch-size", "1")
+        self.assertQuerySetEqual(
+            Task.objects.values_list("title", flat=True),
+            ["Task 1"],
+        )
+
+
+class SeedTasksCommandTests(TestCase):
+    def seed_tasks(self, *args: str) -> List[Tuple[Any, ...]]:
+        call_command("seed_tasks", *args, stderr=io.StringIO())
+        return list(
+            Task.objects.order_by("pk")
+            .values_list("title", "completed", "due_date", "description")
+        )
+
+
+    def test_deterministic(self) -> None:
+        """Test that the same seed gives the same tasks, and others do not."""
+        tasks: List[Tuple[Any, ...]] = self.seed_tasks("--count", "50")
+        self.assertEqual(len(tasks), 50)
+        Task.objects.all().delete()
+        self.assertEqual(self.seed_tasks("--count", "50"), tasks)
+        Task.objects.all().delete()
+        self.assertNotEqual(
+            self.seed_tasks("--count", "50", "--seed", "1"),
+            tasks,
+        )
+
+
+    def test_options(self) -> None:
+        """
+        Test that the ratio of completed tasks and the size of descriptions
+        follow the options.
+        """
+        tasks: List[Tuple[Any, ...]] = self.seed_tasks(
+            "--count", "1000",
+            "--completed-ratio", "0.25",
+            "--due-ratio", "0",
+            "--description-size", "100",
+        )
+        completed: int = sum(task[1] for task in tasks)
+        self.assertAlmostEqual(completed / len(tasks), 0.25, delta=0.05)
+        self.assertTrue(all(task[2] is None for task in tasks))
+        self.assertAlmostEqual(
+            sum(len(task[3]) for task in tasks) / len(tasks),
+            100,
+            delta=15,
+        )
+
+
+    def test_reseed(self) -> None:
+        """
+        Test that seeding again with the same seed adds only the tasks that
+        are missing.
+        """
+        self.seed_tasks("--count", "20", "--batch-size", "7")
+        self.assertEqual(len(self.seed_tasks("--count", "30")), 30)
+
+
+    def test_tracked(self) -> None:
+        """
+        Test that seeded tasks are numbered as changes and searchable, like
+        tasks that are created one at a time, and that tasks created after
+        them still are.
+        """
+        Task.objects.create(title="Before", description="Walk the dogs")
+        self.seed_tasks("--count", "20", "--batch-size", "7")
+        Task.objects.create(title="After", description="Walk the dogs")
+        self.assertEqual(
+            list(
+                Task.objects.order_by("pk")
+                .values_list("change_seq", flat=True)
+            ),
+            list(range(1, 23)),
+        )
+        seeded: Task = Task.objects.order_by("pk")[5]
+        results, _ = search_tasks(seeded.title, page=1, page_size=100)
+        self.assertIn(seeded.pk, [result["pk"] for result in results])
+        results, _ = search_tasks("dogs", page=1, page_size=100)
+        self.assertEqual(len(results), 2)
+
+
+    def test_matches_normal_insert(self) -> None:
+        """
+        Test that tasks seeded with the insert triggers deferred end up
+        numbered, counted and searchable exactly as the same rows inserted
+        with the triggers, and that the triggers are back afterwards.
+        """
+        rows: List[seeding.Row] = list(seeding.generate_rows(
+            20,
+            seed=0,
+            now=timezone.now(),
+            description_size=40,
+            completed_ratio=0.5,
+            due_ratio=0.5,
+        ))
+
+        def insert_and_describe(insert: Callable[[list], None]) -> tuple:
+            Task.objects.create(title="Before", description="Walk the dogs")
+            with transaction.atomic():
+                insert(rows[:7])
+            with transaction.atomic():
+                insert(rows[7:])
+            after: Task = Task.objects.create(title="After")
+            Task.objects.filter(pk=after.pk).update(description="Dogs too")
+            return (
+                list(
+                    Task.objects.order_by("pk")
+                    .values_list("pk", "title", "change_seq", "version")
+                ),
+                TaskChangeCounter.objects.get().value,
+                [
+                    [
+                        result["pk"] for result in search_tasks(
+                            query,
+                            page=1,
+                            page_size=100,
+                        )[0]
+                    ]
+                    for query in (rows[3][0], "dogs", "the")
+                ],
+            )
+
+        with transaction.atomic():
+            inserted: tuple = insert_and_describe(seeding.insert_rows)
+            transaction.set_rollback(True)
+        seeded: tuple = insert_and_describe(seeding.sqlite_insert_rows)
+        self.assertEqual(seeded, inserted)
+        self.assertEqual(len(seeded[0]), 22)
+
+
+class ChangeCounterTests(TransactionTestCase):
+    """Tests of numbering changes without the counter row."""
+    def test_write_after_flush(self) -> None:
+        """
+        Test that tasks can be written and their changes synced after a
+        flush deletes the counter row.
+        """
+        call_command("flush", interactive=False, verbosity=0)
+        self.assertFalse(TaskChangeCounter.objects.exists())
+
+        task: Task = Task.objects.create(title="Test task")
+        deleted_pk: int = Task.objects.create(title="Deleted task").pk
+        Task.objects.filter(pk=deleted_pk).delete()
+        task.refresh_from_db()
+        self.assertGreater(task.change_seq, 0)
+        changes, has_more, _ = get_changes(0, fields=("pk",), limit=10)
+        self.assertEqual(
+            [(change["pk"], change["deleted"]) for change in changes],
+            [(task.pk, False), (deleted_pk, True)],
+        )
+        self.assertFalse(has_more)
+
+
+class TaskVersionTests(TestCase):
+    def test_every_write_increments(self) -> None:
+        """
+        Test that tasks start at version 1 and that every way of writing one
+        increments its version, including saving an instance read before
+        another write, which must not set the version back.
+        """
+        task: Task = Task.objects.create(title="Test task")
+        self.assertEqual(task.version, 1)
+        stale: Task = Task.objects.get(pk=task.pk)
+        Task.objects.filter(pk=task.pk).update(completed=True)
+        task.refresh_from_db()
+        self.assertEqual(task.version, 2)
+        stale.description = "Saved from a stale instance"
+        stale.save()
+        task.refresh_from_db()
+        self.assertEqual(task.version, 3)
+        Task.objects.bulk_create(
+            [Task(title="Test task", description="Imported")],
+            update_conflicts=True,
+            unique_fields=["title"],
+            update_fields=["description"],
+        )
+        task.refresh_from_db()
+        self.assertEqual(task.version, 4)
+        self.assertEqual(Task.objects.bulk_create([
+            Task(title="Bulk task"),
+        ])[0].version, 1)
+
+
+class SeleniumTests(StaticLiveServerTestCase):
+    """Tests using Selenium."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.chrome_driver = webdriver.Chrome()
+        cls.chrome_driver.implicitly_wait(5)
+
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.chrome_driver.quit()
+    
+
+    def verify_tasks_listed(self, tasks: List[Task]) -> None:
+        """
+        Verify that a list of tasks is being listed correctly
+        in the current task-list view.
+        """
+        for task in tasks:
+            list_item = self.chrome_driver.find_element(
+                By.CSS_SELECTOR,
+                f"li[data-task-pk=\"{task.pk}\"]",
+            )
+            self.assertEqual(
+                list_item.find_element(By.TAG_NAME, "a").text,
+                task.title,
+            )
+
+
+    def test_add_tasks_from_list_view(self) -> None:
+        """
+        Test that tasks are successfully created and displayed after
+        using the "Add a new task" input from the task-list view.
+        """
+        self.chrome_driver.get(
+            self.live_server_url + reverse("todo:task-list")
+        )
+        tasks_created: List[str] = []
+        for i in range(5):
+            task_title: str = f"Test task {i}"
+            add_task_input = self.chrome_driver.find_element(
+                By.ID,
+                "add-task-input"
+            )
+            add_task_input.send_keys(task_title, webdriver.Keys.ENTER)
+            # Wait for the task to be added to the database
+            time.sleep(0.2)
+            tasks_created.append(Task.objects.get(title=task_title))
+            self.verify_tasks_listed(tasks_created)
+
+
+    def test_add_tasks_from_list_view_using_button(self) -> None:
         """
         Test that tasks are successfully created and displayed after
         using the "Add a new task" input and then the "ADD" button
@@ -521,15 +2686,48 @@ class SeleniumTests(StaticLiveServerTestCase):
 
         checkbox.click()
         self.assertIsNotNone(checkbox.get_attribute("checked"))
+        # Wait for the change to be sent.
+        time.sleep(0.5)
         task.refresh_from_db(fields=["completed"])
         self.assertEqual(task.completed, True)
 
         checkbox.click()
         self.assertIsNone(checkbox.get_attribute("checked"))
+        time.sleep(0.5)
         task.refresh_from_db(fields=["completed"])
         self.assertEqual(task.completed, False)
 
 
+    def test_checkbox_toggles_coalesced(self) -> None:
+        """
+        Test that rapid changes of checkboxes are sent together and that
+        the last change of each task is saved.
+        """
+        tasks: List[Task] = [
+            Task.objects.create(title=f"Test task {i}") for i in range(2)
+        ]
+        self.chrome_driver.get(
+            self.live_server_url + reverse("todo:task-list")
+        )
+        with mock.patch(
+            "todo.views.apply_task_batch",
+            wraps=apply_task_batch,
+        ) as batch:
+            for task in tasks:
+                checkbox = self.chrome_driver.find_element(
+                    By.CSS_SELECTOR,
+                    f"li[data-task-pk='{task.pk}'] input.task-list-checkbox"
+                )
+                for _ in range(3):
+                    checkbox.click()
+            # Wait for the changes to be sent.
+            time.sleep(0.5)
+        self.assertEqual(batch.call_count, 1)
+        for task in tasks:
+            task.refresh_from_db(fields=["completed"])
+            self.assertEqual(task.completed, True)
+
+
     def test_delete_task_from_detail_view(self) -> None:
         """
         Test that the delete button in the task-detail view deletes
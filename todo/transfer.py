@@ -0,0 +1,325 @@
+from django.db import connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import bump_task_list_version
+from .events import RESET_EVENT
+from .events import publish
+from .models import Task
+from .serializers import dumps
+
+from datetime import datetime
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TextIO
+from typing import Tuple
+from typing import TypeVar
+import csv
+import io
+import itertools
+import json
+import time
+
+
+# The fields of a task that are exported and imported. Tasks are matched by
+# their unique title, so pks are not kept.
+TRANSFER_FIELDS: Tuple[str, ...] = (
+    "title",
+    "completed",
+    "due_date",
+    "description",
+)
+FORMATS: Tuple[str, ...] = ("jsonl", "csv")
+ON_CONFLICT_CHOICES: Tuple[str, ...] = ("ignore", "update")
+
+T = TypeVar("T")
+
+
+class InvalidRow(ValueError):
+    """Raised when an imported row is not a valid task."""
+
+
+def guess_format(path: str, format: Optional[str]) -> str:
+    """The given format, or else the one that the path's extension names."""
+    if format is not None:
+        return format
+    for candidate in FORMATS:
+        if path.endswith(f".{candidate}"):
+            return candidate
+    return "jsonl"
+
+
+def report_progress(
+    items: Iterable[T],
+    write: Callable[[str], None],
+    verb: str,
+    *,
+    total: Optional[int] = None,
+    interval: float = 1.0,
+) -> Iterator[T]:
+    """
+    Pass items through, writing how many have passed and how fast at most
+    every interval seconds, and once more at the end.
+    """
+    start: float = time.monotonic()
+    reported: float = start
+    count: int = 0
+
+    def report() -> None:
+        seconds: float = max(time.monotonic() - start, 1e-9)
+        of_total: str = f" of {total}" if total is not None else ""
+        write(f"{verb} {count}{of_total} tasks ({count / seconds:.0f}/s)")
+
+    for item in items:
+        yield item
+        count += 1
+        if time.monotonic() - reported >= interval:
+            reported = time.monotonic()
+            report()
+    report()
+
+
+# Export
+
+
+def iter_export_rows(batch_size: int) -> Iterator[Tuple[Any, ...]]:
+    """
+    The transferred fields of every task, oldest first, read batch_size
+    rows at a time (through a server-side cursor on Postgres), so that
+    memory use does not grow with the number of tasks.
+    """
+    return (
+        Task.objects.order_by("pk")
+        .values_list(*TRANSFER_FIELDS)
+        .iterator(chunk_size=batch_size)
+    )
+
+
+def _format_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def format_rows(
+    rows: Iterable[Tuple[Any, ...]],
+    format: str,
+    batch_size: int,
+) -> Iterator[str]:
+    """Format rows as JSON Lines or CSV with a header, a batch at a time."""
+    if format == "csv":
+        buffer: io.StringIO = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(TRANSFER_FIELDS)
+        for batch in itertools.batched(rows, batch_size):
+            writer.writerows(
+                [_format_value(value) for value in row] for row in batch
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+    for batch in itertools.batched(rows, batch_size):
+        yield "".join([
+            dumps(dict(zip(TRANSFER_FIELDS, row))).decode() + "\n"
+            for row in batch
+        ])
+
+
+# Import
+
+
+def read_rows(file: TextIO, format: str) -> Iterator[Dict[str, Any]]:
+    """Read rows of tasks from a file of JSON Lines or of CSV with a header."""
+    if format == "csv":
+        yield from csv.DictReader(file)
+        return
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            row: Any = json.loads(line)
+        except ValueError as e:
+            raise InvalidRow(f"Line {line_number}: {e}") from e
+        if not isinstance(row, dict):
+            raise InvalidRow(f"Line {line_number}: expected a JSON object.")
+        yield row
+
+
+def _parse_completed(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    # CSV has only strings, and leaves out missing values.
+    if isinstance(value, str) and value.lower() in ("true", "1"):
+        return True
+    if isinstance(value, str) and value.lower() in ("false", "0", ""):
+        return False
+    raise ValueError(f"completed must be true or false, not {value!r}")
+
+
+def _parse_due_date(value: Any) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    due_date: Optional[datetime] = (
+        parse_datetime(value) if isinstance(value, str) else None
+    )
+    if due_date is None:
+        raise ValueError(f"due_date must be an ISO 8601 date, not {value!r}")
+    if timezone.is_naive(due_date):
+        due_date = timezone.make_aware(due_date)
+    return due_date
+
+
+def parse_task(row: Dict[str, Any], number: int) -> Task:
+    """
+    Make an unsaved task of the numbered row. This checks types but not
+    every model validator, which would be too slow for millions of rows.
+    """
+    try:
+        # CSV rows with too many values have them under None.
+        unknown: List[str] = sorted(
+            str(field) for field in set(row) - set(TRANSFER_FIELDS)
+        )
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(unknown)}")
+        title: Any = row.get("title")
+        if not isinstance(title, str) or not title:
+            raise ValueError("a title is required")
+        description: Any = row.get("description") or ""
+        if not isinstance(description, str):
+            raise ValueError("description must be a string")
+        return Task(
+            title=title,
+            completed=_parse_completed(row.get("completed", False)),
+            due_date=_parse_due_date(row.get("due_date")),
+            description=description,
+        )
+    except ValueError as e:
+        raise InvalidRow(f"Row {number}: {e}") from e
+
+
+def parse_tasks(rows: Iterable[Dict[str, Any]]) -> Iterator[Task]:
+    for number, row in enumerate(rows, 1):
+        yield parse_task(row, number)
+
+
+def _unique_titles(tasks: Iterable[Task]) -> List[Task]:
+    # A statement can only insert or update each title once, so the last
+    # task with a title in a batch wins.
+    return list({task.title: task for task in tasks}.values())
+
+
+def bulk_insert(tasks: List[Task], on_conflict: str) -> None:
+    """Insert tasks, ignoring or updating those whose titles exist."""
+    if on_conflict == "update":
+        Task.objects.bulk_create(
+            _unique_titles(tasks),
+            update_conflicts=True,
+            unique_fields=["title"],
+            update_fields=["completed", "due_date", "description", "updated_at"],
+        )
+    else:
+        Task.objects.bulk_create(tasks, ignore_conflicts=True)
+
+
+# Rows are copied into this table, which is emptied on every commit, and
+# inserted from it with conflicts handled, since COPY cannot handle them.
+POSTGRES_COPY_TABLE_SQL: str = (
+    "CREATE TEMPORARY TABLE IF NOT EXISTS todo_task_import ("
+    "title text, completed boolean, due_date timestamptz, description text"
+    ") ON COMMIT DELETE ROWS"
+)
+POSTGRES_COPY_SQL: str = (
+    "COPY todo_task_import (title, completed, due_date, description) "
+    "FROM STDIN"
+)
+POSTGRES_INSERT_SQL: str = (
+    "INSERT INTO todo_task (title, completed, due_date, description, "
+    "updated_at) "
+    "SELECT title, completed, due_date, description, now() "
+    "FROM todo_task_import "
+    "ON CONFLICT (title) DO {}"
+)
+POSTGRES_ON_CONFLICT_SQL: Dict[str, str] = {
+    "ignore": "NOTHING",
+    "update": (
+        "UPDATE SET completed = excluded.completed, "
+        "due_date = excluded.due_date, "
+        "description = excluded.description, "
+        "updated_at = excluded.updated_at"
+    ),
+}
+
+
+def copy_rows(rows: Iterable[Tuple[Any, ...]], on_conflict: str) -> None:
+    """
+    Insert rows of the transferred fields, ignoring or updating those whose
+    titles exist, with COPY, which is faster than INSERT. Postgres only.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_COPY_TABLE_SQL)
+        # Django's cursor wraps psycopg's, which can copy.
+        with cursor.cursor.copy(POSTGRES_COPY_SQL) as copy:
+            for row in rows:
+                copy.write_row(row)
+        cursor.execute(
+            POSTGRES_INSERT_SQL.format(POSTGRES_ON_CONFLICT_SQL[on_conflict])
+        )
+
+
+def copy_insert(tasks: List[Task], on_conflict: str) -> None:
+    """Like bulk_insert(), with copy_rows(). Postgres only."""
+    copy_rows(
+        (
+            (task.title, task.completed, task.due_date, task.description)
+            for task in _unique_titles(tasks)
+        ),
+        on_conflict,
+    )
+
+
+def insert_in_batches(
+    items: Iterable[T],
+    batch_size: int,
+    insert: Callable[[List[T]], None],
+) -> None:
+    """
+    Insert items batch_size at a time, each batch in its own transaction,
+    so that memory use does not grow with the number of items and an
+    import that fails keeps the batches before the failure.
+
+    The triggers of todo.changes number the changes, but bulk inserts send
+    no signals, so open task lists are told to reload once at the end.
+    """
+    try:
+        for batch in itertools.batched(items, batch_size):
+            with transaction.atomic():
+                insert(list(batch))
+    finally:
+        bump_task_list_version()
+        publish(RESET_EVENT)
+
+
+def import_tasks(
+    tasks: Iterable[Task],
+    *,
+    batch_size: int,
+    on_conflict: str,
+    use_copy: bool,
+) -> None:
+    """Insert tasks with insert_in_batches(), by COPY if use_copy is set."""
+    insert: Callable[[List[Task], str], None] = (
+        copy_insert if use_copy else bulk_insert
+    )
+    insert_in_batches(
+        tasks,
+        batch_size,
+        lambda batch: insert(batch, on_conflict),
+    )
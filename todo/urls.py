@@ -1,17 +1,56 @@
+from django.conf import settings
+from django.urls import URLPattern
 from django.urls import path
 
+from . import async_views
 from . import views
 
+from types import ModuleType
+from typing import List
+
+
+def get_urlpatterns(task_views: ModuleType) -> List[URLPattern]:
+    """
+    The app's URL patterns, with the task views of task_views: todo.views
+    or todo.async_views.
+    """
+    return [
+        path("", task_views.task_list, name="task-list"),
+        path("task/<int:pk>", task_views.task_detail, name="task-detail"),
+        path("api/create-task", task_views.create_task, name="create-task"),
+        path(
+            "api/edit-task-completed/<int:pk>",
+            task_views.edit_task_completed,
+            name="edit-task-completed"
+        ),
+        path(
+            "api/delete-task/<int:pk>",
+            task_views.delete_task,
+            name="delete-task",
+        ),
+        path("api/tasks", task_views.api_task_list, name="api-task-list"),
+        path(
+            "api/tasks/<int:pk>",
+            task_views.api_task_detail,
+            name="api-task-detail",
+        ),
+        path("api/tasks/batch", views.batch_tasks, name="batch-tasks"),
+        path("api/tasks/search", task_views.task_search, name="task-search"),
+        path("api/tasks/events", views.task_events, name="task-events"),
+        path(
+            "api/tasks/changes",
+            task_views.api_task_changes,
+            name="api-task-changes",
+        ),
+        path("metrics", views.metrics, name="metrics"),
+        path("profiles", views.profile_list, name="profile-list"),
+        path("profiles/<str:name>", views.profile_file, name="profile-file"),
+    ]
+
 
 app_name = "todo"
-urlpatterns = [
-    path("", views.task_list, name="task-list"),
-    path("task/<int:pk>", views.task_detail, name="task-detail"),
-    path("api/create-task", views.create_task, name="create-task"),
-    path(
-        "api/edit-task-completed/<int:pk>",
-        views.edit_task_completed,
-        name="edit-task-completed"
-    ),
-    path("api/delete-task/<int:pk>", views.delete_task, name="delete-task"),
-]
\ No newline at end of file
+# Each server is given the views that suit it: under WSGI an async view
+# would run through async_to_sync on every request.
+urlpatterns = get_urlpatterns(
+    async_views if settings.TODO_ASGI else views,
+)
@@ -1,45 +1,332 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render
 from django.shortcuts import redirect
 from django.shortcuts import get_object_or_404
+from django.db import connection
+from django.db import transaction
+from django.utils import timezone
 from django.urls import reverse
+from django.template.loader import render_to_string
 from django.http import HttpResponse
+from django.http import Http404
 from django.http import HttpRequest
 from django.http import HttpResponseNotAllowed
 from django.http import HttpResponseBadRequest
+from django.http import HttpResponseForbidden
+from django.http import StreamingHttpResponse
+from django.http import FileResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.db.models import QuerySet
 
 from .models import Task
 
 from .forms import TaskForm
 
+from .batch import BatchError
+from .batch import apply_task_batch
 
+from .cache import bump_task_list_version
+from .cache import get_or_render_fragment
+
+from .changes import get_changes
+from .changes import get_pruned_seq
+
+from .conditional import task_detail_etag
+from .conditional import task_detail_last_modified
+from .conditional import task_list_etag
+
+from .events import get_broker
+from .events import publish
+from .events import task_deleted_event
+from .events import task_saved_event
+
+from .filters import InvalidFilter
+from .filters import TaskListFilter
+
+from .metrics import CONTENT_TYPE
+from .metrics import is_scrape_authorized
+from .metrics import render_metrics
+
+from .pagination import InvalidCursor
+from .pagination import KeysetPage
+
+from .profiling import PSTATS_SUFFIX
+from .profiling import SPEEDSCOPE_SUFFIX
+from .profiling import format_pstats
+from .profiling import get_dump_path
+from .profiling import list_dumps
+
+from .rows import PK_PLACEHOLDER
+from .rows import ROW_FIELDS
+from .rows import render_task_rows
+
+from .search import search_tasks
+
+from .serializers import FastJsonResponse
+from .serializers import InvalidFields
+from .serializers import TASK_FIELDS
+from .serializers import TASK_LIST_FIELDS
+from .serializers import dumps
+from .serializers import parse_fields
+
+from functools import partial
+from pathlib import Path
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+import asyncio
+import itertools
+import json
+import uuid
+
+
+# The template engine of the app's pages, which runs no context processors
+# since the pages use none. See TEMPLATES in config/settings.py.
+TEMPLATE_ENGINE: str = "todo"
+
+# Placeholder for the rows in a streamed task-list page. It is random so that
+# it can never collide with a task title.
+STREAM_MARKER: str = f"task-list-rows-{uuid.uuid4().hex}"
+
+
+# Pages are private because they embed a CSRF token, and must be revalidated
+# on every use, which costs a 304 without a body when nothing has changed.
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=task_list_etag)
 def task_list(request: HttpRequest) -> HttpResponse:
-    return render(request, "todo/task-list.html", {"task_list": Task.objects.all()})
+    try:
+        list_filter: TaskListFilter = TaskListFilter(request.GET)
+    except InvalidFilter as e:
+        return HttpResponseBadRequest(str(e))
+    if "stream" in request.GET:
+        return stream_task_list(request, list_filter)
+
+    # The cursor is made from the last row's values of the ordering fields.
+    tasks: QuerySet = list_filter.apply(
+        Task.objects.for_list(list_filter.ordering)
+    )
+    try:
+        page: KeysetPage = KeysetPage(
+            tasks,
+            cursor=request.GET.get("cursor"),
+            page_size=settings.TODO_TASK_LIST_PAGE_SIZE,
+            ordering=list_filter.ordering,
+        )
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+
+    def render_page() -> str:
+        return render_to_string(
+            "todo/task-list-content.html",
+            {
+                "task_list": page,
+                "task_list_rows": render_task_rows(
+                    (task.pk, task.title, task.completed) for task in page
+                ),
+                "list_params": list_filter.query_params,
+            },
+            using=TEMPLATE_ENGINE,
+        )
+
+    # The page is only queried if the fragment is not already cached.
+    task_list_html: str = get_or_render_fragment(
+        "task-list",
+        render_page,
+        *list_filter.key,
+        page.after,
+    )
+    context = {
+        "task_list": page,
+        "task_list_html": task_list_html,
+        "list_filter": list_filter,
+        "pk_placeholder": PK_PLACEHOLDER,
+    }
+    return render(
+        request,
+        "todo/task-list.html",
+        context,
+        using=TEMPLATE_ENGINE,
+    )
 
 
+def stream_task_list(
+    request: HttpRequest,
+    list_filter: TaskListFilter,
+) -> StreamingHttpResponse:
+    """
+    Stream every task in the task-list page, rendering the rows in chunks
+    as they are read from the database so that memory use and time to
+    first byte do not grow with the number of tasks.
+    """
+    page_html: str = render_to_string(
+        "todo/task-list.html",
+        {
+            "streaming": True,
+            "stream_marker": STREAM_MARKER,
+            "list_filter": list_filter,
+            "pk_placeholder": PK_PLACEHOLDER,
+        },
+        request,
+        using=TEMPLATE_ENGINE,
+    )
+    head, tail = page_html.split(STREAM_MARKER)
+    tasks: QuerySet = KeysetPage.order(
+        list_filter.apply(Task.objects.for_list()),
+        list_filter.ordering,
+    )
+    # Under ASGI the rows are read without holding a thread for the whole
+    # response. A WSGI server can only consume a synchronous iterator.
+    if isinstance(request, ASGIRequest):
+        return StreamingHttpResponse(aiter_task_list_html(head, tasks, tail))
+    return StreamingHttpResponse(iter_task_list_html(head, tasks, tail))
+
+
+def iter_task_list_html(head: str, tasks: QuerySet, tail: str) -> Iterator[str]:
+    chunk_size: int = settings.TODO_TASK_LIST_CHUNK_SIZE
+    yield head
+    # Rows are read as tuples, without building model instances.
+    for chunk in itertools.batched(
+        tasks.values_list(*ROW_FIELDS).iterator(chunk_size=chunk_size),
+        chunk_size,
+    ):
+        yield render_task_rows(chunk)
+    yield tail
+
+
+async def aiter_task_list_html(
+    head: str,
+    tasks: QuerySet,
+    tail: str,
+) -> AsyncIterator[str]:
+    chunk_size: int = settings.TODO_TASK_LIST_CHUNK_SIZE
+    # QuerySet.aiterator() runs a values_list() query as soon as it is
+    # created, in the event loop, so read the chunks in a thread instead.
+    rows: Iterator[Tuple[int, str, bool]] = tasks.values_list(
+        *ROW_FIELDS,
+    ).iterator(chunk_size=chunk_size)
+    read_chunk = sync_to_async(
+        lambda: list(itertools.islice(rows, chunk_size))
+    )
+    yield head
+    while chunk := await read_chunk():
+        yield render_task_rows(chunk)
+    yield tail
+
+
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=task_detail_etag,
+    last_modified_func=task_detail_last_modified,
+)
 def task_detail(request: HttpRequest, pk: int) -> HttpResponse:
     task: Task = get_object_or_404(Task, pk=pk)
 
     form: TaskForm
+    conflict: bool = False
     if request.method == "POST":
         form = TaskForm(request.POST, instance=task)
         if form.is_valid():
-            form.save()
-            return redirect(reverse("todo:task-detail", args=(pk,)))
+            if save_task(form.instance, form.cleaned_data["version"]):
+                return redirect(reverse("todo:task-detail", args=(pk,)))
+            # The task changed since the form was filled in. Show it as it
+            # is now, rather than overwrite the other change.
+            task = get_object_or_404(Task, pk=pk)
+            form = TaskForm(instance=task)
+            conflict = True
     else:
         form = TaskForm(instance=task)
 
-    context = {"task_title": task.title, "form": form, "task_pk": task.pk}
-    return render(request, "todo/task-detail.html", context)
+    context = {
+        "task_title": task.title,
+        "form": form,
+        "task_pk": task.pk,
+        "conflict": conflict,
+    }
+    return render(
+        request,
+        "todo/task-detail.html",
+        context,
+        using=TEMPLATE_ENGINE,
+        status=409 if conflict else 200,
+    )
+
+
+def save_task(task: Task, version: Optional[int]) -> bool:
+    """
+    Save the form fields of a task if it is still at version, or whatever
+    its version if that is None, and return whether it was saved.
+
+    A single conditional UPDATE, rather than Model.save(), so that a task
+    changed since it was read is not overwritten, without locking it. Raises
+    Http404 if the task no longer exists.
+    """
+    tasks: QuerySet = Task.objects.filter(pk=task.pk)
+    if version is not None:
+        tasks = tasks.filter(version=version)
+    updated: int = tasks.update(
+        **{field: getattr(task, field) for field in TaskForm.Meta.fields},
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        if not Task.objects.filter(pk=task.pk).exists():
+            raise Http404("No Task matches the given query.")
+        return False
+    # Updates do not send model signals.
+    transaction.on_commit(bump_task_list_version)
+    transaction.on_commit(partial(publish, task_saved_event(task)))
+    return True
+
+
+def parse_version(value: Optional[str]) -> Optional[int]:
+    """
+    Parse the "version" parameter of a write, which makes it conditional on
+    the task being at that version. Raises ValueError if it is invalid.
+    """
+    if value is None:
+        return None
+    version: int = int(value)
+    if version < 1:
+        raise ValueError(value)
+    return version
+
+
+def conflict_response(pk: int) -> HttpResponse:
+    """
+    A 409 response to a write conditional on a version that a task no
+    longer has, with the task's current fields so that the client can
+    reconcile. Raises Http404 if the task no longer exists.
+    """
+    task: Optional[dict] = (
+        Task.objects.filter(pk=pk).values(*TASK_FIELDS).first()
+    )
+    if task is None:
+        raise Http404("No Task matches the given query.")
+    return FastJsonResponse(task, status=409)
 
 
 def create_task(request: HttpRequest) -> HttpResponse:
+    """
+    Create a task and return the fields of its row in the task list as
+    JSON, so that the page can add the row without reloading.
+    """
     if request.method != "POST":
         return HttpResponseNotAllowed(("POST",))
 
     form: TaskForm = TaskForm(request.POST)
     if form.is_valid():
         form.save()
-        return HttpResponse(status=201)
+        return FastJsonResponse(
+            {field: getattr(form.instance, field) for field in ROW_FIELDS},
+            status=201,
+        )
     else:
         return HttpResponseBadRequest(str(form.errors) + str(request.POST))
 
@@ -48,18 +335,346 @@ def edit_task_completed(request: HttpRequest, pk: int) -> HttpResponse:
     if request.method != "POST":
         return HttpResponseNotAllowed(("POST",))
 
-    task: Task = get_object_or_404(Task, pk=pk)
     if "completed" not in request.POST:
+        if not Task.objects.filter(pk=pk).exists():
+            raise Http404("No Task matches the given query.")
         return HttpResponseBadRequest("\"completed\" field is required.")
-    task.completed = request.POST["completed"].lower() == "true"
-    task.save()
+    try:
+        version: Optional[int] = parse_version(request.POST.get("version"))
+    except ValueError:
+        return HttpResponseBadRequest(
+            "\"version\" must be a positive integer."
+        )
+    # A single UPDATE, rather than fetching the whole row and saving every
+    # column, which could also overwrite a concurrent edit of another field.
+    # With a version, it only applies if the task is still at that version.
+    completed: bool = request.POST["completed"].lower() == "true"
+    tasks: QuerySet = Task.objects.filter(pk=pk)
+    if version is not None:
+        tasks = tasks.filter(version=version)
+    updated: int = tasks.update(
+        completed=completed,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        if version is not None:
+            return conflict_response(pk)
+        raise Http404("No Task matches the given query.")
+    # Updates do not send model signals.
+    transaction.on_commit(bump_task_list_version)
+    transaction.on_commit(partial(publish, task_saved_event(
+        {"pk": pk, "completed": completed},
+        ("pk", "completed"),
+    )))
     return HttpResponse(status=200)
 
 
 def delete_task(request: HttpRequest, pk: int) -> HttpResponse:
     if request.method != "POST":
         return HttpResponseNotAllowed(("POST",))
-    
-    task: Task = get_object_or_404(Task, pk=pk)
-    task.delete()
-    return HttpResponse(status=200)
\ No newline at end of file
+
+    try:
+        version: Optional[int] = parse_version(request.POST.get("version"))
+    except ValueError:
+        return HttpResponseBadRequest(
+            "\"version\" must be a positive integer."
+        )
+    # QuerySet.delete() selects the rows before deleting them whenever Task
+    # has delete signal receivers. Task has no relations to cascade to, so
+    # issue the DELETE directly and do the receivers' work here instead.
+    deleted: int = delete_task_row(pk, version)
+    if not deleted:
+        if version is not None:
+            return conflict_response(pk)
+        raise Http404("No Task matches the given query.")
+    transaction.on_commit(bump_task_list_version)
+    transaction.on_commit(partial(publish, task_deleted_event(pk)))
+    return HttpResponse(status=200)
+
+
+def delete_task_row(pk: int, version: Optional[int]) -> int:
+    """
+    Delete a task, if it is at version unless that is None, with a single
+    raw DELETE that sends no signals, and return the number of rows deleted.
+    """
+    quote_name = connection.ops.quote_name
+    sql: str = "DELETE FROM {} WHERE {} = %s".format(
+        quote_name(Task._meta.db_table),
+        quote_name(Task._meta.pk.column),
+    )
+    params: List[Any] = [pk]
+    if version is not None:
+        sql += " AND {} = %s".format(
+            quote_name(Task._meta.get_field("version").column),
+        )
+        params.append(version)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def batch_tasks(request: HttpRequest) -> HttpResponse:
+    """
+    Apply a JSON array of create, complete and delete operations in one
+    transaction. See todo.batch.apply_task_batch() for the format.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(("POST",))
+
+    try:
+        operations: Any = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest("The request body must be JSON.")
+    if not isinstance(operations, list):
+        return HttpResponseBadRequest("Expected a JSON array of operations.")
+    if len(operations) > settings.TODO_BATCH_MAX_OPERATIONS:
+        return HttpResponseBadRequest(
+            "A batch may contain at most "
+            f"{settings.TODO_BATCH_MAX_OPERATIONS} operations."
+        )
+
+    try:
+        results: List[dict] = apply_task_batch(operations)
+    except BatchError as e:
+        errors: List[dict] = [
+            {"index": index, "errors": field_errors}
+            for index, field_errors in e.errors.items()
+        ]
+        return FastJsonResponse({"errors": errors}, status=e.status)
+    return FastJsonResponse({"results": results})
+
+
+def task_search(request: HttpRequest) -> HttpResponse:
+    """
+    Full-text search of task titles and descriptions, ranked best first and
+    paginated with the "page" query parameter.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+
+    query: str = request.GET.get("q", "").strip()
+    if not query:
+        return HttpResponseBadRequest("\"q\" parameter is required.")
+    try:
+        page: int = int(request.GET.get("page", 1))
+        if page < 1:
+            raise ValueError(page)
+    except ValueError:
+        return HttpResponseBadRequest("\"page\" must be a positive integer.")
+
+    results, has_next = search_tasks(
+        query,
+        page=page,
+        page_size=settings.TODO_SEARCH_PAGE_SIZE,
+    )
+    return FastJsonResponse({
+        "results": results,
+        "page": page,
+        "has_next": has_next,
+    })
+
+
+def api_task_list(request: HttpRequest) -> HttpResponse:
+    """
+    List tasks as JSON, a page at a time. Takes the task list's "status",
+    "sort", "q" and "cursor" parameters, and "fields", a comma-separated
+    list of the fields to return.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+
+    try:
+        fields: Tuple[str, ...] = parse_fields(
+            request.GET.get("fields"),
+            TASK_LIST_FIELDS,
+        )
+        list_filter: TaskListFilter = TaskListFilter(request.GET)
+    except (InvalidFields, InvalidFilter) as e:
+        return HttpResponseBadRequest(str(e))
+
+    # Rows are read as dictionaries rather than model instances, and only
+    # with the requested columns and those needed for the cursor.
+    columns: Tuple[str, ...] = tuple(
+        dict.fromkeys(("pk", list_filter.ordering, *fields))
+    )
+    try:
+        page: KeysetPage = KeysetPage(
+            list_filter.apply(Task.objects.values(*columns)),
+            cursor=request.GET.get("cursor"),
+            page_size=settings.TODO_TASK_LIST_PAGE_SIZE,
+            ordering=list_filter.ordering,
+        )
+    except InvalidCursor as e:
+        return HttpResponseBadRequest(str(e))
+
+    results: List[dict] = [
+        {field: row[field] for field in fields} for row in page
+    ]
+    return FastJsonResponse({
+        "results": results,
+        "next_cursor": page.next_cursor,
+    })
+
+
+def api_task_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Get a task as JSON. Takes "fields", a comma-separated list of the fields
+    to return.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+
+    try:
+        fields: Tuple[str, ...] = parse_fields(
+            request.GET.get("fields"),
+            TASK_FIELDS,
+        )
+    except InvalidFields as e:
+        return HttpResponseBadRequest(str(e))
+
+    task: Optional[dict] = Task.objects.filter(pk=pk).values(*fields).first()
+    if task is None:
+        raise Http404("No Task matches the given query.")
+    return FastJsonResponse(task)
+
+
+def api_task_changes(request: HttpRequest) -> HttpResponse:
+    """
+    Get the changes to tasks since a client last synced, as JSON. Takes
+    "since", the "next_since" of the client's last response (0 or absent to
+    sync from the beginning), and "fields", a comma-separated list of the
+    fields of changed tasks to return.
+
+    Deleted tasks are returned with "deleted": true. While "has_more" is
+    true, there are more changes to fetch with the new "next_since".
+
+    If tombstones of deleted tasks have been pruned since the client last
+    synced, it is sent "reset": true and no changes instead, and must
+    discard its tasks and sync again from the start.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+
+    try:
+        fields: Tuple[str, ...] = parse_fields(
+            request.GET.get("fields"),
+            TASK_FIELDS,
+        )
+    except InvalidFields as e:
+        return HttpResponseBadRequest(str(e))
+    try:
+        since: int = int(request.GET.get("since") or 0)
+        if since < 0:
+            raise ValueError(since)
+    except ValueError:
+        return HttpResponseBadRequest(
+            "\"since\" must be a non-negative integer."
+        )
+
+    if since and since < get_pruned_seq():
+        return FastJsonResponse({
+            "reset": True,
+            "changes": [],
+            "next_since": 0,
+            "has_more": True,
+        })
+    changes, has_more, next_since = get_changes(
+        since,
+        fields=fields,
+        limit=settings.TODO_CHANGES_PAGE_SIZE,
+    )
+    return FastJsonResponse({
+        "reset": False,
+        "changes": changes,
+        "next_since": next_since,
+        "has_more": has_more,
+    })
+
+
+async def task_events(request: HttpRequest) -> HttpResponse:
+    """
+    Stream changes to tasks as server-sent events, so that open task lists
+    can patch themselves instead of reloading. Each event is a JSON object
+    with a "type" of "saved" (with the changed fields of the task),
+    "deleted" (with its pk) or "reset" (events were missed).
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+    if not isinstance(request, ASGIRequest):
+        # The stream would hold a WSGI worker for as long as the page stays
+        # open. 204 No Content tells EventSource not to reconnect.
+        return HttpResponse(status=204)
+
+    response: StreamingHttpResponse = StreamingHttpResponse(
+        iter_task_events(),
+        content_type="text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the events.
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def iter_task_events() -> AsyncIterator[str]:
+    keepalive: float = settings.TODO_EVENTS_KEEPALIVE
+    async with get_broker().subscribe() as subscription:
+        yield ": connected\n\n"
+        while True:
+            try:
+                event: Dict[str, Any] = await asyncio.wait_for(
+                    subscription.get(),
+                    keepalive,
+                )
+            except TimeoutError:
+                # Comments keep proxies from closing an idle connection.
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {dumps(event).decode()}\n\n"
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    The request metrics of this process in the Prometheus text format, when
+    settings.TODO_METRICS is set, to requests with the bearer token of
+    settings.TODO_METRICS_TOKEN.
+    """
+    if not settings.TODO_METRICS:
+        raise Http404("Metrics are disabled.")
+    if not is_scrape_authorized(request):
+        return HttpResponseForbidden("A valid metrics token is required.")
+    if request.method != "GET":
+        return HttpResponseNotAllowed(("GET",))
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
+
+
+@staff_member_required
+def profile_list(request: HttpRequest) -> HttpResponse:
+    """The request profiles dumped by todo.profiling, newest first."""
+    return render(
+        request,
+        "todo/profile-list.html",
+        {"dumps": list_dumps()},
+        using=TEMPLATE_ENGINE,
+    )
+
+
+@staff_member_required
+def profile_file(request: HttpRequest, name: str) -> HttpResponse:
+    """
+    A file of a dumped profile. cProfile dumps are shown as a summary of
+    the slowest functions unless "download" is given.
+    """
+    path: Optional[Path] = get_dump_path(name)
+    if path is None:
+        raise Http404("No such profile.")
+    if name.endswith(PSTATS_SUFFIX) and "download" not in request.GET:
+        return HttpResponse(format_pstats(path), content_type="text/plain")
+    return FileResponse(
+        path.open("rb"),
+        as_attachment="download" in request.GET,
+        content_type=(
+            "application/json"
+            if name.endswith(SPEEDSCOPE_SUFFIX)
+            else "text/plain"
+        ),
+    )